@@ -0,0 +1,143 @@
+"""
+Caché de respuestas de dashboards y estadísticas.
+
+- Cada dashboard se cachea por alcance (rol o usuario) con un TTL corto.
+- Las claves llevan una versión por dashboard; las señales post_save /
+  post_delete de los modelos que lo alimentan incrementan la versión al
+  confirmar la transacción, invalidando todas sus entradas de una vez.
+- Protección contra estampida: al vencer una entrada, solo el worker que
+  obtiene el bloqueo (cache.add) recalcula; los demás sirven la versión
+  vencida, o esperan brevemente si la entrada fue invalidada.
+
+Los modelos de cada dashboard se conectan en el `ready()` de su app (módulo
+signals.py), para que cualquier proceso que modifique datos (web, workers,
+comandos) invalide la caché.
+"""
+import functools
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from rest_framework import status
+from rest_framework.response import Response
+
+from .permissions import rol_usuario
+
+PREFIJO = 'dashboard'
+TIEMPO_BLOQUEO = 30          # segundos máximos de un recálculo
+ESPERA_MAXIMA = 5.0          # segundos que espera un worker sin entrada que servir
+INTERVALO_ESPERA = 0.05
+GRACIA = 300                 # segundos que una entrada vencida se conserva para servirla
+
+
+def alcance_por_rol(request):
+    return f"rol:{rol_usuario(request.user)}"
+
+
+def alcance_por_usuario(request):
+    return f"usuario:{request.user.id}"
+
+
+def alcance_staff_o_usuario(request):
+    """Los administradores (is_staff) comparten entrada; el resto, una por usuario"""
+    return 'staff' if request.user.is_staff else alcance_por_usuario(request)
+
+
+def _clave_version(nombre):
+    return f"{PREFIJO}:{nombre}:version"
+
+
+def version_dashboard(nombre):
+    version = cache.get(_clave_version(nombre))
+    if version is None:
+        # Una versión nueva basada en el reloj nunca coincide con entradas anteriores
+        cache.add(_clave_version(nombre), time.time_ns(), None)
+        version = cache.get(_clave_version(nombre))
+    return version
+
+
+def _incrementar_version(nombre):
+    try:
+        cache.incr(_clave_version(nombre))
+    except ValueError:
+        cache.add(_clave_version(nombre), time.time_ns(), None)
+
+
+def invalidar_dashboard(*nombres):
+    """Invalida las entradas de los dashboards al confirmar la transacción en curso"""
+    for nombre in nombres:
+        transaction.on_commit(functools.partial(_incrementar_version, nombre))
+
+
+def conectar_invalidacion(nombre, *modelos):
+    """Invalida el dashboard `nombre` cuando se guarda o elimina una instancia de `modelos`"""
+    def receptor(sender, **kwargs):
+        invalidar_dashboard(nombre)
+
+    for modelo in modelos:
+        uid = f"{PREFIJO}:{nombre}:{modelo._meta.label}"
+        post_save.connect(receptor, sender=modelo, weak=False, dispatch_uid=uid)
+        post_delete.connect(receptor, sender=modelo, weak=False, dispatch_uid=uid)
+
+
+class _RespuestaNoCacheable(Exception):
+    def __init__(self, respuesta):
+        self.respuesta = respuesta
+
+
+def obtener_o_calcular(clave, calcular, ttl):
+    """
+    Retorna el valor cacheado en `clave` o lo calcula con `calcular()`. Las
+    entradas se guardan con su vencimiento lógico y se conservan GRACIA
+    segundos más para servirlas mientras otro worker recalcula.
+    """
+    entrada = cache.get(clave)
+    if entrada is not None and entrada[1] > time.time():
+        return entrada[0]
+
+    bloqueo = f"{clave}:bloqueo"
+    if cache.add(bloqueo, 1, TIEMPO_BLOQUEO):
+        try:
+            valor = calcular()
+            cache.set(clave, (valor, time.time() + ttl), ttl + GRACIA)
+            return valor
+        finally:
+            cache.delete(bloqueo)
+
+    if entrada is not None:
+        return entrada[0]
+
+    limite = time.monotonic() + ESPERA_MAXIMA
+    while time.monotonic() < limite:
+        time.sleep(INTERVALO_ESPERA)
+        entrada = cache.get(clave)
+        if entrada is not None:
+            return entrada[0]
+    return calcular()
+
+
+def cache_dashboard(nombre, ttl=60, alcance=alcance_por_rol):
+    """
+    Decorador para vistas de función (debajo de @api_view/@permission_classes):
+    cachea `response.data` de las respuestas 200 por `alcance(request)` y
+    parámetros de la consulta.
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            def calcular():
+                respuesta = vista(request, *args, **kwargs)
+                if respuesta.status_code != status.HTTP_200_OK:
+                    raise _RespuestaNoCacheable(respuesta)
+                return respuesta.data
+
+            clave = f"{PREFIJO}:{nombre}:v{version_dashboard(nombre)}:{alcance(request)}"
+            if request.GET:
+                clave += ':' + request.GET.urlencode()
+            try:
+                return Response(obtener_o_calcular(clave, calcular, ttl))
+            except _RespuestaNoCacheable as e:
+                return e.respuesta
+        return envoltura
+    return decorador
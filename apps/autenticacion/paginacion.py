@@ -0,0 +1,304 @@
+"""
+Paginación por páginas o por cursor (keyset) para listados de alto volumen.
+
+- Modo `pagina`: PageNumberPagination habitual (COUNT + OFFSET).
+- Modo `cursor`: cada página continúa desde la posición de la última fila de
+  la anterior con un WHERE sobre los campos de ordenamiento (el `ordering` de
+  la vista o del modelo, con `id` como desempate). El costo de una página no
+  depende de su profundidad y las filas insertadas entre páginas no producen
+  duplicados ni saltos.
+
+El modo se elige por vista (`paginacion_por_defecto`) y por solicitud con
+`?paginacion=pagina|cursor`; un `?cursor=` o `?page=` implica su modo.
+
+El total se controla con `?conteo=exacto|estimado|ninguno` (por defecto
+`conteo_paginacion` de la vista). El estimado se lee de las estadísticas de
+PostgreSQL: pg_class.reltuples (sumando las particiones) si la consulta no
+tiene filtros, o la estimación de filas del plan (EXPLAIN) si los tiene. En
+otros motores el estimado es un COUNT exacto.
+"""
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as ErrorDjango
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+MODO_PAGINA = 'pagina'
+MODO_CURSOR = 'cursor'
+MODOS = (MODO_PAGINA, MODO_CURSOR)
+
+CONTEO_EXACTO = 'exacto'
+CONTEO_ESTIMADO = 'estimado'
+CONTEO_NINGUNO = 'ninguno'
+CONTEOS = (CONTEO_EXACTO, CONTEO_ESTIMADO, CONTEO_NINGUNO)
+
+
+# =====================================================================
+# CONTEO ESTIMADO
+# =====================================================================
+
+def _reltuples(conexion, tabla):
+    """Filas estimadas de `tabla` y sus particiones; None si no hay estadísticas"""
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.reltuples FROM pg_class c
+            WHERE c.relkind = 'r' AND (
+                c.oid = to_regclass(%s)
+                OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(%s))
+            )
+            """,
+            [tabla, tabla]
+        )
+        valores = [fila[0] for fila in cursor.fetchall()]
+    # reltuples = -1: tabla nunca analizada
+    if not valores or any(valor < 0 for valor in valores):
+        return None
+    return int(sum(valores))
+
+
+def _filas_plan(conexion, queryset):
+    sql, params = queryset.query.sql_with_params()
+    with conexion.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def conteo_estimado(queryset):
+    """Cantidad aproximada de filas de `queryset` sin recorrerlas (ver docstring del módulo)"""
+    conexion = connections[queryset.db]
+    if conexion.vendor != 'postgresql':
+        return queryset.count()
+    queryset = queryset.order_by()
+    if not queryset.query.where:
+        estimado = _reltuples(conexion, queryset.model._meta.db_table)
+        if estimado is not None:
+            return estimado
+    return _filas_plan(conexion, queryset)
+
+
+class PaginadorConteoEstimado(Paginator):
+    """Paginator de Django cuyo total es conteo_estimado()"""
+
+    @cached_property
+    def count(self):
+        return conteo_estimado(self.object_list)
+
+
+# =====================================================================
+# KEYSET
+# =====================================================================
+
+def campos_orden(queryset):
+    """
+    Campos de ordenamiento de `queryset` (order_by o Meta.ordering) con la
+    clave primaria como desempate. Solo admite campos propios no nulos.
+    """
+    modelo = queryset.model
+    orden = list(queryset.query.order_by) or list(modelo._meta.ordering)
+    pk = modelo._meta.pk.name
+    campos = []
+    for campo in orden:
+        if not isinstance(campo, str):
+            raise ValidationError({'paginacion': 'El ordenamiento no admite paginación por cursor'})
+        nombre = campo.lstrip('-')
+        if nombre == 'pk':
+            nombre = pk
+        try:
+            definicion = modelo._meta.get_field(nombre)
+        except FieldDoesNotExist:
+            definicion = None
+        if definicion is None or not definicion.concrete or definicion.null:
+            raise ValidationError({
+                'paginacion': f'El ordenamiento por "{nombre}" no admite paginación por cursor'
+            })
+        campos.append(('-' if campo.startswith('-') else '') + nombre)
+    if not any(campo.lstrip('-') == pk for campo in campos):
+        descendente = campos[0].startswith('-') if campos else False
+        campos.append(('-' if descendente else '') + pk)
+    return campos
+
+
+def _invertir(campo):
+    return campo[1:] if campo.startswith('-') else '-' + campo
+
+
+def _filtro_desde(campos, valores):
+    """
+    Filas posteriores a `valores` en el orden de `campos`:
+    (a > x) OR (a = x AND b > y) OR ... El límite sobre el primer campo se
+    repite fuera del OR para que el índice acote el recorrido.
+    """
+    posteriores = Q()
+    iguales = {}
+    for campo, valor in zip(campos, valores):
+        nombre = campo.lstrip('-')
+        operador = 'lt' if campo.startswith('-') else 'gt'
+        posteriores |= Q(**iguales, **{f'{nombre}__{operador}': valor})
+        iguales[nombre] = valor
+    primero = campos[0].lstrip('-')
+    limite = 'lte' if campos[0].startswith('-') else 'gte'
+    return Q(**{f'{primero}__{limite}': valores[0]}) & posteriores
+
+
+def posicion_de(fila, campos):
+    """Valores de los campos de ordenamiento de `fila`"""
+    modelo = type(fila)
+    return [getattr(fila, modelo._meta.get_field(campo.lstrip('-')).attname) for campo in campos]
+
+
+class _CodificadorCursor(DjangoJSONEncoder):
+    # DjangoJSONEncoder trunca los microsegundos, y la posición debe ser exacta
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def codificar_cursor(campos, posicion, hacia_atras=False):
+    datos = {'o': campos, 'p': posicion, 'r': hacia_atras}
+    return base64.urlsafe_b64encode(
+        json.dumps(datos, cls=_CodificadorCursor, separators=(',', ':')).encode()
+    ).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, modelo, campos):
+    """Retorna (posición, hacia_atrás); NotFound si el cursor no corresponde a `campos`"""
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if datos['o'] != campos or len(datos['p']) != len(campos):
+            raise ValueError
+        posicion = [
+            modelo._meta.get_field(campo.lstrip('-')).to_python(valor)
+            for campo, valor in zip(campos, datos['p'])
+        ]
+        return posicion, bool(datos.get('r'))
+    except (binascii.Error, ErrorDjango, KeyError, TypeError, ValueError):
+        raise NotFound('Cursor inválido')
+
+
+def pagina_keyset(queryset, campos, posicion=None, tamano=20, hacia_atras=False):
+    """
+    Hasta `tamano` filas de `queryset` en el orden de `campos`, a partir de
+    `posicion` (exclusive). Con `hacia_atras`, las filas anteriores a
+    `posicion`, en el mismo orden. Retorna (filas, hay_mas_en_esa_dirección).
+    """
+    orden = [_invertir(campo) for campo in campos] if hacia_atras else campos
+    if posicion is not None:
+        queryset = queryset.filter(_filtro_desde(orden, posicion))
+    filas = list(queryset.order_by(*orden)[:tamano + 1])
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+    if hacia_atras:
+        filas.reverse()
+    return filas, hay_mas
+
+
+# =====================================================================
+# PAGINACIÓN DRF
+# =====================================================================
+
+class PaginacionHibrida(PageNumberPagination):
+    """
+    PageNumberPagination con modo cursor y conteo estimado opcionales.
+
+    Atributos de la vista:
+        paginacion_por_defecto: MODO_PAGINA (por defecto) o MODO_CURSOR
+        conteo_paginacion: CONTEO_EXACTO (por defecto en modo página),
+            CONTEO_ESTIMADO o CONTEO_NINGUNO (por defecto en modo cursor)
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    modo_query_param = 'paginacion'
+    cursor_query_param = 'cursor'
+    conteo_query_param = 'conteo'
+
+    def _opcion(self, request, parametro, opciones, por_defecto):
+        valor = request.query_params.get(parametro)
+        if valor is None:
+            return por_defecto
+        if valor not in opciones:
+            raise ValidationError({parametro: f'Valor inválido. Opciones: {", ".join(opciones)}'})
+        return valor
+
+    def _modo(self, request, view):
+        if self.cursor_query_param in request.query_params:
+            por_defecto = MODO_CURSOR
+        elif self.page_query_param in request.query_params:
+            por_defecto = MODO_PAGINA
+        else:
+            por_defecto = getattr(view, 'paginacion_por_defecto', MODO_PAGINA)
+        return self._opcion(request, self.modo_query_param, MODOS, por_defecto)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.modo = self._modo(request, view)
+        conteo_vista = getattr(view, 'conteo_paginacion', None)
+        self.conteo = self._opcion(
+            request, self.conteo_query_param, CONTEOS,
+            conteo_vista or (CONTEO_NINGUNO if self.modo == MODO_CURSOR else CONTEO_EXACTO)
+        )
+
+        if self.modo == MODO_PAGINA:
+            # El número de páginas requiere un total: `ninguno` usa el estimado
+            if self.conteo != CONTEO_EXACTO:
+                self.django_paginator_class = PaginadorConteoEstimado
+            return super().paginate_queryset(queryset, request, view)
+        return self._paginar_cursor(queryset, request)
+
+    def _paginar_cursor(self, queryset, request):
+        tamano = self.get_page_size(request)
+        campos = campos_orden(queryset)
+        cursor = request.query_params.get(self.cursor_query_param)
+        posicion, hacia_atras = decodificar_cursor(cursor, queryset.model, campos) if cursor else (None, False)
+
+        if self.conteo == CONTEO_EXACTO:
+            self.total = queryset.count()
+        elif self.conteo == CONTEO_ESTIMADO:
+            self.total = conteo_estimado(queryset)
+        else:
+            self.total = None
+
+        filas, hay_mas = pagina_keyset(queryset, campos, posicion, tamano, hacia_atras)
+        hay_siguiente = hay_mas if not hacia_atras else posicion is not None
+        hay_anterior = hay_mas if hacia_atras else posicion is not None
+        self.enlace_siguiente = self._enlace(campos, posicion_de(filas[-1], campos), False) if (
+            filas and hay_siguiente
+        ) else None
+        self.enlace_anterior = self._enlace(campos, posicion_de(filas[0], campos), True) if (
+            filas and hay_anterior
+        ) else None
+        return filas
+
+    def _enlace(self, campos, posicion, hacia_atras):
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        url = replace_query_param(url, self.modo_query_param, MODO_CURSOR)
+        return replace_query_param(
+            url, self.cursor_query_param, codificar_cursor(campos, posicion, hacia_atras)
+        )
+
+    def get_paginated_response(self, data):
+        if self.modo == MODO_PAGINA:
+            return super().get_paginated_response(data)
+        respuesta = OrderedDict()
+        if self.total is not None:
+            respuesta['count'] = self.total
+        respuesta['next'] = self.enlace_siguiente
+        respuesta['previous'] = self.enlace_anterior
+        respuesta['results'] = data
+        return Response(respuesta)
@@ -1,5 +1,10 @@
 from rest_framework import permissions
 
+def rol_usuario(usuario):
+    """Rol del perfil del usuario; sin perfil se trata como residente"""
+    perfil = getattr(usuario, 'perfil', None)
+    return perfil.rol if perfil is not None else 'residente'
+
 class IsAdministrador(permissions.BasePermission):
     """
     Permiso para administradores únicamente
@@ -7,7 +12,7 @@ class IsAdministrador(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        return request.user.tipo_usuario == 'administrador' or request.user.is_superuser
+        return rol_usuario(request.user) == 'administrador' or request.user.is_superuser
 
 class IsResidente(permissions.BasePermission):
     """
@@ -16,7 +21,7 @@ class IsResidente(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        return request.user.tipo_usuario == 'residente'
+        return rol_usuario(request.user) == 'residente'
 
 class IsSeguridad(permissions.BasePermission):
     """
@@ -25,7 +30,7 @@ class IsSeguridad(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        return request.user.tipo_usuario == 'seguridad'
+        return rol_usuario(request.user) == 'seguridad'
 
 class IsAdministradorOrSeguridad(permissions.BasePermission):
     """
@@ -34,7 +39,7 @@ class IsAdministradorOrSeguridad(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        return (request.user.tipo_usuario in ['administrador', 'seguridad'] or 
+        return (rol_usuario(request.user) in ['administrador', 'seguridad'] or 
                 request.user.is_superuser)
 
 class IsAdministradorOrResidente(permissions.BasePermission):
@@ -44,7 +49,7 @@ class IsAdministradorOrResidente(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        return (request.user.tipo_usuario in ['administrador', 'residente'] or 
+        return (rol_usuario(request.user) in ['administrador', 'residente'] or 
                 request.user.is_superuser)
 
 class IsOwnerOrAdministrador(permissions.BasePermission):
@@ -53,7 +58,7 @@ class IsOwnerOrAdministrador(permissions.BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         # Administradores tienen acceso completo
-        if request.user.tipo_usuario == 'administrador' or request.user.is_superuser:
+        if rol_usuario(request.user) == 'administrador' or request.user.is_superuser:
             return True
         
         # Verificar si el usuario es propietario del objeto
@@ -79,5 +84,5 @@ class IsReadOnlyOrAdministrador(permissions.BasePermission):
             return True
         
         # Escritura solo para administradores
-        return (request.user.tipo_usuario == 'administrador' or 
+        return (rol_usuario(request.user) == 'administrador' or 
                 request.user.is_superuser)
\ No newline at end of file
@@ -1,3 +1,168 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework import generics, serializers
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .models import Usuario
+from . import cache_dashboards
+from .cache_dashboards import (
+    cache_dashboard, conectar_invalidacion, obtener_o_calcular, version_dashboard,
+    alcance_por_usuario
+)
+from .paginacion import PaginacionHibrida, MODO_CURSOR
+
+
+class CacheDashboardsTest(TestCase):
+    """Tests de la caché de dashboards"""
+    
+    def setUp(self):
+        cache.clear()
+        self.llamadas = 0
+        self.usuarios = [
+            Usuario.objects.create_user(username=f'usuario{i}', email=f'u{i}@example.com', password='x')
+            for i in range(2)
+        ]
+        
+        @api_view(['GET'])
+        @cache_dashboard('prueba', ttl=60, alcance=alcance_por_usuario)
+        def vista(request):
+            self.llamadas += 1
+            if request.GET.get('error'):
+                return Response({'error': 'x'}, status=400)
+            return Response({'usuario': request.user.id, 'llamada': self.llamadas})
+        self.vista = vista
+    
+    def get(self, usuario, **parametros):
+        request = APIRequestFactory().get('/', parametros)
+        force_authenticate(request, user=usuario)
+        return self.vista(request)
+    
+    def test_cache_por_alcance(self):
+        """Test de entradas separadas por usuario y sin cachear errores"""
+        self.assertEqual(self.get(self.usuarios[0]).data['llamada'], 1)
+        self.assertEqual(self.get(self.usuarios[0]).data['llamada'], 1)
+        self.assertEqual(self.get(self.usuarios[1]).data['llamada'], 2)
+        
+        self.assertEqual(self.get(self.usuarios[0], error=1).status_code, 400)
+        self.assertEqual(self.get(self.usuarios[0], error=1).status_code, 400)
+        self.assertEqual(self.llamadas, 4)
+    
+    def test_invalidacion_por_senales_al_confirmar(self):
+        """Test de invalidación al guardar un modelo que alimenta el dashboard"""
+        conectar_invalidacion('prueba', Usuario)
+        self.get(self.usuarios[0])
+        version = version_dashboard('prueba')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuarios[1].first_name = 'Otro'
+            self.usuarios[1].save()
+            # Antes de confirmar la transacción la versión no cambia
+            self.assertEqual(version_dashboard('prueba'), version)
+        
+        self.assertNotEqual(version_dashboard('prueba'), version)
+        self.assertEqual(self.get(self.usuarios[0]).data['llamada'], 2)
+    
+    def test_proteccion_contra_estampida(self):
+        """Test de que sin el bloqueo no se recalcula"""
+        calcular = mock.Mock(return_value='nuevo')
+        cache.set('clave', ('vencido', 0), 60)
+        cache.add('clave:bloqueo', 1, 30)
+        
+        # Otro worker está recalculando: se sirve la entrada vencida
+        self.assertEqual(obtener_o_calcular('clave', calcular, ttl=60), 'vencido')
+        calcular.assert_not_called()
+        
+        # Sin entrada previa se espera al otro worker y, si no termina, se calcula
+        cache.delete('clave')
+        with mock.patch.object(cache_dashboards, 'ESPERA_MAXIMA', 0.1):
+            self.assertEqual(obtener_o_calcular('clave', calcular, ttl=60), 'nuevo')
+        
+        cache.delete('clave:bloqueo')
+        self.assertEqual(obtener_o_calcular('clave', calcular, ttl=60), 'nuevo')
+        self.assertEqual(obtener_o_calcular('clave', calcular, ttl=60), 'nuevo')
+        self.assertEqual(calcular.call_count, 2)
+
+
+class _SerializadorUsuarioPrueba(serializers.ModelSerializer):
+    class Meta:
+        model = Usuario
+        fields = ['id', 'username']
+
+
+class _ListaUsuariosPrueba(generics.ListAPIView):
+    serializer_class = _SerializadorUsuarioPrueba
+    pagination_class = PaginacionHibrida
+    authentication_classes = []
+    permission_classes = []
+
+    def get_queryset(self):
+        orden = self.request.query_params.get('orden', '-date_joined')
+        return Usuario.objects.order_by(orden)
+
+
+class PaginacionHibridaTest(TestCase):
+    """Tests de la paginación por cursor"""
+    
+    def setUp(self):
+        ahora = timezone.now()
+        for i in range(25):
+            usuario = Usuario.objects.create_user(username=f'usuario{i:02d}', email=f'u{i}@example.com')
+            # Fechas repetidas de a tres para ejercitar el desempate por id
+            usuario.date_joined = ahora - timezone.timedelta(minutes=i // 3)
+            usuario.save(update_fields=['date_joined'])
+        self.esperado = list(Usuario.objects.order_by('-date_joined', '-id').values_list('id', flat=True))
+    
+    def get(self, url='/usuarios/', vista=None, **parametros):
+        request = APIRequestFactory().get(url, parametros)
+        return (vista or _ListaUsuariosPrueba.as_view())(request)
+    
+    def test_modo_pagina_por_defecto(self):
+        respuesta = self.get(page_size=10, page=3)
+        self.assertEqual(respuesta.data['count'], 25)
+        self.assertEqual(len(respuesta.data['results']), 5)
+        self.assertIn('page=2', respuesta.data['previous'])
+    
+    def test_recorre_todas_las_filas_por_cursor_en_ambos_sentidos(self):
+        respuesta = self.get(paginacion='cursor', page_size=7)
+        self.assertNotIn('count', respuesta.data)
+        self.assertIsNone(respuesta.data['previous'])
+        vistos, paginas = [], []
+        while True:
+            paginas.append([fila['id'] for fila in respuesta.data['results']])
+            vistos.extend(paginas[-1])
+            if respuesta.data['next'] is None:
+                break
+            respuesta = self.get(url=respuesta.data['next'])
+        self.assertEqual(vistos, self.esperado)
+        
+        for pagina in reversed(paginas[:-1]):
+            respuesta = self.get(url=respuesta.data['previous'])
+            self.assertEqual([fila['id'] for fila in respuesta.data['results']], pagina)
+        self.assertIsNone(respuesta.data['previous'])
+    
+    def test_modo_por_vista_y_conteo(self):
+        vista = type('Vista', (_ListaUsuariosPrueba,), {'paginacion_por_defecto': MODO_CURSOR}).as_view()
+        respuesta = self.get(vista=vista, conteo='estimado')
+        self.assertEqual(respuesta.data['count'], 25)
+        self.assertEqual(len(respuesta.data['results']), 20)
+        self.assertIn('paginacion=cursor', respuesta.data['next'])
+        
+        # Un ?page= explícito conserva el modo página
+        self.assertEqual(self.get(vista=vista, page=2).data['count'], 25)
+    
+    def test_cursor_y_parametros_invalidos(self):
+        self.assertEqual(self.get(cursor='no-es-un-cursor').status_code, 404)
+        self.assertEqual(self.get(paginacion='offset').status_code, 400)
+        # last_login admite nulos: no sirve como posición de cursor
+        self.assertEqual(self.get(paginacion='cursor', orden='-last_login').status_code, 400)
+        
+        siguiente = self.get(paginacion='cursor').data['next']
+        cursor = siguiente.split('cursor=')[-1]
+        # Un cursor emitido para otro ordenamiento se rechaza
+        self.assertEqual(self.get(cursor=cursor, orden='username').status_code, 404)
 
-# Create your tests here.
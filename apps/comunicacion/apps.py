@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class ComunicacionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.comunicacion'
-    verbose_name = 'Comunicación'
\ No newline at end of file
+    verbose_name = 'Comunicación'
+
+    def ready(self):
+        from . import signals  # noqa: F401
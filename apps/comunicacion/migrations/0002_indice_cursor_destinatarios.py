@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-17 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunicacion', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='destinatarionotificacion',
+            index=models.Index(fields=['usuario', '-fecha_creacion', '-id'], name='destinatari_usuario_49deaf_idx'),
+        ),
+    ]
@@ -251,6 +251,8 @@ class DestinatarioNotificacion(models.Model):
         indexes = [
             models.Index(fields=['estado']),
             models.Index(fields=['fecha_lectura']),
+            # Orden de la paginación por cursor de mis_notificaciones
+            models.Index(fields=['usuario', '-fecha_creacion', '-id']),
         ]
     
     def __str__(self):
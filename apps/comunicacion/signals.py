@@ -0,0 +1,7 @@
+"""
+Señales del módulo de comunicación
+"""
+from .models import Notificacion, DestinatarioNotificacion
+from apps.autenticacion.cache_dashboards import conectar_invalidacion
+
+conectar_invalidacion('estadisticas_notificaciones', Notificacion, DestinatarioNotificacion)
@@ -20,6 +20,10 @@ from .serializers import (
 from .services import NotificationService
 from apps.autenticacion.models import Usuario
 from apps.finanzas.models import UnidadHabitacional
+from apps.autenticacion.cache_dashboards import cache_dashboard, alcance_por_usuario
+from apps.autenticacion.paginacion import (
+    campos_orden, codificar_cursor, decodificar_cursor, pagina_keyset, posicion_de
+)
 
 class ListaCategorias(generics.ListCreateAPIView):
     """
@@ -149,6 +153,29 @@ def mis_notificaciones(request):
     if solo_no_leidas:
         queryset = queryset.filter(fecha_lectura__isnull=True)
     
+    no_leidas = DestinatarioNotificacion.objects.filter(
+        usuario=usuario, 
+        fecha_lectura__isnull=True
+    ).count()
+    
+    cursor = request.query_params.get('cursor')
+    if cursor is not None or request.query_params.get('paginacion') == 'cursor':
+        # Paginación por cursor: sigue el orden de creación (fecha_envio admite nulos)
+        campos = campos_orden(queryset.order_by('-fecha_creacion'))
+        posicion, hacia_atras = decodificar_cursor(
+            cursor, DestinatarioNotificacion, campos
+        ) if cursor else (None, False)
+        filas, hay_mas = pagina_keyset(queryset, campos, posicion, max(1, min(limite, 100)), hacia_atras)
+        serializador = SerializadorNotificacionUsuario(filas, many=True)
+        return Response({
+            'notificaciones': serializador.data,
+            'total': len(filas),
+            'no_leidas': no_leidas,
+            'cursor_siguiente': codificar_cursor(campos, posicion_de(filas[-1], campos)) if (
+                filas and hay_mas
+            ) else None
+        })
+    
     queryset = queryset.order_by('-fecha_envio')[:limite]
     
     serializador = SerializadorNotificacionUsuario(queryset, many=True)
@@ -156,10 +183,7 @@ def mis_notificaciones(request):
     return Response({
         'notificaciones': serializador.data,
         'total': queryset.count(),
-        'no_leidas': DestinatarioNotificacion.objects.filter(
-            usuario=usuario, 
-            fecha_lectura__isnull=True
-        ).count()
+        'no_leidas': no_leidas
     })
 
 @api_view(['POST'])
@@ -454,6 +478,7 @@ def renderizar_plantilla(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cache_dashboard('estadisticas_notificaciones', ttl=60, alcance=alcance_por_usuario)
 def estadisticas_notificaciones(request):
     """
     Obtener estadísticas de notificaciones para el usuario
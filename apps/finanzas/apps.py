@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class FinanzasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.finanzas'
-    verbose_name = 'Finanzas'
\ No newline at end of file
+    verbose_name = 'Finanzas'
+
+    def ready(self):
+        from . import signals  # noqa: F401
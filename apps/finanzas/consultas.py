@@ -0,0 +1,81 @@
+"""
+Plan de consulta de los serializadores de finanzas.
+
+Cada serializador con relaciones anidadas declara aquí qué necesita cargar
+(select_related para claves foráneas, prefetch_related para relaciones
+inversas); los planes de los serializadores anidados se componen con el
+prefijo del campo. `optimizar_consulta` aplica el plan a un queryset, de
+modo que una página de N filas cuesta un número fijo de consultas en lugar
+de varias por fila.
+
+Al agregar un campo anidado a un serializador, agregue su relación al plan:
+los tests de finanzas verifican que el número de consultas de los listados
+no dependa del tamaño de la página.
+"""
+from collections import namedtuple
+
+from django.db.models import Prefetch
+
+from .models import HistorialPago
+from .serializers import (
+    SerializadorUnidadHabitacional, SerializadorHistorialPago, SerializadorPago, SerializadorMulta
+)
+
+
+class PlanConsulta(namedtuple('PlanConsulta', 'select_related prefetch_related')):
+    """Relaciones a cargar junto con las filas de un serializador"""
+
+    def __new__(cls, select_related=(), prefetch_related=()):
+        return super().__new__(cls, tuple(select_related), tuple(prefetch_related))
+
+    def anidado(self, campo):
+        """El mismo plan visto desde el modelo que apunta a este por `campo`"""
+        return PlanConsulta(
+            select_related=[f'{campo}__{relacion}' for relacion in self.select_related],
+            prefetch_related=[f'{campo}__{relacion}' for relacion in self.prefetch_related],
+        )
+
+    def __add__(self, otro):
+        return PlanConsulta(
+            self.select_related + otro.select_related,
+            self.prefetch_related + otro.prefetch_related,
+        )
+
+
+PLAN_UNIDAD = PlanConsulta(select_related=['propietario', 'inquilino'])
+PLAN_HISTORIAL = PlanConsulta(select_related=['procesado_por'])
+
+PLANES = {
+    SerializadorUnidadHabitacional: PLAN_UNIDAD,
+    SerializadorHistorialPago: PLAN_HISTORIAL,
+    SerializadorPago: PlanConsulta(
+        select_related=['unidad', 'tipo_pago', 'usuario_pagador'],
+        prefetch_related=[
+            Prefetch('historial', queryset=HistorialPago.objects.select_related(*PLAN_HISTORIAL.select_related))
+        ],
+    ) + PLAN_UNIDAD.anidado('unidad'),
+    SerializadorMulta: PlanConsulta(select_related=['unidad', 'aplicada_por']) + PLAN_UNIDAD.anidado('unidad'),
+}
+
+
+def optimizar_consulta(queryset, serializador):
+    """Aplica a `queryset` el plan de `serializador` (clase); sin plan lo retorna igual"""
+    plan = PLANES.get(serializador)
+    if plan is None:
+        return queryset
+    if plan.select_related:
+        queryset = queryset.select_related(*plan.select_related)
+    if plan.prefetch_related:
+        queryset = queryset.prefetch_related(*plan.prefetch_related)
+    return queryset
+
+
+class ConsultaOptimizadaMixin:
+    """
+    Aplica el plan del serializador de la vista. Se engancha en
+    filter_queryset (usado por list y get_object) para cubrir también las
+    vistas que redefinen get_queryset.
+    """
+
+    def filter_queryset(self, queryset):
+        return optimizar_consulta(super().filter_queryset(queryset), self.get_serializer_class())
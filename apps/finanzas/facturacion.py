@@ -0,0 +1,265 @@
+"""
+Generación de los pagos mensuales (corrida de facturación).
+
+Para un período se leen en una consulta las claves (unidad, tipo) que ya
+tienen pago, se calcula en memoria el conjunto faltante y se inserta con
+bulk_create por lotes. La restricción única (unidad, tipo_pago, periodo) hace
+la corrida idempotente: repetirla, o ejecutar dos a la vez, no duplica pagos
+(las filas en conflicto se descartan con ignore_conflicts).
+
+Desde la API la facturación se encola como CorridaFacturacion y la ejecuta el
+comando `procesar_corridas_facturacion`, tomando corridas con
+SELECT ... FOR UPDATE SKIP LOCKED. Las unidades se procesan por id en lotes;
+cada lote confirma sus pagos junto con el punto de control de la corrida, de
+modo que una corrida interrumpida se retoma desde el último lote confirmado.
+"""
+import logging
+import os
+import socket
+from calendar import monthrange
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.autenticacion.cache_dashboards import invalidar_dashboard
+
+from .models import UnidadHabitacional, TipoPago, Pago, CorridaFacturacion
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 1_000
+UNIDADES_POR_LOTE = 500
+MAX_INTENTOS = 3
+# Una corrida 'procesando' sin avance por más tiempo que esto se considera
+# abandonada (p. ej. el worker murió) y se retoma
+TIEMPO_SIN_AVANCE = timedelta(minutes=15)
+
+ResultadoFacturacion = namedtuple('ResultadoFacturacion', 'periodo pagos_creados existentes unidades tipos')
+
+
+def validar_periodo(periodo):
+    """Retorna el período (YYYY-MM) o lanza ValueError"""
+    try:
+        datetime.strptime(periodo or '', '%Y-%m')
+    except ValueError:
+        raise ValueError('Formato de período inválido. Use YYYY-MM')
+    return periodo
+
+
+def fecha_vencimiento_periodo(periodo):
+    """Último día del mes del período"""
+    año, mes = (int(parte) for parte in periodo.split('-'))
+    return date(año, mes, monthrange(año, mes)[1])
+
+
+def tipos_a_facturar(ids=None):
+    """Tipos indicados (activos) o, por defecto, los recurrentes activos"""
+    if ids:
+        return TipoPago.objects.filter(id__in=ids, esta_activo=True)
+    return TipoPago.objects.filter(es_recurrente=True, esta_activo=True)
+
+
+def unidades_a_facturar(unidades=None, desde_id=0, limite=None):
+    """
+    (id, responsable_id) de las unidades activas con id mayor a `desde_id`,
+    por id; el responsable es el inquilino o el propietario
+    """
+    consulta = unidades if unidades is not None else UnidadHabitacional.objects.all()
+    consulta = consulta.filter(esta_activa=True, id__gt=desde_id).order_by('id').annotate(
+        responsable_id=Coalesce('inquilino_id', 'propietario_id')
+    ).values_list('id', 'responsable_id')
+    return list(consulta[:limite] if limite else consulta)
+
+
+def _pagos_del_periodo(periodo, tipos, unidad_ids=None):
+    pagos = Pago.objects.filter(periodo=periodo, tipo_pago__in=[tipo.id for tipo in tipos])
+    if unidad_ids is not None:
+        pagos = pagos.filter(unidad_id__in=unidad_ids)
+    return pagos
+
+
+def pagos_faltantes(periodo, unidades, tipos, creado_por=None, solo_unidades=False):
+    """
+    Pagos del período que faltan para `unidades` [(id, responsable_id)] y
+    `tipos`. Retorna (pagos sin guardar, claves (unidad, tipo) existentes);
+    con `solo_unidades` las claves se limitan a `unidades`.
+    """
+    unidad_ids = [unidad_id for unidad_id, _ in unidades] if solo_unidades else None
+    existentes = set(
+        _pagos_del_periodo(periodo, tipos, unidad_ids).values_list('unidad_id', 'tipo_pago_id')
+    )
+    vencimiento = fecha_vencimiento_periodo(periodo)
+    faltantes = [
+        Pago(
+            unidad_id=unidad_id, usuario_pagador_id=responsable_id, tipo_pago=tipo,
+            monto_total=tipo.monto_base, fecha_vencimiento=vencimiento, periodo=periodo,
+            descripcion=f"Pago {tipo.nombre} - {periodo}", creado_por=creado_por
+        )
+        for unidad_id, responsable_id in unidades
+        for tipo in tipos
+        if (unidad_id, tipo.id) not in existentes
+    ]
+    return faltantes, existentes
+
+
+def insertar_pagos(pagos, tamano_lote=TAMANO_LOTE):
+    """
+    Inserta `pagos` por lotes, cada uno en su transacción. Los que ya existen
+    (una corrida concurrente) se descartan por la restricción única.
+    """
+    for inicio in range(0, len(pagos), tamano_lote):
+        with transaction.atomic():
+            Pago.objects.bulk_create(pagos[inicio:inicio + tamano_lote], ignore_conflicts=True)
+            # bulk_create no emite post_save
+            invalidar_dashboard('resumen_financiero_admin')
+
+
+def generar_pagos_periodo(periodo, tipos=None, unidades=None, creado_por=None, tamano_lote=TAMANO_LOTE):
+    """
+    Genera los pagos faltantes del período para las unidades activas.
+    `tipos` es un queryset o lista de TipoPago (por defecto los recurrentes
+    activos) y `unidades`, un queryset de UnidadHabitacional.
+    """
+    validar_periodo(periodo)
+    tipos = list(tipos if tipos is not None else tipos_a_facturar())
+    unidades = unidades_a_facturar(unidades)
+    faltantes, existentes = pagos_faltantes(periodo, unidades, tipos, creado_por)
+    if faltantes:
+        insertar_pagos(faltantes, tamano_lote)
+        # ignore_conflicts no informa qué filas se insertaron
+        creados = _pagos_del_periodo(periodo, tipos).count() - len(existentes)
+    else:
+        creados = 0
+    return ResultadoFacturacion(
+        periodo=periodo,
+        pagos_creados=creados,
+        existentes=len(existentes),
+        unidades=len(unidades),
+        tipos=len(tipos),
+    )
+
+
+# =====================================================================
+# CORRIDAS EN SEGUNDO PLANO
+# =====================================================================
+
+def identificador_worker():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def encolar_corrida(periodo, tipos_pago=None, usuario=None):
+    """
+    Crea la corrida del período, o retorna la que ya está pendiente o en
+    proceso con los mismos tipos. Retorna (corrida, creada).
+    """
+    validar_periodo(periodo)
+    tipos_pago = sorted(set(tipos_pago or []))
+    with transaction.atomic():
+        activa = CorridaFacturacion.objects.select_for_update().filter(
+            periodo=periodo, tipos_pago=tipos_pago, estado__in=['pendiente', 'procesando']
+        ).first()
+        if activa is not None:
+            return activa, False
+        return CorridaFacturacion.objects.create(
+            periodo=periodo, tipos_pago=tipos_pago, solicitado_por=usuario
+        ), True
+
+
+def tomar_corrida(worker=None):
+    """
+    Marca como 'procesando' la corrida pendiente más antigua y la retorna, o
+    None si no hay. Las filas bloqueadas por otro worker se saltan.
+    """
+    with transaction.atomic():
+        corrida = (
+            CorridaFacturacion.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente')
+            .order_by('fecha_creacion', 'id')
+            .first()
+        )
+        if corrida is None:
+            return None
+        corrida.estado = 'procesando'
+        corrida.intentos += 1
+        corrida.worker = worker or identificador_worker()
+        corrida.fecha_inicio = corrida.fecha_inicio or timezone.now()
+        corrida.save(update_fields=['estado', 'intentos', 'worker', 'fecha_inicio', 'fecha_actualizacion'])
+    return corrida
+
+
+def procesar_lote_corrida(corrida, tipos, unidades_por_lote=UNIDADES_POR_LOTE):
+    """
+    Factura el siguiente lote de unidades y avanza el punto de control en la
+    misma transacción. Retorna False cuando no quedan unidades.
+    """
+    unidades = unidades_a_facturar(desde_id=corrida.ultima_unidad_procesada, limite=unidades_por_lote)
+    if not unidades:
+        return False
+    unidad_ids = [unidad_id for unidad_id, _ in unidades]
+    with transaction.atomic():
+        faltantes, existentes = pagos_faltantes(
+            corrida.periodo, unidades, tipos, corrida.solicitado_por, solo_unidades=True
+        )
+        if faltantes:
+            insertar_pagos(faltantes)
+            creados = _pagos_del_periodo(corrida.periodo, tipos, unidad_ids).count() - len(existentes)
+        else:
+            creados = 0
+        corrida.ultima_unidad_procesada = unidad_ids[-1]
+        corrida.unidades_procesadas += len(unidades)
+        corrida.pagos_creados += creados
+        corrida.save(update_fields=[
+            'ultima_unidad_procesada', 'unidades_procesadas', 'pagos_creados', 'fecha_actualizacion'
+        ])
+    return True
+
+
+def procesar_corrida(corrida, unidades_por_lote=UNIDADES_POR_LOTE, continuar=None):
+    """
+    Ejecuta (o retoma) una corrida ya tomada y registra su resultado o error.
+    Si `continuar()` retorna False entre lotes, la corrida vuelve a la cola
+    para retomarse desde su punto de control.
+    """
+    try:
+        tipos = list(tipos_a_facturar(corrida.tipos_pago))
+        if not corrida.unidades_total:
+            corrida.unidades_total = UnidadHabitacional.objects.filter(esta_activa=True).count()
+            corrida.save(update_fields=['unidades_total', 'fecha_actualizacion'])
+        while procesar_lote_corrida(corrida, tipos, unidades_por_lote):
+            if continuar is not None and not continuar():
+                # Una interrupción ordenada no cuenta como intento
+                corrida.estado = 'pendiente'
+                corrida.intentos -= 1
+                corrida.save(update_fields=['estado', 'intentos', 'fecha_actualizacion'])
+                return corrida
+        corrida.estado = 'completada'
+        corrida.fecha_fin = timezone.now()
+        corrida.save(update_fields=['estado', 'fecha_fin', 'fecha_actualizacion'])
+    except Exception as e:
+        logger.exception(f"Error en la corrida de facturación {corrida.id}")
+        corrida.errores = corrida.errores + [{
+            'intento': corrida.intentos,
+            'desde_unidad': corrida.ultima_unidad_procesada,
+            'error': str(e),
+            'fecha': timezone.now().isoformat(),
+        }]
+        corrida.estado = 'pendiente' if corrida.intentos < MAX_INTENTOS else 'fallida'
+        corrida.fecha_fin = timezone.now() if corrida.estado == 'fallida' else None
+        corrida.save(update_fields=['errores', 'estado', 'fecha_fin', 'fecha_actualizacion'])
+    return corrida
+
+
+def recuperar_corridas_abandonadas():
+    """Devuelve a la cola (o marca como fallidas) las corridas de workers caídos"""
+    limite = timezone.now() - TIEMPO_SIN_AVANCE
+    abandonadas = CorridaFacturacion.objects.filter(estado='procesando', fecha_actualizacion__lt=limite)
+    fallidas = abandonadas.filter(intentos__gte=MAX_INTENTOS).update(
+        estado='fallida', fecha_fin=timezone.now(), fecha_actualizacion=timezone.now()
+    )
+    reencoladas = abandonadas.filter(intentos__lt=MAX_INTENTOS).update(
+        estado='pendiente', fecha_actualizacion=timezone.now()
+    )
+    return reencoladas, fallidas
@@ -0,0 +1,41 @@
+"""
+Aplica el interés moratorio del día a los pagos vencidos (ejecución diaria desde cron)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finanzas.intereses import (
+    TASA_POR_DEFECTO, DIAS_GRACIA_POR_DEFECTO, aplicar_intereses, validar_tasa
+)
+
+
+class Command(BaseCommand):
+    help = 'Aplica el interés moratorio a los pagos vencidos; repetirlo el mismo día no vuelve a cobrar'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tasa', default=str(TASA_POR_DEFECTO),
+            help='Tasa de interés mensual (ej: 0.05 para 5%%)'
+        )
+        parser.add_argument(
+            '--dias-gracia', type=int, default=DIAS_GRACIA_POR_DEFECTO,
+            help='Días después del vencimiento sin interés'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tasa = validar_tasa(options['tasa'])
+        except ValueError as e:
+            raise CommandError(f"❌ {e}")
+
+        aplicacion, multas = aplicar_intereses(tasa, options['dias_gracia'])
+        if multas is None:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️  Los intereses del {aplicacion.fecha} ya fueron aplicados "
+                f"({aplicacion.multas_creadas} multas); no se cobró nuevamente"
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {aplicacion.multas_creadas} multas por {aplicacion.monto_total} "
+            f"en {aplicacion.duracion_ms} ms"
+        ))
+        self.stdout.write(f"📊 Pagos vencidos evaluados: {aplicacion.pagos_evaluados}")
@@ -0,0 +1,47 @@
+"""
+Genera los pagos mensuales de un período para las unidades activas
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.finanzas.facturacion import TAMANO_LOTE, generar_pagos_periodo, tipos_a_facturar, validar_periodo
+
+
+class Command(BaseCommand):
+    help = 'Genera los pagos faltantes del período (YYYY-MM) para las unidades activas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periodo',
+            help='Período a facturar en formato YYYY-MM (por defecto el mes actual)'
+        )
+        parser.add_argument(
+            '--tipos', type=int, nargs='+',
+            help='Ids de los tipos de pago (por defecto los recurrentes activos)'
+        )
+        parser.add_argument(
+            '--tamano-lote', type=int, default=TAMANO_LOTE,
+            help='Pagos por INSERT'
+        )
+
+    def handle(self, *args, **options):
+        periodo = options['periodo'] or timezone.localdate().strftime('%Y-%m')
+        try:
+            validar_periodo(periodo)
+        except ValueError as e:
+            raise CommandError(f"❌ {e}")
+
+        inicio = time.perf_counter()
+        resultado = generar_pagos_periodo(
+            periodo, tipos=tipos_a_facturar(options['tipos']), tamano_lote=options['tamano_lote']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Período {periodo}: {resultado.pagos_creados} pagos creados en "
+            f"{time.perf_counter() - inicio:.2f}s"
+        ))
+        self.stdout.write(
+            f"📊 {resultado.unidades} unidades, {resultado.tipos} tipos de pago, "
+            f"{resultado.existentes} pagos ya existentes"
+        )
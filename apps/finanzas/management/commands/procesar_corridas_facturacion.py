@@ -0,0 +1,75 @@
+"""
+Worker que procesa las corridas de facturación encoladas (tabla corridas_facturacion)
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.finanzas.facturacion import (
+    UNIDADES_POR_LOTE, tomar_corrida, procesar_corrida, recuperar_corridas_abandonadas, identificador_worker
+)
+
+
+class Command(BaseCommand):
+    help = 'Procesa las corridas de facturación pendientes (se pueden ejecutar varios workers en paralelo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez', action='store_true',
+            help='Procesa las corridas pendientes y termina, en lugar de esperar nuevas'
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=5.0,
+            help='Segundos de espera cuando no hay corridas pendientes'
+        )
+        parser.add_argument(
+            '--unidades-por-lote', type=int, default=UNIDADES_POR_LOTE,
+            help='Unidades facturadas por transacción (punto de control)'
+        )
+
+    def handle(self, *args, **options):
+        self.detener = False
+        signal.signal(signal.SIGTERM, self.solicitar_detencion)
+        signal.signal(signal.SIGINT, self.solicitar_detencion)
+
+        worker = identificador_worker()
+        self.stdout.write(f"🧾 Worker de facturación {worker} iniciado")
+
+        while not self.detener:
+            reencoladas, fallidas = recuperar_corridas_abandonadas()
+            if reencoladas or fallidas:
+                self.stdout.write(
+                    f"⚠️  Corridas abandonadas: {reencoladas} reencoladas, {fallidas} fallidas"
+                )
+
+            corrida = tomar_corrida(worker)
+            if corrida is None:
+                if options['una_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+
+            inicio = time.perf_counter()
+            procesar_corrida(corrida, options['unidades_por_lote'], continuar=lambda: not self.detener)
+            if corrida.estado == 'pendiente' and self.detener:
+                self.stdout.write(
+                    f"⚠️  Corrida {corrida.id} interrumpida en la unidad {corrida.ultima_unidad_procesada}; "
+                    f"se retomará desde ahí"
+                )
+            elif corrida.estado == 'completada':
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ Corrida {corrida.id} ({corrida.periodo}) completada en "
+                    f"{time.perf_counter() - inicio:.2f}s: {corrida.pagos_creados} pagos creados"
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f"❌ Corrida {corrida.id} {corrida.estado} (intento {corrida.intentos}): "
+                    f"{corrida.errores[-1]['error'] if corrida.errores else ''}"
+                ))
+
+        self.stdout.write("Worker de facturación detenido")
+
+    def solicitar_detencion(self, signum, frame):
+        """Termina cuando el lote en curso confirma; la corrida se retoma desde su punto de control"""
+        self.detener = True
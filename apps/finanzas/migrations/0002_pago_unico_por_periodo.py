@@ -0,0 +1,53 @@
+# Generated by Django 5.0.6 on 2026-10-17 10:52
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def eliminar_pagos_duplicados(apps, schema_editor):
+    """
+    Deja un pago por (unidad, tipo_pago, periodo): se conserva el de mayor
+    monto pagado (o el más antiguo) y se eliminan los duplicados sin abonos ni
+    historial, pasando sus multas al pago conservado. Los duplicados con
+    abonos deben resolverse a mano antes de migrar.
+    """
+    Pago = apps.get_model('finanzas', 'Pago')
+    Multa = apps.get_model('finanzas', 'Multa')
+    grupos = Pago.objects.values('unidad_id', 'tipo_pago_id', 'periodo').annotate(
+        cantidad=Count('id')
+    ).filter(cantidad__gt=1).order_by()
+
+    conflictos = []
+    for grupo in grupos:
+        pagos = list(Pago.objects.filter(
+            unidad_id=grupo['unidad_id'], tipo_pago_id=grupo['tipo_pago_id'], periodo=grupo['periodo']
+        ).order_by('-monto_pagado', 'id'))
+        conservado, duplicados = pagos[0], pagos[1:]
+        eliminables = [
+            pago.id for pago in duplicados if not pago.monto_pagado and not pago.historial.exists()
+        ]
+        if len(eliminables) < len(duplicados):
+            conflictos.append(f"{grupo['periodo']} unidad {grupo['unidad_id']} tipo {grupo['tipo_pago_id']}")
+            continue
+        Multa.objects.filter(pago_asociado_id__in=eliminables).update(pago_asociado_id=conservado.id)
+        Pago.objects.filter(id__in=eliminables).delete()
+
+    if conflictos:
+        raise RuntimeError(
+            'Pagos duplicados con abonos registrados; resuélvalos antes de migrar: ' + ', '.join(conflictos)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(eliminar_pagos_duplicados, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='pago',
+            unique_together={('unidad', 'tipo_pago', 'periodo')},
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.6 on 2026-10-17 10:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0002_pago_unico_por_periodo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorridaFacturacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.CharField(help_text='Formato: YYYY-MM (ej: 2025-01)', max_length=7, verbose_name='Período')),
+                ('tipos_pago', models.JSONField(blank=True, default=list, help_text='IDs de los tipos de pago; vacío para los recurrentes activos', verbose_name='Tipos de Pago')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completada', 'Completada'), ('fallida', 'Fallida')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('ultima_unidad_procesada', models.BigIntegerField(default=0, verbose_name='Última Unidad Procesada')),
+                ('unidades_total', models.PositiveIntegerField(default=0, verbose_name='Total de Unidades')),
+                ('unidades_procesadas', models.PositiveIntegerField(default=0, verbose_name='Unidades Procesadas')),
+                ('pagos_creados', models.PositiveIntegerField(default=0, verbose_name='Pagos Creados')),
+                ('errores', models.JSONField(blank=True, default=list, verbose_name='Errores')),
+                ('intentos', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Inicio de Procesamiento')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin de Procesamiento')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+                ('solicitado_por', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='corridas_facturacion', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Corrida de Facturación',
+                'verbose_name_plural': 'Corridas de Facturación',
+                'db_table': 'corridas_facturacion',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='corridas_fa_estado_43ff6d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-17 10:56
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0003_corridas_facturacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AplicacionInteresMoratorio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True, verbose_name='Fecha de Aplicación')),
+                ('tasa_interes', models.DecimalField(decimal_places=4, max_digits=6, verbose_name='Tasa de Interés Mensual')),
+                ('dias_gracia', models.PositiveIntegerField(verbose_name='Días de Gracia')),
+                ('pagos_evaluados', models.PositiveIntegerField(default=0, verbose_name='Pagos Evaluados')),
+                ('multas_creadas', models.PositiveIntegerField(default=0, verbose_name='Multas Creadas')),
+                ('monto_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Monto Total')),
+                ('duracion_ms', models.PositiveIntegerField(default=0, verbose_name='Duración (ms)')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('aplicada_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Aplicada por')),
+            ],
+            options={
+                'verbose_name': 'Aplicación de Interés Moratorio',
+                'verbose_name_plural': 'Aplicaciones de Interés Moratorio',
+                'db_table': 'aplicaciones_interes_moratorio',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
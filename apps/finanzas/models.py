@@ -166,6 +166,8 @@ class Pago(models.Model):
         verbose_name_plural = "Pagos"
         db_table = "pagos"
         ordering = ['-fecha_vencimiento', '-fecha_creacion']
+        # Un pago por unidad, tipo y período: la facturación mensual es idempotente
+        unique_together = ['unidad', 'tipo_pago', 'periodo']
         indexes = [
             models.Index(fields=['estado']),
             models.Index(fields=['fecha_vencimiento']),
@@ -302,4 +304,112 @@ class Multa(models.Model):
         ordering = ['-fecha_creacion']
     
     def __str__(self):
-        return f"Multa {self.get_tipo_multa_display()} - {self.unidad}"
\ No newline at end of file
+        return f"Multa {self.get_tipo_multa_display()} - {self.unidad}"
+
+class CorridaFacturacion(models.Model):
+    """
+    Corrida de facturación mensual encolada en la base de datos y procesada
+    por un worker aparte (ver facturacion.py)
+    """
+    ESTADOS_CORRIDA = (
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completada', 'Completada'),
+        ('fallida', 'Fallida'),
+    )
+    
+    periodo = models.CharField(
+        max_length=7,
+        help_text="Formato: YYYY-MM (ej: 2025-01)",
+        verbose_name="Período"
+    )
+    tipos_pago = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="IDs de los tipos de pago; vacío para los recurrentes activos",
+        verbose_name="Tipos de Pago"
+    )
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADOS_CORRIDA,
+        default='pendiente',
+        verbose_name="Estado"
+    )
+    
+    # Avance: las unidades se procesan por id ascendente y cada lote confirma
+    # sus pagos junto con el punto de control
+    ultima_unidad_procesada = models.BigIntegerField(default=0, verbose_name="Última Unidad Procesada")
+    unidades_total = models.PositiveIntegerField(default=0, verbose_name="Total de Unidades")
+    unidades_procesadas = models.PositiveIntegerField(default=0, verbose_name="Unidades Procesadas")
+    pagos_creados = models.PositiveIntegerField(default=0, verbose_name="Pagos Creados")
+    
+    errores = models.JSONField(default=list, blank=True, verbose_name="Errores")
+    intentos = models.PositiveIntegerField(default=0, verbose_name="Intentos")
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    
+    solicitado_por = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='corridas_facturacion',
+        verbose_name="Solicitado por"
+    )
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True, verbose_name="Inicio de Procesamiento")
+    fecha_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fin de Procesamiento")
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Última Actualización")
+    
+    class Meta:
+        verbose_name = "Corrida de Facturación"
+        verbose_name_plural = "Corridas de Facturación"
+        db_table = "corridas_facturacion"
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion']),
+        ]
+    
+    def __str__(self):
+        return f"Facturación {self.periodo} - {self.get_estado_display()}"
+    
+    @property
+    def progreso(self):
+        """Porcentaje de unidades procesadas"""
+        if not self.unidades_total:
+            return 100.0 if self.estado == 'completada' else 0.0
+        return round(self.unidades_procesadas / self.unidades_total * 100, 2)
+
+
+class AplicacionInteresMoratorio(models.Model):
+    """
+    Registro de cada aplicación de interés moratorio; una por día, para que
+    repetirla no vuelva a cobrar (ver intereses.py)
+    """
+    fecha = models.DateField(unique=True, verbose_name="Fecha de Aplicación")
+    tasa_interes = models.DecimalField(max_digits=6, decimal_places=4, verbose_name="Tasa de Interés Mensual")
+    dias_gracia = models.PositiveIntegerField(verbose_name="Días de Gracia")
+    pagos_evaluados = models.PositiveIntegerField(default=0, verbose_name="Pagos Evaluados")
+    multas_creadas = models.PositiveIntegerField(default=0, verbose_name="Multas Creadas")
+    monto_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Monto Total"
+    )
+    duracion_ms = models.PositiveIntegerField(default=0, verbose_name="Duración (ms)")
+    aplicada_por = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Aplicada por"
+    )
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Aplicación de Interés Moratorio"
+        verbose_name_plural = "Aplicaciones de Interés Moratorio"
+        db_table = "aplicaciones_interes_moratorio"
+        ordering = ['-fecha']
+    
+    def __str__(self):
+        return f"Interés moratorio {self.fecha}: {self.multas_creadas} multas"
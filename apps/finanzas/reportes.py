@@ -0,0 +1,80 @@
+"""
+Reporte de morosidad agregado en la base de datos.
+
+Los totales por unidad (deuda, cantidad de pagos vencidos y vencimiento más
+antiguo) se calculan con GROUP BY; el reporte solo trae las filas agrupadas
+de la página pedida y, si se solicita, el detalle liviano de los pagos de
+esas unidades en una consulta más.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Min, Sum
+
+from .models import Pago
+
+SALDO = ExpressionWrapper(
+    F('monto_total') - F('monto_pagado'), output_field=DecimalField(max_digits=12, decimal_places=2)
+)
+
+COLUMNAS_UNIDAD = {
+    'unidad_id': 'unidad_id',
+    'numero_unidad': 'unidad__numero_unidad',
+    'edificio': 'unidad__edificio',
+    'propietario_id': 'unidad__propietario_id',
+    'inquilino_id': 'unidad__inquilino_id',
+}
+
+
+def pagos_vencidos(hoy):
+    return Pago.objects.filter(fecha_vencimiento__lt=hoy, estado='pendiente').order_by()
+
+
+def deuda_por_unidad(hoy):
+    """Una fila por unidad morosa, de mayor a menor deuda"""
+    return pagos_vencidos(hoy).values(*COLUMNAS_UNIDAD.values()).annotate(
+        total_deuda=Sum(SALDO),
+        cantidad_pagos_vencidos=Count('id'),
+        vencimiento_mas_antiguo=Min('fecha_vencimiento'),
+    ).order_by('-total_deuda', 'unidad_id')
+
+
+def resumen_morosidad(hoy):
+    totales = pagos_vencidos(hoy).aggregate(
+        total_deuda=Sum(SALDO), total_unidades_morosas=Count('unidad', distinct=True)
+    )
+    total_deuda = totales['total_deuda'] or Decimal('0.00')
+    unidades = totales['total_unidades_morosas']
+    return {
+        'total_unidades_morosas': unidades,
+        'total_deuda': total_deuda,
+        'promedio_deuda_por_unidad': total_deuda / unidades if unidades else Decimal('0.00'),
+    }
+
+
+def fila_unidad(fila, hoy):
+    """Formato liviano de una fila de deuda_por_unidad()"""
+    return {
+        'unidad': {nombre: fila[columna] for nombre, columna in COLUMNAS_UNIDAD.items()},
+        'total_deuda': fila['total_deuda'],
+        'cantidad_pagos_vencidos': fila['cantidad_pagos_vencidos'],
+        'dias_max_vencido': (hoy - fila['vencimiento_mas_antiguo']).days,
+    }
+
+
+def detalle_pagos(unidad_ids, hoy):
+    """Pagos vencidos de `unidad_ids` en formato liviano, agrupados por unidad"""
+    detalle = {unidad_id: [] for unidad_id in unidad_ids}
+    filas = pagos_vencidos(hoy).filter(unidad_id__in=unidad_ids).annotate(saldo=SALDO).values(
+        'id', 'unidad_id', 'tipo_pago__nombre', 'periodo', 'fecha_vencimiento', 'monto_total', 'saldo'
+    ).order_by('unidad_id', 'fecha_vencimiento', 'id')
+    for fila in filas:
+        detalle[fila['unidad_id']].append({
+            'id': fila['id'],
+            'tipo_pago': fila['tipo_pago__nombre'],
+            'periodo': fila['periodo'],
+            'fecha_vencimiento': fila['fecha_vencimiento'],
+            'monto_total': fila['monto_total'],
+            'saldo_pendiente': fila['saldo'],
+            'dias_vencido': (hoy - fila['fecha_vencimiento']).days,
+        })
+    return detalle
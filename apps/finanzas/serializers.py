@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from decimal import Decimal
 from django.utils import timezone
-from .models import UnidadHabitacional, TipoPago, Pago, HistorialPago, Multa
+from .models import UnidadHabitacional, TipoPago, Pago, HistorialPago, Multa, CorridaFacturacion
 from apps.autenticacion.models import Usuario
 
 class SerializadorUnidadHabitacional(serializers.ModelSerializer):
@@ -147,4 +147,19 @@ class SerializadorResumenFinanciero(serializers.Serializer):
     pagos_vencidos = serializers.IntegerField()
     total_multas_pendientes = serializers.DecimalField(max_digits=12, decimal_places=2)
     unidades_morosas = serializers.IntegerField()
-    tasa_cobranza = serializers.DecimalField(max_digits=5, decimal_places=2)
\ No newline at end of file
+    tasa_cobranza = serializers.DecimalField(max_digits=5, decimal_places=2)
+
+class SerializadorCorridaFacturacion(serializers.ModelSerializer):
+    """
+    Serializador para consultar el avance de las corridas de facturación
+    """
+    progreso = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = CorridaFacturacion
+        fields = [
+            'id', 'periodo', 'tipos_pago', 'estado', 'progreso', 'unidades_total',
+            'unidades_procesadas', 'pagos_creados', 'errores', 'intentos',
+            'fecha_creacion', 'fecha_inicio', 'fecha_fin', 'fecha_actualizacion'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,7 @@
+"""
+Señales del módulo de finanzas
+"""
+from .models import Pago, Multa
+from apps.autenticacion.cache_dashboards import conectar_invalidacion
+
+conectar_invalidacion('resumen_financiero_admin', Pago, Multa)
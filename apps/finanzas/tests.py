@@ -0,0 +1,409 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from apps.autenticacion.models import PerfilUsuario
+from .models import UnidadHabitacional, TipoPago, Pago, HistorialPago, Multa, CorridaFacturacion
+from .views import ListaPagosAdmin
+
+Usuario = get_user_model()
+
+
+class DatosFacturacionMixin:
+    """300 unidades (la primera inactiva, las impares con inquilino) y 4 tipos recurrentes"""
+    
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(
+            username='administrador', email='admin@example.com', password='testpass123'
+        )
+        PerfilUsuario.objects.create(usuario=self.admin, rol='administrador')
+        self.inquilino = Usuario.objects.create_user(username='inquilino', email='inquilino@example.com')
+        UnidadHabitacional.objects.bulk_create([
+            UnidadHabitacional(
+                numero_unidad=f'U{numero}', edificio='A', propietario=self.admin,
+                inquilino=self.inquilino if numero % 2 else None,
+                area_m2=Decimal('80.00'), dormitorios=2, esta_activa=numero != 0
+            )
+            for numero in range(300)
+        ])
+        self.tipos = [
+            TipoPago.objects.create(nombre=f'Cuota {numero}', monto_base=Decimal('100.00'))
+            for numero in range(4)
+        ]
+        TipoPago.objects.create(nombre='Reserva', monto_base=Decimal('50.00'), es_recurrente=False)
+
+
+class FacturacionMensualTest(DatosFacturacionMixin, APITestCase):
+    """Tests de la generación de pagos mensuales"""
+    
+    def test_genera_faltantes_en_lotes_e_idempotente(self):
+        """Test de la corrida: consultas constantes, pagos faltantes y repetición sin duplicados"""
+        from .facturacion import generar_pagos_periodo
+        
+        unidad = UnidadHabitacional.objects.get(numero_unidad='U1')
+        Pago.objects.create(
+            unidad=unidad, usuario_pagador=self.inquilino, tipo_pago=self.tipos[0],
+            monto_total=Decimal('100.00'), fecha_vencimiento=date(2026, 2, 28), periodo='2026-02'
+        )
+        
+        # tipos, unidades, claves existentes y conteo final, más los INSERT por lote
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = generar_pagos_periodo('2026-02', creado_por=self.admin, tamano_lote=1000)
+        self.assertEqual(len([c for c in consultas if c['sql'].startswith('SELECT')]), 4)
+        
+        self.assertEqual(resultado.pagos_creados, 299 * 4 - 1)
+        self.assertEqual((resultado.unidades, resultado.tipos, resultado.existentes), (299, 4, 1))
+        pago = Pago.objects.get(unidad=unidad, tipo_pago=self.tipos[1], periodo='2026-02')
+        self.assertEqual(pago.usuario_pagador, self.inquilino)
+        self.assertEqual(pago.fecha_vencimiento, date(2026, 2, 28))
+        self.assertFalse(Pago.objects.filter(unidad__numero_unidad='U0').exists())
+        
+        repetido = generar_pagos_periodo('2026-02')
+        self.assertEqual((repetido.pagos_creados, repetido.existentes), (0, 299 * 4))
+        self.assertEqual(Pago.objects.count(), 299 * 4)
+    
+    def test_restriccion_unica(self):
+        """Test de la restricción única (unidad, tipo_pago, periodo)"""
+        unidad = UnidadHabitacional.objects.get(numero_unidad='U2')
+        datos = dict(unidad=unidad, usuario_pagador=self.admin, tipo_pago=self.tipos[0],
+                     monto_total=Decimal('100.00'), fecha_vencimiento=date(2026, 3, 31), periodo='2026-03')
+        Pago.objects.create(**datos)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Pago.objects.create(**datos)
+    
+    def test_comando(self):
+        """Test del comando con tipos indicados y con los recurrentes"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        salida = StringIO()
+        call_command('generar_pagos_mensuales', '--periodo', '2026-04', '--tipos', str(self.tipos[2].id), stdout=salida)
+        self.assertIn('299 pagos creados', salida.getvalue())
+        call_command('generar_pagos_mensuales', '--periodo', '2026-04', stdout=salida)
+        self.assertIn('897 pagos creados', salida.getvalue())
+        self.assertEqual(Pago.objects.filter(periodo='2026-04').count(), 299 * 4)
+
+
+class CorridaFacturacionTest(DatosFacturacionMixin, APITestCase):
+    """Tests de las corridas de facturación en segundo plano"""
+    
+    def test_endpoint_encola_y_worker_procesa(self):
+        """Test del ciclo completo: encolar, procesar por lotes y consultar el estado"""
+        from .facturacion import tomar_corrida, procesar_corrida
+        
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('finanzas:generar-pagos')
+        self.assertEqual(self.client.post(url, {'periodo': '2026-13'}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {'periodo': '2026-05'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        corrida_id = response.data['corrida']['id']
+        self.assertFalse(Pago.objects.exists())
+        
+        # Una segunda solicitud del mismo período reutiliza la corrida activa
+        response = self.client.post(url, {'periodo': '2026-05'}, format='json')
+        self.assertEqual(response.data['corrida']['id'], corrida_id)
+        
+        corrida = tomar_corrida('prueba')
+        self.assertEqual(corrida.id, corrida_id)
+        procesar_corrida(corrida, unidades_por_lote=100)
+        
+        response = self.client.get(reverse('finanzas:corrida-facturacion-detail', args=[corrida_id]))
+        self.assertEqual(response.data['estado'], 'completada')
+        self.assertEqual(response.data['progreso'], 100.0)
+        self.assertEqual((response.data['unidades_procesadas'], response.data['pagos_creados']), (299, 299 * 4))
+        self.assertEqual(Pago.objects.count(), 299 * 4)
+        self.assertIsNone(tomar_corrida('prueba'))
+    
+    def test_corrida_interrumpida_se_retoma_desde_el_punto_de_control(self):
+        """Test de reanudación tras un error en un lote"""
+        from unittest import mock
+        from . import facturacion
+        
+        corrida, _ = facturacion.encolar_corrida('2026-06', usuario=self.admin)
+        original = facturacion.insertar_pagos
+        llamadas = []
+        
+        def falla_en_el_tercer_lote(pagos, *args, **kwargs):
+            llamadas.append(len(pagos))
+            if len(llamadas) == 3:
+                raise RuntimeError('conexión perdida')
+            return original(pagos, *args, **kwargs)
+        
+        with mock.patch.object(facturacion, 'insertar_pagos', falla_en_el_tercer_lote), \
+                self.assertLogs('apps.finanzas.facturacion', level='ERROR'):
+            facturacion.procesar_corrida(facturacion.tomar_corrida(), unidades_por_lote=100)
+        corrida.refresh_from_db()
+        self.assertEqual(corrida.estado, 'pendiente')
+        self.assertEqual((corrida.unidades_procesadas, corrida.pagos_creados), (200, 800))
+        self.assertEqual(corrida.errores[0]['error'], 'conexión perdida')
+        # El lote fallido no dejó pagos
+        self.assertEqual(Pago.objects.count(), 800)
+        
+        retomada = facturacion.tomar_corrida()
+        self.assertEqual(retomada.intentos, 2)
+        facturacion.procesar_corrida(retomada, unidades_por_lote=100)
+        self.assertEqual(retomada.estado, 'completada')
+        self.assertEqual((retomada.unidades_procesadas, retomada.pagos_creados), (299, 299 * 4))
+        self.assertEqual(Pago.objects.count(), 299 * 4)
+    
+    def test_interrupcion_ordenada_y_corridas_abandonadas(self):
+        """Test de la detención entre lotes y de la recuperación de workers caídos"""
+        from . import facturacion
+        
+        corrida, _ = facturacion.encolar_corrida('2026-07', usuario=self.admin)
+        facturacion.procesar_corrida(facturacion.tomar_corrida(), unidades_por_lote=100, continuar=lambda: False)
+        corrida.refresh_from_db()
+        self.assertEqual((corrida.estado, corrida.intentos, corrida.unidades_procesadas), ('pendiente', 0, 100))
+        
+        facturacion.tomar_corrida()
+        CorridaFacturacion.objects.filter(id=corrida.id).update(
+            fecha_actualizacion=timezone.now() - facturacion.TIEMPO_SIN_AVANCE - timedelta(minutes=1)
+        )
+        self.assertEqual(facturacion.recuperar_corridas_abandonadas(), (1, 0))
+        corrida.refresh_from_db()
+        self.assertEqual(corrida.estado, 'pendiente')
+
+
+class InteresMoratorioTest(APITestCase):
+    """Tests del interés moratorio vectorizado"""
+    
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(
+            username='administrador', email='admin@example.com', password='testpass123'
+        )
+        self.tipo = TipoPago.objects.create(nombre='Expensa', monto_base=Decimal('100.00'))
+        self.hoy = timezone.localdate()
+        self.unidades = [
+            UnidadHabitacional.objects.create(
+                numero_unidad=f'U{numero}', edificio='A', propietario=self.admin,
+                area_m2=Decimal('80.00'), dormitorios=2
+            )
+            for numero in range(3)
+        ]
+    
+    def pago(self, unidad, dias_vencido, monto_total, monto_pagado='0.00', estado='pendiente'):
+        vencimiento = self.hoy - timedelta(days=dias_vencido)
+        return Pago.objects.create(
+            unidad=unidad, usuario_pagador=self.admin, tipo_pago=self.tipo,
+            monto_total=Decimal(monto_total), monto_pagado=Decimal(monto_pagado), estado=estado,
+            fecha_vencimiento=vencimiento, periodo=vencimiento.strftime('%Y-%m')
+        )
+    
+    def test_coincide_con_el_calculo_decimal(self):
+        """Test de montos iguales a saldo × tasa × días / 30 con Decimal.quantize"""
+        from .intereses import aplicar_intereses
+        
+        casos = [
+            (self.unidades[0], 75, '100.00', '0.00'),
+            (self.unidades[0], 39, '1.00', '0.00'),      # 0,015 -> 0,02 (empate al par)
+            (self.unidades[1], 33, '1.00', '0.00'),      # 0,005 -> 0,00: sin multa
+            (self.unidades[1], 400, '333.33', '12.34'),
+            (self.unidades[2], 20, '100.00', '0.00'),    # dentro de la gracia
+        ]
+        pagos = [self.pago(*caso) for caso in casos]
+        self.pago(self.unidades[2], 90, '50.00', '50.00', estado='pagado')
+        
+        tasa = Decimal('0.05')
+        aplicacion, multas = aplicar_intereses(tasa, 30, self.admin, hoy=self.hoy)
+        
+        esperado = {}
+        for pago in pagos:
+            dias = (self.hoy - pago.fecha_vencimiento).days - 30
+            interes = (pago.saldo_pendiente * tasa * Decimal(dias) / Decimal(30)).quantize(Decimal('0.01'))
+            if dias > 0 and interes > 0:
+                esperado[pago.id] = interes
+        
+        self.assertEqual({multa.pago_asociado_id: multa.monto for multa in Multa.objects.all()}, esperado)
+        self.assertEqual(len(multas), 3)
+        self.assertEqual(aplicacion.pagos_evaluados, 4)
+        self.assertEqual(aplicacion.monto_total, sum(esperado.values()))
+    
+    def test_segunda_aplicacion_del_dia_no_cobra(self):
+        """Test de idempotencia diaria desde el endpoint y el comando"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        self.pago(self.unidades[0], 60, '100.00')
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('finanzas:aplicar-intereses')
+        
+        self.assertEqual(self.client.post(url, {'tasa_interes': '2'}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {'tasa_interes': '0.05', 'dias_gracia': 30})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['ya_aplicado'])
+        self.assertEqual(response.data['total_intereses'], 1)
+        self.assertEqual(response.data['monto_total'], Decimal('5.00'))
+        
+        response = self.client.post(url, {'tasa_interes': '0.05', 'dias_gracia': 30})
+        self.assertTrue(response.data['ya_aplicado'])
+        salida = StringIO()
+        call_command('aplicar_intereses_moratorios', stdout=salida)
+        self.assertIn('ya fueron aplicados', salida.getvalue())
+        self.assertEqual(Multa.objects.count(), 1)
+    
+    def test_dias_siguientes_cobran_solo_los_dias_nuevos(self):
+        """Test de dos ejecuciones diarias: la segunda cobra solo un día"""
+        from .intereses import aplicar_intereses
+        
+        pago = self.pago(self.unidades[0], 60, '300.00')
+        ayer = self.hoy - timedelta(days=1)
+        
+        _, multas = aplicar_intereses(Decimal('0.05'), 30, self.admin, hoy=ayer)
+        self.assertEqual([multa.monto for multa in multas], [Decimal('14.50')])   # 29 días
+        _, multas = aplicar_intereses(Decimal('0.05'), 30, self.admin, hoy=self.hoy)
+        self.assertEqual([multa.monto for multa in multas], [Decimal('0.50')])    # 1 día
+        
+        total = sum(multa.monto for multa in Multa.objects.filter(pago_asociado=pago))
+        self.assertEqual(total, (pago.saldo_pendiente * Decimal('0.05')).quantize(Decimal('0.01')))
+
+
+class ReporteMorosidadTest(APITestCase):
+    """Tests del reporte de morosidad agregado en la base de datos"""
+    
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(
+            username='administrador', email='admin@example.com', password='testpass123'
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.hoy = timezone.localdate()
+        tipo = TipoPago.objects.create(nombre='Expensa', monto_base=Decimal('100.00'))
+        self.unidades = []
+        # La unidad n tiene n + 1 pagos vencidos de 100 (uno con abono de 40) y uno al día
+        for numero in range(3):
+            unidad = UnidadHabitacional.objects.create(
+                numero_unidad=f'U{numero}', edificio='A', propietario=self.admin,
+                area_m2=Decimal('80.00'), dormitorios=2
+            )
+            self.unidades.append(unidad)
+            for meses in range(numero + 2):
+                vencimiento = self.hoy - timedelta(days=30 * meses + 5)
+                Pago.objects.create(
+                    unidad=unidad, usuario_pagador=self.admin, tipo_pago=tipo,
+                    monto_total=Decimal('100.00'), fecha_vencimiento=vencimiento,
+                    monto_pagado=Decimal('40.00') if meses == 1 else Decimal('0.00'),
+                    periodo=vencimiento.strftime('%Y-%m'), estado='pendiente' if meses < numero + 1 else 'pagado'
+                )
+        self.url = reverse('finanzas:reporte-morosidad')
+    
+    def test_totales_por_unidad(self):
+        """Test de resumen y filas agrupadas por unidad, de mayor a menor deuda"""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        resumen = response.data['resumen']
+        self.assertEqual(resumen['total_unidades_morosas'], 3)
+        self.assertEqual(resumen['total_deuda'], Decimal('100.00') + Decimal('160.00') + Decimal('260.00'))
+        
+        filas = response.data['detalle_unidades']
+        self.assertEqual([fila['unidad']['numero_unidad'] for fila in filas], ['U2', 'U1', 'U0'])
+        self.assertEqual(filas[0]['total_deuda'], Decimal('260.00'))
+        self.assertEqual(filas[0]['cantidad_pagos_vencidos'], 3)
+        self.assertEqual(filas[0]['dias_max_vencido'], 65)
+        self.assertNotIn('pagos_vencidos', filas[0])
+    
+    def test_paginado_con_detalle_en_consultas_constantes(self):
+        """Test de paginación y detalle de pagos sin consultas por unidad"""
+        # conteo, página, resumen y detalle de pagos
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {'page_size': 2, 'incluir_pagos': 'true'})
+        
+        self.assertEqual(response.data['count'], 3)
+        self.assertIsNotNone(response.data['next'])
+        filas = response.data['detalle_unidades']
+        self.assertEqual(len(filas), 2)
+        pagos = filas[1]['pagos_vencidos']
+        self.assertEqual([pago['saldo_pendiente'] for pago in pagos], [Decimal('60.00'), Decimal('100.00')])
+        self.assertEqual(pagos[0]['dias_vencido'], 35)
+        
+        response = self.client.get(response.data['next'])
+        self.assertEqual([fila['unidad']['numero_unidad'] for fila in response.data['detalle_unidades']], ['U0'])
+
+
+class ConsultasListadosTest(APITestCase):
+    """El número de consultas de los listados no depende de la cantidad de filas"""
+    
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            username='propietario', email='propietario@example.com', password='testpass123',
+            first_name='Ana', last_name='Pérez'
+        )
+        self.client.force_authenticate(user=self.usuario)
+        self.tipo = TipoPago.objects.create(nombre='Expensa', monto_base=Decimal('100.00'))
+        self.filas = 0
+    
+    def crear_filas(self, cantidad):
+        """Pagos pendientes vencidos con historial y multa, en unidades con y sin inquilino"""
+        for numero in range(self.filas, self.filas + cantidad):
+            inquilino = Usuario.objects.create_user(
+                username=f'inquilino{numero}', email=f'inquilino{numero}@example.com'
+            ) if numero % 2 else None
+            unidad = UnidadHabitacional.objects.create(
+                numero_unidad=f'U{numero}', edificio='A', propietario=self.usuario, inquilino=inquilino,
+                area_m2=Decimal('80.00'), dormitorios=2
+            )
+            pago = Pago.objects.create(
+                unidad=unidad, usuario_pagador=inquilino or self.usuario, tipo_pago=self.tipo,
+                monto_total=Decimal('100.00'), monto_pagado=Decimal('10.00'),
+                fecha_vencimiento=date.today() - timedelta(days=10), periodo='2026-01'
+            )
+            for _ in range(2):
+                HistorialPago.objects.create(
+                    pago=pago, monto_transaccion=Decimal('5.00'), estado_anterior='pendiente',
+                    estado_nuevo='pendiente', procesado_por=self.usuario
+                )
+            Multa.objects.create(
+                unidad=unidad, tipo_multa='retraso_pago', monto=Decimal('5.00'),
+                descripcion='Retraso', fecha_infraccion=date.today(), aplicada_por=self.usuario
+            )
+        self.filas += cantidad
+    
+    def consultas(self, nombre, **parametros):
+        with CaptureQueriesContext(connection) as consultas:
+            if isinstance(nombre, str):
+                response = self.client.get(reverse(f'finanzas:{nombre}'), parametros)
+            else:
+                # Vistas sin ruta propia
+                request = APIRequestFactory().get('/', parametros)
+                force_authenticate(request, user=self.usuario)
+                response = nombre.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(consultas)
+    
+    def assertConsultasConstantes(self, nombre, **parametros):
+        self.crear_filas(2)
+        pocas = self.consultas(nombre, **parametros)
+        self.crear_filas(13)
+        self.assertEqual(self.consultas(nombre, **parametros), pocas, nombre)
+    
+    def test_listados_de_pagos(self):
+        for nombre in ['pagos-list', 'cuotas-list', 'mis-pagos', 'historial-usuario']:
+            with self.subTest(nombre=nombre):
+                self.assertConsultasConstantes(nombre)
+    
+    def test_listado_admin_por_pagina_y_cursor(self):
+        self.assertConsultasConstantes(ListaPagosAdmin, page_size=50)
+        self.assertConsultasConstantes(ListaPagosAdmin, page_size=50, paginacion='cursor')
+    
+    def test_listados_de_multas_y_unidades(self):
+        for nombre in ['lista-multas', 'gastos-list', 'lista-unidades']:
+            with self.subTest(nombre=nombre):
+                self.assertConsultasConstantes(nombre)
+    
+    def test_datos_anidados(self):
+        """El plan de consulta no cambia lo que se serializa"""
+        self.crear_filas(2)
+        response = self.client.get(reverse('finanzas:pagos-list'))
+        
+        pago = next(fila for fila in response.data['results'] if fila['unidad_info']['numero_unidad'] == 'U1')
+        self.assertEqual(pago['unidad_info']['nombre_propietario'], 'Ana Pérez')
+        self.assertEqual(pago['unidad_info']['usuario_responsable_nombre'], '')
+        self.assertEqual(pago['tipo_pago_info']['nombre'], 'Expensa')
+        self.assertEqual(len(pago['historial']), 2)
+        self.assertEqual(pago['historial'][0]['procesado_por_nombre'], 'Ana Pérez')
@@ -23,6 +23,8 @@ urlpatterns = [
     path('resumen/', views.resumen_financiero_usuario, name='resumen-usuario'),
     path('pagos/<int:pago_id>/procesar/', views.procesar_pago, name='procesar-pago'),
     path('generar-pagos/', views.generar_pagos_mensuales, name='generar-pagos'),
+    path('corridas-facturacion/', views.ListaCorridasFacturacion.as_view(), name='corridas-facturacion-list'),
+    path('corridas-facturacion/<int:pk>/', views.DetalleCorridaFacturacion.as_view(), name='corrida-facturacion-detail'),
     path('multas/', views.ListaMultas.as_view(), name='lista-multas'),
     path('multas/<int:pk>/', views.DetalleMulta.as_view(), name='detalle-multa'),
     path('aplicar-intereses/', views.aplicar_interes_moratorio, name='aplicar-intereses'),
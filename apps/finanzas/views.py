@@ -2,17 +2,24 @@ from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.db.models import Sum, Q, Count
+from django.urls import reverse
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import timedelta
 from decimal import Decimal
-from .models import UnidadHabitacional, TipoPago, Pago, HistorialPago, Multa
+from .models import UnidadHabitacional, TipoPago, Pago, HistorialPago, Multa, CorridaFacturacion
+from .facturacion import encolar_corrida
+from .consultas import ConsultaOptimizadaMixin, optimizar_consulta
+from .reportes import deuda_por_unidad, resumen_morosidad, fila_unidad, detalle_pagos
+from .intereses import TASA_POR_DEFECTO, DIAS_GRACIA_POR_DEFECTO, aplicar_intereses, validar_tasa
+from apps.autenticacion.cache_dashboards import cache_dashboard
+from apps.autenticacion.paginacion import PaginacionHibrida
 from .serializers import (
     SerializadorUnidadHabitacional, SerializadorTipoPago, SerializadorPago,
     SerializadorCrearPago, SerializadorProcesarPago, SerializadorMulta,
-    SerializadorResumenFinanciero
+    SerializadorResumenFinanciero, SerializadorCorridaFacturacion
 )
 
-class ListaUnidadesHabitacionales(generics.ListCreateAPIView):
+class ListaUnidadesHabitacionales(ConsultaOptimizadaMixin, generics.ListCreateAPIView):
     """
     Listar y crear unidades habitacionales
     """
@@ -20,7 +27,7 @@ class ListaUnidadesHabitacionales(generics.ListCreateAPIView):
     serializer_class = SerializadorUnidadHabitacional
     permission_classes = [permissions.IsAuthenticated]
 
-class DetalleUnidadHabitacional(generics.RetrieveUpdateDestroyAPIView):
+class DetalleUnidadHabitacional(ConsultaOptimizadaMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Ver, actualizar o eliminar unidad habitacional
     """
@@ -36,12 +43,13 @@ class ListaTiposPago(generics.ListCreateAPIView):
     serializer_class = SerializadorTipoPago
     permission_classes = [permissions.IsAuthenticated]
 
-class ListaPagosUsuario(generics.ListAPIView):
+class ListaPagosUsuario(ConsultaOptimizadaMixin, generics.ListAPIView):
     """
     Listar pagos del usuario autenticado
     """
     serializer_class = SerializadorPago
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PaginacionHibrida
     
     def get_queryset(self):
         usuario = self.request.user
@@ -51,12 +59,13 @@ class ListaPagosUsuario(generics.ListAPIView):
         )
         return Pago.objects.filter(unidad__in=unidades_responsable)
 
-class ListaPagosAdmin(generics.ListCreateAPIView):
+class ListaPagosAdmin(ConsultaOptimizadaMixin, generics.ListCreateAPIView):
     """
     Listar todos los pagos (solo administradores)
     """
     queryset = Pago.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PaginacionHibrida
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -88,7 +97,7 @@ class ListaPagosAdmin(generics.ListCreateAPIView):
         
         return queryset.order_by('-fecha_vencimiento')
 
-class DetallePago(generics.RetrieveUpdateDestroyAPIView):
+class DetallePago(ConsultaOptimizadaMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Ver, actualizar o eliminar pago específico
     """
@@ -185,12 +194,12 @@ def historial_pagos_usuario(request):
     if fecha_hasta:
         pagos = pagos.filter(fecha_creacion__lte=fecha_hasta)
     
-    pagos = pagos.order_by('-fecha_creacion')
+    pagos = list(optimizar_consulta(pagos.order_by('-fecha_creacion'), SerializadorPago))
     serializador = SerializadorPago(pagos, many=True)
     
     return Response({
         'historial': serializador.data,
-        'total_pagos': pagos.count()
+        'total_pagos': len(pagos)
     })
 
 @api_view(['GET'])
@@ -251,6 +260,7 @@ def resumen_financiero_usuario(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cache_dashboard('resumen_financiero_admin', ttl=300)
 def resumen_financiero_admin(request):
     """
     Resumen financiero completo para administradores
@@ -308,13 +318,13 @@ def resumen_financiero_admin(request):
         'total_multas_pendientes': total_multas_pendientes,
         'unidades_morosas': unidades_morosas,
         'tasa_cobranza': tasa_cobranza,
-        'estadisticas_por_estado': Pago.objects.values('estado').annotate(
+        'estadisticas_por_estado': list(Pago.objects.values('estado').annotate(
             cantidad=Count('id'),
             monto_total=Sum('monto_total')
-        )
+        ).order_by('estado'))
     })
 
-class ListaMultas(generics.ListCreateAPIView):
+class ListaMultas(ConsultaOptimizadaMixin, generics.ListCreateAPIView):
     """
     Listar y crear multas
     """
@@ -346,7 +356,7 @@ class ListaMultas(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(aplicada_por=self.request.user)
 
-class DetalleMulta(generics.RetrieveUpdateDestroyAPIView):
+class DetalleMulta(ConsultaOptimizadaMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Ver, actualizar o eliminar multa específica
     """
@@ -358,7 +368,9 @@ class DetalleMulta(generics.RetrieveUpdateDestroyAPIView):
 @permission_classes([permissions.IsAuthenticated])
 def generar_pagos_mensuales(request):
     """
-    Generar pagos mensuales automáticamente
+    Generar pagos mensuales automáticamente.
+    Encola una corrida de facturación (ver facturacion.py) y responde 202 con
+    la URL para consultar su avance.
     """
     periodo = request.data.get('periodo')  # Formato: YYYY-MM
     tipos_pago = request.data.get('tipos_pago', [])  # IDs de tipos de pago
@@ -368,179 +380,138 @@ def generar_pagos_mensuales(request):
             'error': 'Debe especificar el período'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Validar formato del período
     try:
-        fecha_periodo = datetime.strptime(periodo, '%Y-%m')
-    except ValueError:
+        corrida, creada = encolar_corrida(periodo, tipos_pago, request.user)
+    except ValueError as e:
         return Response({
-            'error': 'Formato de período inválido. Use YYYY-MM'
+            'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Obtener tipos de pago a generar
-    if tipos_pago:
-        tipos = TipoPago.objects.filter(id__in=tipos_pago, esta_activo=True)
-    else:
-        tipos = TipoPago.objects.filter(es_recurrente=True, esta_activo=True)
-    
-    # Obtener todas las unidades activas
-    unidades = UnidadHabitacional.objects.filter(esta_activa=True)
-    
-    pagos_creados = []
-    errores = []
-    
-    for unidad in unidades:
-        for tipo_pago in tipos:
-            # Verificar si ya existe pago para este período
-            existe_pago = Pago.objects.filter(
-                unidad=unidad,
-                tipo_pago=tipo_pago,
-                periodo=periodo
-            ).exists()
-            
-            if not existe_pago:
-                try:
-                    # Calcular fecha de vencimiento (último día del mes)
-                    from calendar import monthrange
-                    año, mes = fecha_periodo.year, fecha_periodo.month
-                    ultimo_dia = monthrange(año, mes)[1]
-                    fecha_vencimiento = datetime(año, mes, ultimo_dia).date()
-                    
-                    pago = Pago.objects.create(
-                        unidad=unidad,
-                        usuario_pagador=unidad.usuario_responsable,
-                        tipo_pago=tipo_pago,
-                        monto_total=tipo_pago.monto_base,
-                        fecha_vencimiento=fecha_vencimiento,
-                        periodo=periodo,
-                        descripcion=f"Pago {tipo_pago.nombre} - {periodo}",
-                        creado_por=request.user
-                    )
-                    pagos_creados.append(pago.id)
-                    
-                except Exception as e:
-                    errores.append(f"Error en unidad {unidad}: {str(e)}")
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': 'Error encolando la generación de pagos',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     return Response({
-        'mensaje': f'Pagos generados para el período {periodo}',
-        'pagos_creados': len(pagos_creados),
-        'errores': errores,
-        'detalles': {
-            'periodo': periodo,
-            'unidades_procesadas': unidades.count(),
-            'tipos_pago_procesados': tipos.count()
-        }
-    })
+        'mensaje': (
+            f'Generación de pagos encolada para el período {periodo}' if creada
+            else f'Ya hay una generación de pagos en curso para el período {periodo}'
+        ),
+        'corrida': SerializadorCorridaFacturacion(corrida).data,
+        'url_estado': request.build_absolute_uri(
+            reverse('finanzas:corrida-facturacion-detail', args=[corrida.id])
+        )
+    }, status=status.HTTP_202_ACCEPTED)
+
+class ListaCorridasFacturacion(generics.ListAPIView):
+    """
+    Listar las corridas de facturación
+    """
+    queryset = CorridaFacturacion.objects.all()
+    serializer_class = SerializadorCorridaFacturacion
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PaginacionHibrida
+
+class DetalleCorridaFacturacion(generics.RetrieveAPIView):
+    """
+    Estado y avance de una corrida de facturación
+    """
+    queryset = CorridaFacturacion.objects.all()
+    serializer_class = SerializadorCorridaFacturacion
+    permission_classes = [permissions.IsAuthenticated]
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def reporte_morosidad(request):
     """
-    Generar reporte de morosidad
+    Generar reporte de morosidad.
+    Los totales por unidad se agrupan en la base de datos (ver reportes.py) y
+    el listado se pagina; `incluir_pagos=true` agrega el detalle liviano de
+    los pagos vencidos de las unidades de la página.
     """
     # Obtener parámetros de filtro
-    dias_vencido = int(request.query_params.get('dias_vencido', 30))
-    
-    # Pagos vencidos
-    fecha_limite = timezone.now().date() - timedelta(days=dias_vencido)
-    
-    pagos_vencidos = Pago.objects.filter(
-        fecha_vencimiento__lt=timezone.now().date(),
-        estado='pendiente'
-    ).select_related('unidad', 'tipo_pago', 'usuario_pagador')
-    
-    # Agrupar por unidad
-    unidades_morosas = {}
-    total_deuda = Decimal('0.00')
-    
-    for pago in pagos_vencidos:
-        unidad_key = pago.unidad.id
-        if unidad_key not in unidades_morosas:
-            unidades_morosas[unidad_key] = {
-                'unidad': SerializadorUnidadHabitacional(pago.unidad).data,
-                'pagos_vencidos': [],
-                'total_deuda': Decimal('0.00'),
-                'dias_max_vencido': 0
-            }
-        
-        unidades_morosas[unidad_key]['pagos_vencidos'].append(
-            SerializadorPago(pago).data
-        )
-        unidades_morosas[unidad_key]['total_deuda'] += pago.saldo_pendiente
-        unidades_morosas[unidad_key]['dias_max_vencido'] = max(
-            unidades_morosas[unidad_key]['dias_max_vencido'],
-            pago.dias_vencido
-        )
-        total_deuda += pago.saldo_pendiente
-    
+    try:
+        dias_vencido = int(request.query_params.get('dias_vencido', 30))
+    except ValueError:
+        return Response({
+            'error': 'dias_vencido debe ser un número entero'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    incluir_pagos = request.query_params.get('incluir_pagos') == 'true'
+    hoy = timezone.now().date()
+    
+    paginador = PaginacionHibrida()
+    filas = paginador.paginate_queryset(deuda_por_unidad(hoy), request)
+    detalle = [fila_unidad(fila, hoy) for fila in filas]
+    if incluir_pagos:
+        pagos = detalle_pagos([fila['unidad']['unidad_id'] for fila in detalle], hoy)
+        for fila in detalle:
+            fila['pagos_vencidos'] = pagos[fila['unidad']['unidad_id']]
+    
+    pagina = paginador.get_paginated_response(detalle).data
     return Response({
         'resumen': {
-            'total_unidades_morosas': len(unidades_morosas),
-            'total_deuda': total_deuda,
-            'promedio_deuda_por_unidad': total_deuda / len(unidades_morosas) if unidades_morosas else Decimal('0.00'),
-            'fecha_corte': timezone.now().date(),
+            **resumen_morosidad(hoy),
+            'fecha_corte': hoy,
             'criterio_dias': dias_vencido
         },
-        'detalle_unidades': list(unidades_morosas.values())
+        'count': pagina.get('count'),
+        'next': pagina['next'],
+        'previous': pagina['previous'],
+        'detalle_unidades': detalle
     })
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def aplicar_interes_moratorio(request):
     """
-    Aplicar interés moratorio a pagos vencidos
+    Aplicar interés moratorio a pagos vencidos (una vez por día, ver intereses.py)
     """
-    tasa_interes = Decimal(request.data.get('tasa_interes', '0.05'))  # 5% por defecto
-    dias_gracia = int(request.data.get('dias_gracia', 30))  # 30 días de gracia
-    
-    fecha_limite = timezone.now().date() - timedelta(days=dias_gracia)
-    
-    pagos_vencidos = Pago.objects.filter(
-        fecha_vencimiento__lt=fecha_limite,
-        estado='pendiente'
-    )
-    
-    intereses_aplicados = []
+    try:
+        tasa_interes = validar_tasa(request.data.get('tasa_interes', TASA_POR_DEFECTO))  # 5% por defecto
+        dias_gracia = int(request.data.get('dias_gracia', DIAS_GRACIA_POR_DEFECTO))  # 30 días de gracia
+        if dias_gracia < 0:
+            raise ValueError('Los días de gracia no pueden ser negativos')
+    except (TypeError, ValueError) as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     
-    for pago in pagos_vencidos:
-        # Calcular interés
-        dias_vencimiento = (timezone.now().date() - pago.fecha_vencimiento).days - dias_gracia
-        if dias_vencimiento > 0:
-            interes = pago.saldo_pendiente * tasa_interes * (dias_vencimiento / 30)
-            interes = interes.quantize(Decimal('0.01'))
-            
-            if interes > Decimal('0.00'):
-                # Crear multa por interés moratorio
-                multa = Multa.objects.create(
-                    unidad=pago.unidad,
-                    tipo_multa='retraso_pago',
-                    monto=interes,
-                    descripcion=f'Interés moratorio por {dias_vencimiento} días de retraso en pago {pago.id}',
-                    fecha_infraccion=timezone.now().date(),
-                    aplicada_por=request.user
-                )
-                
-                intereses_aplicados.append({
-                    'pago_id': pago.id,
-                    'unidad': str(pago.unidad),
-                    'interes_aplicado': interes,
-                    'dias_vencimiento': dias_vencimiento,
-                    'multa_id': multa.id
-                })
+    try:
+        aplicacion, multas = aplicar_intereses(tasa_interes, dias_gracia, request.user)
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': 'Error aplicando intereses moratorios',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    ya_aplicado = multas is None
     return Response({
-        'mensaje': f'Intereses moratorios aplicados',
-        'total_intereses': len(intereses_aplicados),
-        'detalle': intereses_aplicados,
+        'mensaje': (
+            f'Los intereses moratorios del {aplicacion.fecha} ya fueron aplicados' if ya_aplicado
+            else 'Intereses moratorios aplicados'
+        ),
+        'ya_aplicado': ya_aplicado,
+        'total_intereses': aplicacion.multas_creadas,
+        'monto_total': aplicacion.monto_total,
+        'pagos_evaluados': aplicacion.pagos_evaluados,
+        'detalle': [] if ya_aplicado else [{
+            'pago_id': multa.pago_asociado_id,
+            'unidad_id': multa.unidad_id,
+            'interes_aplicado': multa.monto,
+            'multa_id': multa.id
+        } for multa in multas],
         'parametros': {
-            'tasa_interes': f'{tasa_interes * 100}%',
-            'dias_gracia': dias_gracia,
-            'fecha_corte': fecha_limite
+            'tasa_interes': f'{aplicacion.tasa_interes * 100}%',
+            'dias_gracia': aplicacion.dias_gracia,
+            'fecha_corte': aplicacion.fecha - timedelta(days=aplicacion.dias_gracia)
         }
     })
 
 # ================ VISTAS ESTÁNDAR PARA FRONTEND ================
 
-class ListaCuotas(generics.ListCreateAPIView):
+class ListaCuotas(ConsultaOptimizadaMixin, generics.ListCreateAPIView):
     """
     Lista de cuotas (equivalente a pagos pendientes)
     """
@@ -550,7 +521,7 @@ class ListaCuotas(generics.ListCreateAPIView):
     def get_queryset(self):
         return Pago.objects.filter(estado='pendiente')
 
-class DetalleCuota(generics.RetrieveUpdateDestroyAPIView):
+class DetalleCuota(ConsultaOptimizadaMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Detalle de una cuota específica
     """
@@ -558,7 +529,7 @@ class DetalleCuota(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = SerializadorPago
     permission_classes = [permissions.IsAuthenticated]
 
-class ListaPagos(generics.ListCreateAPIView):
+class ListaPagos(ConsultaOptimizadaMixin, generics.ListCreateAPIView):
     """
     Lista de todos los pagos
     """
@@ -566,7 +537,7 @@ class ListaPagos(generics.ListCreateAPIView):
     serializer_class = SerializadorPago
     permission_classes = [permissions.IsAuthenticated]
 
-class ListaGastos(generics.ListCreateAPIView):
+class ListaGastos(ConsultaOptimizadaMixin, generics.ListCreateAPIView):
     """
     Lista de gastos (equivalente a multas)
     """
@@ -574,7 +545,7 @@ class ListaGastos(generics.ListCreateAPIView):
     serializer_class = SerializadorMulta
     permission_classes = [permissions.IsAuthenticated]
 
-class DetalleGasto(generics.RetrieveUpdateDestroyAPIView):
+class DetalleGasto(ConsultaOptimizadaMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Detalle de un gasto específico
     """
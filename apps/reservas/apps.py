@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class ReservasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reservas'
-    verbose_name = 'Reservas'
\ No newline at end of file
+    verbose_name = 'Reservas'
+
+    def ready(self):
+        from . import signals  # noqa: F401
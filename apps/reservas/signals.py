@@ -0,0 +1,7 @@
+"""
+Señales del módulo de reservas
+"""
+from .models import AreaComun, Reserva
+from apps.autenticacion.cache_dashboards import conectar_invalidacion
+
+conectar_invalidacion('estadisticas_reservas', AreaComun, Reserva)
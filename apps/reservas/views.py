@@ -15,6 +15,7 @@ from .serializers import (
     SerializadorDisponibilidadEspecial, SerializadorEstadisticasReservas
 )
 from apps.finanzas.models import UnidadHabitacional
+from apps.autenticacion.cache_dashboards import cache_dashboard, alcance_staff_o_usuario
 
 class ListaTiposAreaComun(generics.ListCreateAPIView):
     """
@@ -537,6 +538,7 @@ def horarios_ocupados(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cache_dashboard('estadisticas_reservas', ttl=120, alcance=alcance_staff_o_usuario)
 def estadisticas_reservas(request):
     """
     Obtener estadísticas de reservas
@@ -4,7 +4,7 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 from .models import (
     TipoVisitante, RegistroVisitante, AccesoVehiculo, RegistroAcceso,
-    IncidenteSeguridad, ConfiguracionIA, AnalisisPredictivoMorosidad
+    IncidenteSeguridad, ConfiguracionIA, AnalisisPredictivoMorosidad, TrabajoIA
 )
 
 @admin.register(TipoVisitante)
@@ -331,6 +331,24 @@ class AnalisisPredictivoMorosidadAdmin(admin.ModelAdmin):
             'unidad', 'usuario_analizado', 'generado_por'
         )
 
+@admin.register(TrabajoIA)
+class TrabajoIAAdmin(admin.ModelAdmin):
+    """Administración de la cola de trabajos de IA"""
+    list_display = [
+        'id', 'tipo_trabajo', 'estado', 'intentos', 'solicitado_por',
+        'fecha_creacion', 'fecha_inicio', 'fecha_fin'
+    ]
+    list_filter = ['tipo_trabajo', 'estado', 'fecha_creacion']
+    date_hierarchy = 'fecha_creacion'
+    ordering = ['-fecha_creacion']
+    readonly_fields = [
+        'resultado', 'error', 'intentos', 'worker', 'incidente',
+        'fecha_creacion', 'fecha_inicio', 'fecha_fin'
+    ]
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('solicitado_por', 'incidente')
+
 # Configuración del sitio de administración
 admin.site.site_header = "Smart Condominium - Módulo de Seguridad"
 admin.site.site_title = "Seguridad Admin"
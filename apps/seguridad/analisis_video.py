@@ -0,0 +1,218 @@
+"""
+Motor de análisis de video por muestreo de frames.
+
+1. Se decodifica un frame de cada `paso` (con OpenCV si está instalado; si no,
+   con Pillow para formatos multi-frame como GIF/WebP/TIFF animados).
+2. Cada frame muestreado se reduce a escala de grises de baja resolución y se
+   puntúa el movimiento como el % de píxeles que cambiaron respecto del
+   anterior; los segmentos estáticos se descartan sin análisis adicional.
+3. El análisis costoso por frame se reparte por lotes en un
+   ProcessPoolExecutor del tamaño de la máquina (reutilizado entre videos
+   dentro del mismo worker). Videos cortos, con menos de un lote de frames
+   con movimiento, se analizan en el propio proceso.
+
+El resultado incluye frames/segundo para dimensionar hardware por cámara.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageSequence, UnidentifiedImageError
+
+try:
+    import cv2
+except ImportError:  # OpenCV es opcional; sin él solo se leen formatos que Pillow soporta
+    cv2 = None
+
+PASO_FRAMES = 5
+UMBRAL_PIXEL = 15                # diferencia (0-255) para considerar que un píxel cambió
+UMBRAL_MOVIMIENTO = 0.25         # % mínimo de píxeles cambiados para analizar el frame
+TAMANO_MOVIMIENTO = (160, 120)   # resolución para la diferencia de frames
+TAMANO_ANALISIS = (320, 240)     # resolución entregada al análisis por frame
+TAMANO_LOTE = 16                 # frames por tarea del pool de procesos
+
+_pool = None
+
+
+def cpus_disponibles():
+    """CPUs asignadas al proceso (respeta límites de afinidad del contenedor)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _obtener_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=cpus_disponibles())
+    return _pool
+
+
+def _a_ruta(fuente):
+    """Ruta en disco de la fuente (archivo subido, FieldFile o ruta) si existe"""
+    if isinstance(fuente, str):
+        return fuente
+    if hasattr(fuente, 'temporary_file_path'):
+        return fuente.temporary_file_path()
+    try:
+        return fuente.path
+    except (AttributeError, NotImplementedError, ValueError):
+        return None
+
+
+def _frames_opencv(ruta, paso):
+    captura = cv2.VideoCapture(ruta)
+    try:
+        indice = 0
+        while True:
+            # grab() avanza sin decodificar; solo se decodifican los frames muestreados
+            if not captura.grab():
+                break
+            if indice % paso == 0:
+                leido, frame = captura.retrieve()
+                if not leido:
+                    break
+                gris = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                yield indice, cv2.resize(gris, TAMANO_ANALISIS, interpolation=cv2.INTER_AREA)
+            else:
+                yield indice, None
+            indice += 1
+    finally:
+        captura.release()
+
+
+def _frames_pillow(fuente, paso):
+    if hasattr(fuente, 'seek'):
+        fuente.seek(0)
+    try:
+        imagen = Image.open(fuente)
+    except UnidentifiedImageError:
+        raise ValueError(
+            "Formato de video no soportado" + ("" if cv2 is not None else " (OpenCV no está instalado)")
+        )
+    with imagen:
+        for indice, frame in enumerate(ImageSequence.Iterator(imagen)):
+            if indice % paso == 0:
+                gris = frame.convert('L').resize(TAMANO_ANALISIS, Image.Resampling.BILINEAR)
+                yield indice, np.asarray(gris)
+            else:
+                yield indice, None
+
+
+def leer_frames(fuente, paso=PASO_FRAMES):
+    """
+    Genera (indice_frame, matriz uint8 en escala de grises) por cada frame del
+    video; los frames no muestreados (fuera del `paso`) se generan como None
+    sin decodificarlos.
+    """
+    ruta = _a_ruta(fuente)
+    if cv2 is not None and ruta is not None:
+        captura = cv2.VideoCapture(ruta)
+        abierto = captura.isOpened()
+        captura.release()
+        if abierto:
+            return _frames_opencv(ruta, paso)
+    return _frames_pillow(ruta or fuente, paso)
+
+
+def reducir_frame(frame):
+    """Reduce un frame de análisis a TAMANO_MOVIMIENTO promediando bloques de 2x2"""
+    alto, ancho = TAMANO_MOVIMIENTO[1], TAMANO_MOVIMIENTO[0]
+    bloques = frame[:alto * 2, :ancho * 2].reshape(alto, 2, ancho, 2)
+    return bloques.mean(axis=(1, 3), dtype=np.float32)
+
+
+def puntuar_movimiento(anterior, actual):
+    """% de píxeles cuya intensidad cambió más de UMBRAL_PIXEL entre dos frames reducidos"""
+    return float((np.abs(actual - anterior) > UMBRAL_PIXEL).mean() * 100.0)
+
+
+def analizar_frame(frame):
+    """
+    Análisis por frame. Simula un modelo de detección con estadísticas de
+    intensidad y bordes del frame.
+    """
+    frame = frame.astype(np.float32)
+    gradiente_y, gradiente_x = np.gradient(frame)
+    bordes = np.hypot(gradiente_x, gradiente_y)
+    return {
+        'brillo_medio': float(frame.mean()),
+        'contraste': float(frame.std()),
+        'densidad_bordes': float((bordes > 30.0).mean()),
+    }
+
+
+def analizar_lote(frames):
+    """Unidad de trabajo enviada al pool de procesos"""
+    return [analizar_frame(frame) for frame in frames]
+
+
+def analizar_video(fuente, paso=PASO_FRAMES, umbral_movimiento=UMBRAL_MOVIMIENTO, paralelo=True, latido=None):
+    """
+    Muestrea, filtra por movimiento y analiza los frames de un video.
+
+    Los frames se procesan en streaming: solo se retienen los que superan el
+    umbral de movimiento hasta completar un lote, que se envía al pool de
+    procesos mientras se sigue decodificando. Retorna un diccionario con los
+    conteos, las métricas por frame analizado y el rendimiento (frames/segundo).
+    Si se indica, `latido()` se llama por cada frame leído y por cada lote
+    terminado.
+    """
+    paralelo = paralelo and cpus_disponibles() > 1
+    inicio = time.perf_counter()
+    frames_totales = frames_muestreados = 0
+    movimiento_maximo = 0.0
+    anterior = None
+    seleccionados, lote, pendientes = [], [], []
+
+    for indice, frame in leer_frames(fuente, paso):
+        if latido is not None:
+            latido()
+        frames_totales = indice + 1
+        if frame is None:
+            continue
+        frames_muestreados += 1
+
+        reducido = reducir_frame(frame)
+        if anterior is None:
+            movimiento = 100.0  # el primer frame siempre se analiza
+        else:
+            movimiento = puntuar_movimiento(anterior, reducido)
+            movimiento_maximo = max(movimiento_maximo, movimiento)
+        anterior = reducido
+        if movimiento < umbral_movimiento:
+            continue
+
+        seleccionados.append((indice, movimiento))
+        lote.append(frame)
+        if paralelo and len(lote) >= TAMANO_LOTE:
+            pendientes.append(_obtener_pool().submit(analizar_lote, lote))
+            lote = []
+
+    if paralelo and pendientes and lote:
+        pendientes.append(_obtener_pool().submit(analizar_lote, lote))
+        lote = []
+    analisis = []
+    for futuro in pendientes:
+        analisis.extend(futuro.result())
+        if latido is not None:
+            latido()
+    analisis.extend(analizar_lote(lote))
+    segundos = time.perf_counter() - inicio
+
+    return {
+        'frames_totales': frames_totales,
+        'frames_muestreados': frames_muestreados,
+        'frames_analizados': len(analisis),
+        'paso_frames': paso,
+        'puntuacion_movimiento_max': round(movimiento_maximo, 2),
+        'fps_procesamiento': round(frames_totales / segundos, 2) if segundos else None,
+        'fps_muestreados': round(frames_muestreados / segundos, 2) if segundos else None,
+        'segundos_procesamiento': round(segundos, 3),
+        'procesos_analisis': cpus_disponibles() if pendientes else 1,
+        'frames': [
+            {'indice': indice, 'movimiento': round(movimiento, 2), **resultado}
+            for (indice, movimiento), resultado in zip(seleccionados, analisis)
+        ],
+    }
@@ -0,0 +1,605 @@
+"""
+Índice vectorial de codificaciones faciales para reconocimiento de visitantes.
+
+Mantiene una matriz contigua float32 (una fila por visitante) con el mapeo
+fila -> id de RegistroVisitante y responde consultas top-k con un único
+producto matriz-vector de NumPy.
+
+Persistencia en disco (settings.INDICE_FACIAL_DIR):
+    ACTUAL                  -> nombre de la versión vigente
+    <version>/ids.npy       -> ids de visitantes (int64)
+    <version>/vectores.npy  -> matriz (n, 128) float32, se abre con mmap
+    <version>/diario.bin    -> cambios incrementales posteriores a la instantánea
+
+Cada worker abre la instantánea con memory-map y aplica el diario al vuelo,
+por lo que no necesita reconstruir el índice desde la base de datos al iniciar.
+
+Las tareas costosas (compactar el diario y entrenar el IVF de una
+instantánea) solo las ejecuta el comando `reconstruir_indice_facial`; las
+consultas usan búsqueda exacta mientras la instantánea vigente no tenga su
+archivo IVF.
+"""
+import fcntl
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+
+from .similitud_facial import DIMENSION_CODIFICACION, puntuar_matriz, a_porcentaje
+from .indice_ivf import IndiceIVF, listas_por_defecto
+from .vectores import TIPO_VECTOR, desempaquetar_lote
+
+logger = logging.getLogger(__name__)
+
+# Registro del diario: id (int64) + operación (int64) + vector (128 float32)
+OPERACION_ALTA = 1
+OPERACION_BAJA = 0
+TIPO_REGISTRO_DIARIO = np.dtype([
+    ('id', '<i8'),
+    ('operacion', '<i8'),
+    ('vector', '<f4', (DIMENSION_CODIFICACION,)),
+])
+
+# Cantidad de registros en el diario a partir de la cual conviene compactar
+# (reconstruir_indice_facial --compactar)
+LIMITE_DIARIO = 5000
+
+# Parámetros de búsqueda por defecto; se sobrescriben con
+# ConfiguracionIA.parametros_configuracion del algoritmo 'face_recognition'
+CONFIGURACION_BUSQUEDA_POR_DEFECTO = {
+    'modo_busqueda': 'exacto',      # 'exacto' o 'ivf' (aproximado)
+    'metrica': 'coseno',            # 'coseno' o 'l2'
+    'ivf_listas': None,             # None = ~4·sqrt(n)
+    'ivf_sondeos': 16,              # más sondeos = más recall, más latencia
+    'ivf_minimo_rostros': 50000,    # por debajo de este tamaño se usa búsqueda exacta
+}
+SEGUNDOS_CACHE_CONFIGURACION = 60
+
+
+class IndiceFacial:
+    """
+    Índice en memoria de codificaciones faciales.
+
+    Las filas se guardan en una matriz float32 con capacidad sobrante para
+    que las altas sean O(1) amortizadas; las bajas mueven la última fila al
+    hueco liberado.
+    """
+
+    def __init__(self, dimension=DIMENSION_CODIFICACION):
+        self.dimension = dimension
+        self._vectores = np.empty((0, dimension), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._normas2 = np.empty(0, dtype=np.float32)
+        self._filas = {}
+        self._tamano = 0
+
+    @classmethod
+    def desde_arreglos(cls, ids, vectores):
+        """Crea un índice a partir de arreglos existentes (sin copiar si es posible)"""
+        indice = cls(dimension=vectores.shape[1] if vectores.ndim == 2 else DIMENSION_CODIFICACION)
+        indice._ids = ids
+        indice._vectores = vectores
+        indice._normas2 = np.einsum('ij,ij->i', vectores, vectores).astype(np.float32)
+        indice._filas = {int(id_): fila for fila, id_ in enumerate(ids.tolist())}
+        indice._tamano = len(ids)
+        return indice
+
+    def __len__(self):
+        return self._tamano
+
+    def __contains__(self, visitante_id):
+        return int(visitante_id) in self._filas
+
+    @property
+    def ids(self):
+        return self._ids[:self._tamano]
+
+    @property
+    def vectores(self):
+        return self._vectores[:self._tamano]
+
+    def _asegurar_capacidad(self, requerida):
+        """Copia a memoria propia (si venía de mmap) y amplía la capacidad"""
+        escribible = all(
+            arreglo.flags.writeable and arreglo.flags.owndata
+            for arreglo in (self._vectores, self._ids, self._normas2)
+        )
+        if escribible and requerida <= len(self._vectores):
+            return
+        capacidad = max(requerida, int(len(self._vectores) * 1.5) + 16)
+        vectores = np.empty((capacidad, self.dimension), dtype=np.float32)
+        ids = np.empty(capacidad, dtype=np.int64)
+        normas2 = np.empty(capacidad, dtype=np.float32)
+        vectores[:self._tamano] = self._vectores[:self._tamano]
+        ids[:self._tamano] = self._ids[:self._tamano]
+        normas2[:self._tamano] = self._normas2[:self._tamano]
+        self._vectores, self._ids, self._normas2 = vectores, ids, normas2
+
+    def obtener_vector(self, visitante_id):
+        """Retorna la codificación indexada de un visitante o None"""
+        fila = self._filas.get(int(visitante_id))
+        return None if fila is None else self._vectores[fila]
+
+    def agregar(self, visitante_id, vector):
+        """Agrega o reemplaza la codificación facial de un visitante"""
+        visitante_id = int(visitante_id)
+        vector = np.asarray(vector, dtype=np.float32).reshape(self.dimension)
+        fila = self._filas.get(visitante_id)
+        if fila is None:
+            self._asegurar_capacidad(self._tamano + 1)
+            fila = self._tamano
+            self._tamano += 1
+            self._filas[visitante_id] = fila
+        else:
+            self._asegurar_capacidad(self._tamano)
+        self._vectores[fila] = vector
+        self._ids[fila] = visitante_id
+        self._normas2[fila] = float(vector @ vector)
+
+    def eliminar(self, visitante_id):
+        """Elimina a un visitante del índice; retorna False si no existía"""
+        visitante_id = int(visitante_id)
+        fila = self._filas.pop(visitante_id, None)
+        if fila is None:
+            return False
+        self._asegurar_capacidad(self._tamano)
+        ultima = self._tamano - 1
+        if fila != ultima:
+            self._vectores[fila] = self._vectores[ultima]
+            self._ids[fila] = self._ids[ultima]
+            self._normas2[fila] = self._normas2[ultima]
+            self._filas[int(self._ids[fila])] = fila
+        self._tamano = ultima
+        return True
+
+    def puntuar(self, vector, metrica='coseno'):
+        """
+        Calcula la puntuación de la consulta contra todas las filas con un
+        único producto matriz-vector. Para 'coseno' mayor es mejor (similitud
+        en [-1, 1]); para 'l2' menor es mejor (distancia euclidiana).
+        """
+        consulta = np.asarray(vector, dtype=np.float32).reshape(self.dimension)
+        return puntuar_matriz(self.vectores, self._normas2[:self._tamano], consulta, metrica)
+
+    def buscar(self, vector, k=5, metrica='coseno'):
+        """
+        Retorna (ids, puntuaciones) de los k visitantes más cercanos,
+        ordenados del mejor al peor.
+        """
+        if self._tamano == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        puntuaciones = self.puntuar(vector, metrica)
+        orden = -puntuaciones if metrica == 'coseno' else puntuaciones
+        k = min(k, self._tamano)
+        if k < self._tamano:
+            candidatos = np.argpartition(orden, k - 1)[:k]
+        else:
+            candidatos = np.arange(self._tamano)
+        candidatos = candidatos[np.argsort(orden[candidatos], kind='stable')]
+        return self.ids[candidatos].copy(), puntuaciones[candidatos]
+
+    def buscar_similares(self, vector, k=5, metrica='coseno'):
+        """Igual que buscar(), con puntuaciones expresadas como similitud (%)"""
+        ids, puntuaciones = self.buscar(vector, k, metrica)
+        return ids, a_porcentaje(puntuaciones, metrica)
+
+
+class AlmacenIndiceFacial:
+    """
+    Persistencia del índice en disco: instantáneas versionadas abiertas con
+    memory-map y un diario de cambios que todos los workers comparten.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = str(directorio)
+
+    @property
+    def _ruta_actual(self):
+        return os.path.join(self.directorio, 'ACTUAL')
+
+    def _ruta_version(self, version, archivo=''):
+        return os.path.join(self.directorio, version, archivo)
+
+    @contextmanager
+    def bloqueo(self):
+        """Bloqueo exclusivo entre procesos para escrituras y compactación"""
+        os.makedirs(self.directorio, exist_ok=True)
+        with open(os.path.join(self.directorio, 'indice.lock'), 'a') as archivo_lock:
+            fcntl.flock(archivo_lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(archivo_lock, fcntl.LOCK_UN)
+
+    def version_actual(self):
+        try:
+            with open(self._ruta_actual) as archivo:
+                return archivo.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def existe(self):
+        return self.version_actual() is not None
+
+    def guardar(self, indice):
+        """
+        Escribe una nueva instantánea y la publica de forma atómica.
+        Debe llamarse con el bloqueo tomado.
+        """
+        version = f"v{time.time_ns()}"
+        os.makedirs(self._ruta_version(version), exist_ok=True)
+        np.save(self._ruta_version(version, 'ids.npy'), np.ascontiguousarray(indice.ids))
+        np.save(self._ruta_version(version, 'vectores.npy'), np.ascontiguousarray(indice.vectores))
+        open(self._ruta_version(version, 'diario.bin'), 'wb').close()
+
+        anterior = self.version_actual()
+        temporal = f"{self._ruta_actual}.tmp"
+        with open(temporal, 'w') as archivo:
+            archivo.write(version)
+        os.replace(temporal, self._ruta_actual)
+        self._limpiar_versiones(conservar={version, anterior})
+        return version
+
+    def _limpiar_versiones(self, conservar):
+        """
+        Elimina instantáneas antiguas. Se conserva la anterior, que un worker
+        puede estar abriendo tras leer ACTUAL (los que ya la abrieron conservan
+        el mmap).
+        """
+        for nombre in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, nombre)
+            if nombre.startswith('v') and os.path.isdir(ruta) and nombre not in conservar:
+                for archivo in os.listdir(ruta):
+                    os.remove(os.path.join(ruta, archivo))
+                os.rmdir(ruta)
+
+    def ruta_ivf(self, version, n_listas):
+        return self._ruta_version(version, f'ivf_{n_listas}.npz')
+
+    def cargar(self, version):
+        """Abre una instantánea con memory-map (solo lectura)"""
+        ids = np.load(self._ruta_version(version, 'ids.npy'), mmap_mode='r')
+        vectores = np.load(self._ruta_version(version, 'vectores.npy'), mmap_mode='r')
+        return IndiceFacial.desde_arreglos(ids, vectores)
+
+    def registrar_cambio(self, visitante_id, vector=None):
+        """Agrega un alta/baja al diario de la versión vigente"""
+        with self.bloqueo():
+            version = self.version_actual()
+            if version is None:
+                return None
+            self.anexar_cambio(version, visitante_id, vector)
+            return version
+
+    def anexar_cambio(self, version, visitante_id, vector=None):
+        """
+        Escribe un alta (vector) o baja (None) al final del diario de `version`.
+        Debe llamarse con el bloqueo tomado.
+        """
+        registro = np.zeros(1, dtype=TIPO_REGISTRO_DIARIO)
+        registro['id'] = visitante_id
+        if vector is not None:
+            registro['operacion'] = OPERACION_ALTA
+            registro['vector'] = vector
+        else:
+            registro['operacion'] = OPERACION_BAJA
+        with open(self._ruta_version(version, 'diario.bin'), 'ab') as archivo:
+            archivo.write(registro.tobytes())
+            archivo.flush()
+
+    def tamano_diario(self, version):
+        """Bytes de registros completos en el diario de `version` (0 si no existe)"""
+        try:
+            tamano = os.path.getsize(self._ruta_version(version, 'diario.bin'))
+        except FileNotFoundError:
+            return 0
+        return tamano - tamano % TIPO_REGISTRO_DIARIO.itemsize
+
+    def leer_diario(self, version, desde=0):
+        """Retorna (registros, nuevo_desplazamiento) a partir de un desplazamiento en bytes"""
+        ruta = self._ruta_version(version, 'diario.bin')
+        tamano = self.tamano_diario(version)
+        if tamano <= desde:
+            return np.empty(0, dtype=TIPO_REGISTRO_DIARIO), desde
+        with open(ruta, 'rb') as archivo:
+            archivo.seek(desde)
+            datos = archivo.read(tamano - desde)
+        return np.frombuffer(datos, dtype=TIPO_REGISTRO_DIARIO), tamano
+
+
+def aplicar_diario(indice, registros):
+    """Aplica registros del diario sobre un índice en memoria; retorna los ids afectados"""
+    for registro in registros:
+        if registro['operacion'] == OPERACION_ALTA:
+            indice.agregar(registro['id'], registro['vector'])
+        else:
+            indice.eliminar(registro['id'])
+    return {int(visitante_id) for visitante_id in registros['id']}
+
+
+def obtener_almacen():
+    return AlmacenIndiceFacial(settings.INDICE_FACIAL_DIR)
+
+
+def construir_indice_desde_bd():
+    """
+    Construye el índice completo leyendo las codificaciones binarias de
+    RegistroVisitante: los bytes se concatenan y se interpretan como una
+    sola matriz, sin decodificar JSON.
+    """
+    from .models import RegistroVisitante
+
+    ids = []
+    datos = []
+    visitantes = RegistroVisitante.objects.filter(
+        codificacion_facial__isnull=False
+    ).values_list('id', 'codificacion_facial').iterator(chunk_size=5000)
+    tamano_esperado = DIMENSION_CODIFICACION * TIPO_VECTOR.itemsize
+    for visitante_id, codificacion in visitantes:
+        if len(codificacion) == tamano_esperado:
+            ids.append(visitante_id)
+            datos.append(codificacion)
+    vectores = desempaquetar_lote(datos, DIMENSION_CODIFICACION)
+    return IndiceFacial.desde_arreglos(np.asarray(ids, dtype=np.int64), vectores)
+
+
+def reconstruir_indice():
+    """
+    Reconstruye el índice desde la base de datos y publica una nueva instantánea.
+
+    La lectura de la base de datos se hace sin el bloqueo: los cambios
+    confirmados mientras tanto se registran en el diario de la versión
+    vigente, y se vuelven a aplicar (desde el desplazamiento anotado antes de
+    leer) sobre el índice nuevo antes de publicarlo. Si entretanto se publicó
+    otra instantánea, la reconstrucción se repite. Sin versión vigente no hay
+    diario donde registrar esos cambios, así que la lectura se hace con el
+    bloqueo tomado (registrar_visitante espera a la publicación).
+    """
+    almacen = obtener_almacen()
+    while True:
+        with almacen.bloqueo():
+            version = almacen.version_actual()
+            if version is None:
+                indice = construir_indice_desde_bd()
+                nueva_version = almacen.guardar(indice)
+                break
+            desplazamiento = almacen.tamano_diario(version)
+        indice = construir_indice_desde_bd()
+        with almacen.bloqueo():
+            if almacen.version_actual() == version:
+                registros, _ = almacen.leer_diario(version, desplazamiento)
+                aplicar_diario(indice, registros)
+                nueva_version = almacen.guardar(indice)
+                break
+        logger.info("Se publicó otra instantánea del índice facial durante la reconstrucción; se repite")
+    with _estado_proceso.lock:
+        _estado_proceso.invalidar()
+    logger.info(f"Índice facial reconstruido: {len(indice)} visitantes (versión {nueva_version})")
+    return indice
+
+
+class _EstadoProceso:
+    """Índice cargado en el proceso actual (uno por worker)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.configuracion = None
+        self.configuracion_expira = 0.0
+        self.ivf = None
+        self.invalidar()
+
+    def invalidar(self):
+        self.indice = None
+        self.version = None
+        self.desplazamiento = 0
+        # Arreglos de la instantánea (mmap) y ids modificados después de ella
+        self.instantanea = None
+        self.ids_modificados = set()
+        self.aviso_diario = False
+
+
+_estado_proceso = _EstadoProceso()
+
+
+def _sincronizar():
+    """
+    Sincroniza el índice del proceso con la instantánea y el diario en disco.
+    Si no existe instantánea, la construye desde la base de datos.
+    """
+    almacen = obtener_almacen()
+    with _estado_proceso.lock:
+        version = almacen.version_actual()
+        if version is None:
+            with almacen.bloqueo():
+                version = almacen.version_actual()
+                if version is None:
+                    version = almacen.guardar(construir_indice_desde_bd())
+        if version != _estado_proceso.version:
+            _estado_proceso.invalidar()
+            try:
+                indice = almacen.cargar(version)
+            except FileNotFoundError:
+                # Se publicaron dos instantáneas después de leer ACTUAL
+                version = almacen.version_actual()
+                indice = almacen.cargar(version)
+            _estado_proceso.indice = indice
+            _estado_proceso.version = version
+            _estado_proceso.instantanea = (
+                _estado_proceso.indice.ids, _estado_proceso.indice.vectores
+            )
+
+        desplazamiento = _aplicar_diario_pendiente(almacen, version)
+        if (not _estado_proceso.aviso_diario
+                and desplazamiento // TIPO_REGISTRO_DIARIO.itemsize >= LIMITE_DIARIO):
+            _estado_proceso.aviso_diario = True
+            logger.warning(
+                f"El diario del índice facial (versión {version}) supera {LIMITE_DIARIO} cambios; "
+                f"ejecute reconstruir_indice_facial --compactar"
+            )
+        return (
+            _estado_proceso.indice, version, _estado_proceso.instantanea,
+            frozenset(_estado_proceso.ids_modificados)
+        )
+
+
+def _aplicar_diario_pendiente(almacen, version):
+    """
+    Aplica al índice del proceso los registros del diario que todavía no leyó;
+    retorna el desplazamiento alcanzado. Requiere _estado_proceso.lock.
+    """
+    registros, desplazamiento = almacen.leer_diario(version, _estado_proceso.desplazamiento)
+    if len(registros):
+        _estado_proceso.ids_modificados |= aplicar_diario(_estado_proceso.indice, registros)
+        _estado_proceso.desplazamiento = desplazamiento
+    return desplazamiento
+
+
+def obtener_indice():
+    """Retorna el índice exacto del proceso, sincronizado con el disco"""
+    return _sincronizar()[0]
+
+
+def obtener_configuracion_busqueda():
+    """
+    Parámetros de búsqueda del algoritmo 'face_recognition' activo en
+    ConfiguracionIA, cacheados por proceso durante unos segundos.
+    """
+    ahora = time.monotonic()
+    if _estado_proceso.configuracion is not None and ahora < _estado_proceso.configuracion_expira:
+        return _estado_proceso.configuracion
+
+    from .models import ConfiguracionIA
+
+    parametros = ConfiguracionIA.objects.filter(
+        tipo_algoritmo='face_recognition', esta_activo=True
+    ).order_by('-fecha_ultima_actualizacion').values_list(
+        'parametros_configuracion', flat=True
+    ).first() or {}
+    configuracion = dict(CONFIGURACION_BUSQUEDA_POR_DEFECTO)
+    configuracion.update({
+        clave: valor for clave, valor in parametros.items()
+        if clave in CONFIGURACION_BUSQUEDA_POR_DEFECTO
+    })
+    _estado_proceso.configuracion = configuracion
+    _estado_proceso.configuracion_expira = ahora + SEGUNDOS_CACHE_CONFIGURACION
+    return configuracion
+
+
+def _obtener_ivf(version, instantanea, n_listas, construir=False):
+    """
+    Índice IVF de la instantánea vigente, cargado del disco. Si todavía no
+    existe retorna None, salvo con `construir`: entonces se entrena
+    (reutilizando los centroides anteriores cuando es posible) y se publica
+    junto a la instantánea.
+    """
+    ids, vectores = instantanea
+    n_listas = int(n_listas or listas_por_defecto(len(ids)))
+    ivf = _estado_proceso.ivf
+    if ivf is not None and ivf[0] == (version, n_listas):
+        return ivf[1]
+
+    almacen = obtener_almacen()
+    ruta = almacen.ruta_ivf(version, n_listas)
+    try:
+        indice_ivf = IndiceIVF.cargar(ruta, ids, vectores)
+    except (FileNotFoundError, OSError, ValueError):
+        if not construir:
+            return None
+        centroides = None
+        if ivf is not None and ivf[1].n_listas == n_listas:
+            centroides = ivf[1].centroides
+        indice_ivf = IndiceIVF.construir(ids, vectores, n_listas, centroides=centroides)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        try:
+            indice_ivf.guardar(temporal)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el índice IVF {ruta}: {e}")
+    _estado_proceso.ivf = ((version, n_listas), indice_ivf)
+    return indice_ivf
+
+
+def preparar_ivf(configuracion=None):
+    """Construye el IVF de la instantánea vigente si la configuración lo requiere"""
+    configuracion = configuracion or obtener_configuracion_busqueda()
+    if configuracion['modo_busqueda'] != 'ivf':
+        return None
+    _, version, instantanea, _ = _sincronizar()
+    return _obtener_ivf(version, instantanea, configuracion['ivf_listas'], construir=True)
+
+
+def buscar_visitantes(vector, k=5, configuracion=None):
+    """
+    Busca los k visitantes más parecidos y retorna (ids, similitudes %).
+
+    En modo 'ivf' la instantánea se consulta de forma aproximada y los
+    visitantes modificados después de ella (diario) se puntúan de forma exacta,
+    combinando ambos resultados. Mientras la instantánea no tenga su IVF
+    (preparar_ivf) la búsqueda es exacta.
+    """
+    configuracion = configuracion or obtener_configuracion_busqueda()
+    metrica = configuracion['metrica']
+    indice, version, instantanea, ids_modificados = _sincronizar()
+    if configuracion['modo_busqueda'] != 'ivf' or len(indice) < configuracion['ivf_minimo_rostros']:
+        return indice.buscar_similares(vector, k, metrica)
+    indice_ivf = _obtener_ivf(version, instantanea, configuracion['ivf_listas'])
+    if indice_ivf is None:
+        return indice.buscar_similares(vector, k, metrica)
+
+    consulta = np.asarray(vector, dtype=np.float32).reshape(DIMENSION_CODIFICACION)
+    excluir = np.fromiter(ids_modificados, dtype=np.int64, count=len(ids_modificados))
+    ids, puntuaciones = indice_ivf.buscar(
+        consulta, k, configuracion['ivf_sondeos'], metrica, excluir=excluir
+    )
+
+    vigentes = [visitante_id for visitante_id in ids_modificados if visitante_id in indice]
+    if vigentes:
+        vectores = np.stack([indice.obtener_vector(visitante_id) for visitante_id in vigentes])
+        normas2 = np.einsum('ij,ij->i', vectores, vectores)
+        ids = np.concatenate([ids, np.asarray(vigentes, dtype=np.int64)])
+        puntuaciones = np.concatenate([puntuaciones, puntuar_matriz(vectores, normas2, consulta, metrica)])
+        orden = np.argsort(-puntuaciones if metrica == 'coseno' else puntuaciones, kind='stable')[:k]
+        ids, puntuaciones = ids[orden], puntuaciones[orden]
+    return ids, a_porcentaje(puntuaciones, metrica)
+
+
+def compactar_indice():
+    """Vuelca el índice con el diario aplicado a una nueva instantánea"""
+    almacen = obtener_almacen()
+    with almacen.bloqueo():
+        version = almacen.version_actual()
+        if version is None:
+            return
+        indice = almacen.cargar(version)
+        registros, _ = almacen.leer_diario(version)
+        aplicar_diario(indice, registros)
+        almacen.guardar(indice)
+
+
+def registrar_visitante(visitante_id, vector):
+    """
+    Propaga el alta/edición (vector) o baja (None) de la codificación de un
+    visitante al índice compartido. Si todavía no existe instantánea no hace
+    nada: se construirá completa desde la base de datos en la primera consulta
+    (si hay una construcción en curso, se espera a que publique la instantánea).
+    """
+    almacen = obtener_almacen()
+    with _estado_proceso.lock, almacen.bloqueo():
+        version = almacen.version_actual()
+        if version is None:
+            return
+        if version == _estado_proceso.version:
+            # Con el bloqueo tomado nadie más escribe el diario: tras aplicarlo, el
+            # índice del proceso coincide con el compartido y se pueden omitir los
+            # registros redundantes (guardados sin cambio facial)
+            _aplicar_diario_pendiente(almacen, version)
+            actual = _estado_proceso.indice.obtener_vector(visitante_id)
+            if vector is None and actual is None:
+                return
+            if vector is not None and actual is not None and np.array_equal(actual, vector):
+                return
+        almacen.anexar_cambio(version, visitante_id, vector)
@@ -0,0 +1,149 @@
+"""
+Búsqueda aproximada (ANN) de codificaciones faciales con índice invertido IVF.
+
+Los vectores se agrupan con k-means esférico en `n_listas` centroides; cada
+consulta solo puntúa las filas de las `n_sondeos` listas más cercanas. Más
+sondeos = mayor recall y mayor latencia (con n_sondeos == n_listas la
+búsqueda es exacta).
+"""
+import math
+
+import numpy as np
+
+from .similitud_facial import puntuar_matriz
+
+ITERACIONES_KMEANS = 12
+PUNTOS_POR_LISTA_ENTRENAMIENTO = 64
+TAMANO_BLOQUE_ASIGNACION = 65536
+
+
+def listas_por_defecto(total_vectores):
+    """Cantidad de listas sugerida: ~4·sqrt(n), entre 1 y 4096"""
+    return int(min(4096, max(1, 4 * math.sqrt(max(total_vectores, 1)))))
+
+
+def _normalizar(vectores):
+    normas = np.linalg.norm(vectores, axis=1, keepdims=True)
+    return vectores / np.maximum(normas, 1e-12)
+
+
+def _asignar(vectores_normalizados, centroides):
+    """Centroide más cercano (por coseno) de cada fila, procesando por bloques"""
+    asignaciones = np.empty(len(vectores_normalizados), dtype=np.int32)
+    for inicio in range(0, len(vectores_normalizados), TAMANO_BLOQUE_ASIGNACION):
+        bloque = vectores_normalizados[inicio:inicio + TAMANO_BLOQUE_ASIGNACION]
+        asignaciones[inicio:inicio + len(bloque)] = np.argmax(bloque @ centroides.T, axis=1)
+    return asignaciones
+
+
+def entrenar_centroides(vectores, n_listas, iteraciones=ITERACIONES_KMEANS, semilla=0):
+    """K-means esférico sobre una muestra de los vectores"""
+    rng = np.random.default_rng(semilla)
+    n_listas = min(n_listas, len(vectores))
+    tamano_muestra = min(len(vectores), n_listas * PUNTOS_POR_LISTA_ENTRENAMIENTO)
+    muestra = _normalizar(np.asarray(
+        vectores[np.sort(rng.choice(len(vectores), tamano_muestra, replace=False))],
+        dtype=np.float32
+    ))
+    centroides = muestra[rng.choice(len(muestra), n_listas, replace=False)].copy()
+
+    for _ in range(iteraciones):
+        asignaciones = _asignar(muestra, centroides)
+        orden = np.argsort(asignaciones, kind='stable')
+        conteos = np.bincount(asignaciones, minlength=n_listas)
+        no_vacias = np.flatnonzero(conteos)
+        inicios = np.concatenate([[0], np.cumsum(conteos)])[no_vacias]
+        sumas = np.zeros_like(centroides)
+        sumas[no_vacias] = np.add.reduceat(muestra[orden], inicios, axis=0)
+        vacias = conteos == 0
+        if vacias.any():
+            # Reubicar centroides vacíos en puntos aleatorios de la muestra
+            sumas[vacias] = muestra[rng.choice(len(muestra), int(vacias.sum()), replace=False)]
+        centroides = _normalizar(sumas)
+    return centroides.astype(np.float32)
+
+
+class IndiceIVF:
+    """
+    Listas invertidas en formato compacto: `orden` contiene las filas
+    agrupadas por lista y `desplazamientos[l]:desplazamientos[l + 1]` delimita
+    las filas de la lista l.
+    """
+
+    def __init__(self, centroides, orden, desplazamientos, ids, vectores, normas2=None):
+        self.centroides = centroides
+        self.orden = orden
+        self.desplazamientos = desplazamientos
+        self.ids = ids
+        self.vectores = vectores
+        self.normas2 = normas2 if normas2 is not None else np.einsum('ij,ij->i', vectores, vectores)
+
+    @property
+    def n_listas(self):
+        return len(self.centroides)
+
+    @classmethod
+    def construir(cls, ids, vectores, n_listas=None, semilla=0, centroides=None):
+        """Entrena los centroides (si no se proveen) y reparte las filas en listas"""
+        if n_listas is None:
+            n_listas = listas_por_defecto(len(vectores))
+        if len(vectores) == 0:
+            centroides = np.zeros((1, vectores.shape[1]), dtype=np.float32)
+            return cls(centroides, np.empty(0, dtype=np.int64), np.zeros(2, dtype=np.int64), ids, vectores)
+        if centroides is None:
+            centroides = entrenar_centroides(vectores, n_listas, semilla=semilla)
+        asignaciones = _asignar(_normalizar(np.asarray(vectores, dtype=np.float32)), centroides)
+        orden = np.argsort(asignaciones, kind='stable').astype(np.int64)
+        conteos = np.bincount(asignaciones, minlength=len(centroides))
+        desplazamientos = np.concatenate([[0], np.cumsum(conteos)]).astype(np.int64)
+        return cls(centroides, orden, desplazamientos, ids, vectores)
+
+    def guardar(self, ruta):
+        """Guarda centroides y listas (no los vectores, que viven en la instantánea)"""
+        with open(ruta, 'wb') as archivo:
+            np.savez(archivo, centroides=self.centroides, orden=self.orden,
+                     desplazamientos=self.desplazamientos)
+
+    @classmethod
+    def cargar(cls, ruta, ids, vectores):
+        with np.load(ruta) as datos:
+            return cls(datos['centroides'], datos['orden'], datos['desplazamientos'], ids, vectores)
+
+    def buscar(self, consulta, k=5, n_sondeos=8, metrica='coseno', excluir=None):
+        """
+        Retorna (ids, puntuaciones) aproximados de los k mejores, sondeando
+        solo las n_sondeos listas más cercanas. `excluir` es un arreglo de ids
+        que se omiten (p. ej. filas modificadas después de construir el índice).
+        """
+        vacio = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if len(self.orden) == 0 or k <= 0:
+            return vacio
+        consulta = np.asarray(consulta, dtype=np.float32).ravel()
+        n_sondeos = max(1, min(n_sondeos, self.n_listas))
+
+        cercania = self.centroides @ consulta
+        if n_sondeos < self.n_listas:
+            listas = np.argpartition(-cercania, n_sondeos - 1)[:n_sondeos]
+        else:
+            listas = np.arange(self.n_listas)
+        filas = np.concatenate([
+            self.orden[self.desplazamientos[lista]:self.desplazamientos[lista + 1]] for lista in listas
+        ])
+        if excluir is not None and len(excluir) and len(filas):
+            filas = filas[~np.isin(self.ids[filas], excluir)]
+        if len(filas) == 0:
+            return vacio
+
+        puntuaciones = puntuar_matriz(self.vectores[filas], self.normas2[filas], consulta, metrica)
+        orden = -puntuaciones if metrica == 'coseno' else puntuaciones
+        k = min(k, len(filas))
+        mejores = np.argpartition(orden, k - 1)[:k] if k < len(filas) else np.arange(len(filas))
+        mejores = mejores[np.argsort(orden[mejores], kind='stable')]
+        return np.asarray(self.ids[filas[mejores]]), puntuaciones[mejores]
+
+
+def recall_en_k(ids_exactos, ids_aproximados):
+    """Fracción de los k vecinos exactos recuperados por la búsqueda aproximada"""
+    if len(ids_exactos) == 0:
+        return 1.0
+    return len(np.intersect1d(ids_exactos, ids_aproximados)) / len(ids_exactos)
@@ -0,0 +1,239 @@
+"""
+Índice en memoria de placas vehiculares con búsqueda tolerante a errores de OCR.
+
+Cada placa se normaliza (mayúsculas, solo A-Z y 0-9) y se canoniza agrupando
+los caracteres que el OCR confunde con frecuencia (0/O/Q/D, 1/I/L, 8/B, 5/S,
+2/Z, 6/G). La búsqueda resuelve primero por diccionario (placa normalizada o
+canónica); si no hay coincidencia, busca placas a un error de distancia con
+un índice de borrados (cada placa canónica con un carácter eliminado) y, como
+último recurso, genera candidatos con un índice de bigramas. Los candidatos se
+ordenan con una distancia de edición ponderada en la que sustituir caracteres
+confundibles cuesta menos que cualquier otro error.
+
+El índice se carga una vez por worker; las señales de AccesoVehiculo lo
+invalidan en el proceso que hace el cambio y los demás workers detectan los
+cambios comparando periódicamente la huella (cantidad, última actualización)
+de la tabla.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+GRUPOS_CONFUSION = ('0OQD', '1IL', '8B', '5S', '2Z', '6G')
+CANONICO = {
+    caracter: grupo[0] for grupo in GRUPOS_CONFUSION for caracter in grupo
+}
+
+COSTO_CONFUSION = 0.25
+COSTO_EDICION = 1.0
+DISTANCIA_MAXIMA_POR_DEFECTO = 2.0
+CANDIDATOS_A_VERIFICAR = 50
+
+# Segundos entre verificaciones de la huella de la tabla en cada worker
+SEGUNDOS_VERIFICACION = 30
+
+_NO_ALFANUMERICO = re.compile(r'[^A-Z0-9]')
+
+
+class CandidatoPlaca(NamedTuple):
+    vehiculo_id: int
+    placa: str
+    distancia: float
+    confianza: float
+    coincidencia_exacta: bool
+
+
+def normalizar_placa(texto):
+    """'abc-123 ' -> 'ABC123'"""
+    return _NO_ALFANUMERICO.sub('', (texto or '').upper())
+
+
+def canonizar_placa(texto):
+    """Reemplaza cada carácter por el representante de su grupo de confusión"""
+    return ''.join(CANONICO.get(caracter, caracter) for caracter in normalizar_placa(texto))
+
+
+def _borrados(canonica):
+    """La placa con cada uno de sus caracteres eliminado"""
+    return {canonica[:i] + canonica[i + 1:] for i in range(len(canonica))}
+
+
+def _bigramas(canonica):
+    relleno = f'^{canonica}$'
+    return {relleno[i:i + 2] for i in range(len(relleno) - 1)}
+
+
+def distancia_ponderada(placa1, placa2):
+    """
+    Distancia de edición (Levenshtein) entre placas normalizadas donde la
+    sustitución entre caracteres confundibles cuesta COSTO_CONFUSION.
+    """
+    if placa1 == placa2:
+        return 0.0
+    anterior = [float(j) * COSTO_EDICION for j in range(len(placa2) + 1)]
+    for i, caracter1 in enumerate(placa1, 1):
+        actual = [i * COSTO_EDICION]
+        canonico1 = CANONICO.get(caracter1, caracter1)
+        for j, caracter2 in enumerate(placa2, 1):
+            if caracter1 == caracter2:
+                sustitucion = 0.0
+            elif canonico1 == CANONICO.get(caracter2, caracter2):
+                sustitucion = COSTO_CONFUSION
+            else:
+                sustitucion = COSTO_EDICION
+            actual.append(min(
+                anterior[j] + COSTO_EDICION,
+                actual[j - 1] + COSTO_EDICION,
+                anterior[j - 1] + sustitucion,
+            ))
+        anterior = actual
+    return anterior[-1]
+
+
+def confianza_por_distancia(distancia, longitud):
+    """Confianza (%) de una coincidencia según la distancia relativa a la longitud"""
+    if longitud == 0:
+        return 0.0
+    return round(max(0.0, 1.0 - distancia / longitud) * 100.0, 2)
+
+
+class IndicePlacas:
+    """Placas normalizadas -> ids de AccesoVehiculo (una placa puede repetirse por unidad)"""
+
+    def __init__(self, filas=()):
+        self.por_placa = defaultdict(list)
+        self.por_canonica = defaultdict(set)
+        self.por_borrado = defaultdict(set)
+        self.por_bigrama = defaultdict(set)
+        for vehiculo_id, placa in filas:
+            self.agregar(vehiculo_id, placa)
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.por_placa.values())
+
+    def agregar(self, vehiculo_id, placa):
+        placa = normalizar_placa(placa)
+        if not placa:
+            return
+        canonica = canonizar_placa(placa)
+        self.por_placa[placa].append(vehiculo_id)
+        self.por_canonica[canonica].add(placa)
+        for borrado in _borrados(canonica):
+            self.por_borrado[borrado].add(placa)
+        for bigrama in _bigramas(canonica):
+            self.por_bigrama[bigrama].add(placa)
+
+    def _candidatos_un_error(self, canonica):
+        """Placas a una inserción, borrado o sustitución de la forma canónica"""
+        placas = set(self.por_borrado.get(canonica, ()))
+        for borrado in _borrados(canonica):
+            placas.update(self.por_canonica.get(borrado, ()))
+            placas.update(self.por_borrado.get(borrado, ()))
+        return placas
+
+    def _candidatos_difusos(self, canonica, distancia_maxima):
+        bigramas = _bigramas(canonica)
+        coincidencias = Counter()
+        for bigrama in bigramas:
+            coincidencias.update(self.por_bigrama.get(bigrama, ()))
+        # Cada edición elimina como máximo dos bigramas de la consulta
+        minimo = max(1, len(bigramas) - 2 * int(distancia_maxima + 0.999))
+        return [
+            placa for placa, cantidad in coincidencias.most_common(CANDIDATOS_A_VERIFICAR)
+            if cantidad >= minimo and abs(len(placa) - len(canonica)) <= distancia_maxima
+        ]
+
+    def buscar(self, texto, limite=5, distancia_maxima=DISTANCIA_MAXIMA_POR_DEFECTO):
+        """
+        Retorna hasta `limite` CandidatoPlaca ordenados por distancia. Las
+        placas con confusiones típicas de OCR se resuelven sin recorrer el
+        índice de bigramas.
+        """
+        consulta = normalizar_placa(texto)
+        if not consulta:
+            return []
+        canonica = canonizar_placa(consulta)
+
+        placas = self.por_canonica.get(canonica)
+        if not placas and distancia_maxima >= COSTO_EDICION:
+            placas = self._candidatos_un_error(canonica)
+            if not placas and distancia_maxima >= 2 * COSTO_EDICION:
+                placas = self._candidatos_difusos(canonica, distancia_maxima)
+        puntuadas = []
+        for placa in placas:
+            distancia = distancia_ponderada(consulta, placa)
+            if distancia <= distancia_maxima:
+                puntuadas.append((distancia, placa))
+        puntuadas.sort()
+
+        candidatos = []
+        for distancia, placa in puntuadas:
+            confianza = confianza_por_distancia(distancia, max(len(consulta), len(placa)))
+            for vehiculo_id in self.por_placa[placa]:
+                candidatos.append(CandidatoPlaca(vehiculo_id, placa, distancia, confianza, distancia == 0))
+                if len(candidatos) >= limite:
+                    return candidatos
+        return candidatos
+
+
+class _EstadoProceso:
+    """Índice de placas cargado en el proceso actual (uno por worker)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.invalidar()
+
+    def invalidar(self):
+        self.indice = None
+        self.huella = None
+        self.verificar_en = 0.0
+
+
+_estado_proceso = _EstadoProceso()
+
+
+def _huella_tabla():
+    from django.db.models import Count, Max
+    from .models import AccesoVehiculo
+
+    resumen = AccesoVehiculo.objects.aggregate(
+        cantidad=Count('id'), ultima=Max('fecha_actualizacion')
+    )
+    return resumen['cantidad'], resumen['ultima']
+
+
+def construir_indice_placas():
+    """Carga todas las placas registradas con una sola consulta"""
+    from .models import AccesoVehiculo
+
+    return IndicePlacas(AccesoVehiculo.objects.values_list('id', 'placa_vehiculo').iterator())
+
+
+def obtener_indice_placas():
+    """Índice del proceso, reconstruido si fue invalidado o cambió la tabla"""
+    ahora = time.monotonic()
+    with _estado_proceso.lock:
+        if _estado_proceso.indice is not None and ahora < _estado_proceso.verificar_en:
+            return _estado_proceso.indice
+        huella = _huella_tabla()
+        if _estado_proceso.indice is None or huella != _estado_proceso.huella:
+            _estado_proceso.indice = construir_indice_placas()
+            _estado_proceso.huella = huella
+            logger.info(f"Índice de placas cargado: {len(_estado_proceso.indice)} vehículos")
+        _estado_proceso.verificar_en = ahora + SEGUNDOS_VERIFICACION
+        return _estado_proceso.indice
+
+
+def invalidar_indice_placas():
+    with _estado_proceso.lock:
+        _estado_proceso.invalidar()
+
+
+def buscar_placa(texto, limite=5, distancia_maxima=DISTANCIA_MAXIMA_POR_DEFECTO):
+    """Candidatos (ordenados por confianza) para una placa leída por OCR"""
+    return obtener_indice_placas().buscar(texto, limite, distancia_maxima)
@@ -0,0 +1,162 @@
+"""
+Ingesta masiva de eventos de acceso (puertas, tarjetas, biométricos).
+
+Los controladores de acceso envían lotes de eventos como arreglo JSON o como
+NDJSON (un objeto JSON por línea). La validación se hace por columnas sobre el
+lote completo (una sola consulta para los usuarios) y las filas válidas se
+insertan con bulk_create por bloques dentro de una única transacción.
+"""
+import json
+from datetime import datetime
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from apps.autenticacion.models import Usuario
+from .models import RegistroAcceso, separar_codificacion
+from .metricas import incrementar_contador, nombre_contador
+from .resumenes import marcar_dias_pendientes
+from apps.autenticacion.cache_dashboards import invalidar_dashboard
+
+MAXIMO_EVENTOS_POR_LOTE = 50_000
+TAMANO_BLOQUE_INSERCION = 2_000
+
+TIPOS_ACCESO = np.array([valor for valor, _ in RegistroAcceso.TIPOS_ACCESO])
+METODOS_ACCESO = np.array([valor for valor, _ in RegistroAcceso.METODOS_ACCESO])
+LONGITUD_UBICACION = RegistroAcceso._meta.get_field('ubicacion').max_length
+
+
+class NDJSONParser(BaseParser):
+    """Parser para 'application/x-ndjson': un objeto JSON por línea"""
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        eventos = []
+        for numero, linea in enumerate(stream, 1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                eventos.append(json.loads(linea))
+            except ValueError as e:
+                raise ParseError(f"NDJSON inválido en la línea {numero}: {e}")
+        return eventos
+
+
+def _columna(eventos, campo, defecto=''):
+    return [evento.get(campo, defecto) if isinstance(evento, dict) else defecto for evento in eventos]
+
+
+def _parsear_fecha(valor, ahora):
+    if valor in (None, ''):
+        return ahora
+    fecha = datetime.fromisoformat(str(valor).replace('Z', '+00:00'))
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha
+
+
+def validar_eventos(eventos):
+    """
+    Valida el lote por columnas. Retorna una lista con un diccionario de
+    errores por evento (vacío si el evento es válido) y la lista de fechas
+    ya parseadas.
+    """
+    errores = [{} for _ in eventos]
+    if not eventos:
+        return errores, []
+
+    def marcar(invalidos, campo, mensaje):
+        for posicion in np.flatnonzero(invalidos):
+            errores[posicion].setdefault(campo, mensaje)
+
+    marcar([not isinstance(evento, dict) for evento in eventos], 'evento', 'Debe ser un objeto JSON')
+
+    tipos = np.array([str(valor) for valor in _columna(eventos, 'tipo_acceso')])
+    marcar(~np.isin(tipos, TIPOS_ACCESO), 'tipo_acceso', 'Tipo de acceso inválido')
+
+    metodos = np.array([str(valor) for valor in _columna(eventos, 'metodo_acceso')])
+    marcar(~np.isin(metodos, METODOS_ACCESO), 'metodo_acceso', 'Método de acceso inválido')
+
+    ubicaciones = _columna(eventos, 'ubicacion')
+    longitudes = np.array([len(valor) if isinstance(valor, str) else -1 for valor in ubicaciones])
+    marcar((longitudes <= 0) | (longitudes > LONGITUD_UBICACION), 'ubicacion',
+           f"Requerida, máximo {LONGITUD_UBICACION} caracteres")
+
+    marcar([not isinstance(valor, bool) for valor in _columna(eventos, 'exitoso', True)],
+           'exitoso', 'Debe ser booleano')
+    marcar([not isinstance(valor, str) for valor in _columna(eventos, 'observaciones')],
+           'observaciones', 'Debe ser texto')
+    marcar([not isinstance(valor, dict) for valor in _columna(eventos, 'datos_biometricos', {})],
+           'datos_biometricos', 'Debe ser un objeto JSON')
+
+    # Usuarios: un solo SELECT para todos los ids del lote
+    usuarios = np.array([
+        valor if isinstance(valor, int) and not isinstance(valor, bool) else -1
+        for valor in _columna(eventos, 'usuario', None)
+    ], dtype=np.int64)
+    candidatos = np.unique(usuarios[usuarios > 0])
+    existentes = np.fromiter(
+        Usuario.objects.filter(id__in=candidatos.tolist()).values_list('id', flat=True),
+        dtype=np.int64
+    )
+    marcar(~np.isin(usuarios, existentes), 'usuario', 'Usuario inexistente')
+
+    ahora = timezone.now()
+    fechas = []
+    for posicion, valor in enumerate(_columna(eventos, 'fecha_hora', None)):
+        try:
+            fechas.append(_parsear_fecha(valor, ahora))
+        except (TypeError, ValueError):
+            fechas.append(None)
+            errores[posicion].setdefault('fecha_hora', 'Fecha ISO 8601 inválida')
+
+    return errores, fechas
+
+
+def ingerir_eventos(eventos):
+    """
+    Valida e inserta un lote de eventos. Retorna (resultados, insertados) con
+    el estado de cada evento en el orden recibido.
+    """
+    if len(eventos) > MAXIMO_EVENTOS_POR_LOTE:
+        raise ValueError(f"El lote excede el máximo de {MAXIMO_EVENTOS_POR_LOTE} eventos")
+
+    errores, fechas = validar_eventos(eventos)
+    posiciones, registros = [], []
+    for posicion, (evento, errores_evento) in enumerate(zip(eventos, errores)):
+        if errores_evento:
+            continue
+        datos_biometricos, codificacion = separar_codificacion(evento.get('datos_biometricos') or {})
+        registros.append(RegistroAcceso(
+            usuario_id=evento['usuario'],
+            tipo_acceso=evento['tipo_acceso'],
+            metodo_acceso=evento['metodo_acceso'],
+            ubicacion=evento['ubicacion'],
+            fecha_hora=fechas[posicion],
+            exitoso=evento.get('exitoso', True),
+            datos_biometricos=datos_biometricos,
+            codificacion_biometrica=codificacion,
+            observaciones=evento.get('observaciones', ''),
+        ))
+        posiciones.append(posicion)
+
+    with transaction.atomic():
+        RegistroAcceso.objects.bulk_create(registros, batch_size=TAMANO_BLOQUE_INSERCION)
+        # bulk_create no emite post_save: el total se actualiza una vez por lote
+        incrementar_contador(nombre_contador(RegistroAcceso), len(registros))
+        invalidar_dashboard('dashboard_seguridad')
+        # Eventos que llegan tarde a días ya consolidados
+        marcar_dias_pendientes(registro.fecha_hora for registro in registros)
+
+    resultados = [
+        {'indice': posicion, 'estado': 'rechazado', 'errores': errores_evento}
+        for posicion, errores_evento in enumerate(errores)
+    ]
+    for posicion, registro in zip(posiciones, registros):
+        resultados[posicion] = {'indice': posicion, 'estado': 'creado', 'id': registro.id}
+    return resultados, len(registros)
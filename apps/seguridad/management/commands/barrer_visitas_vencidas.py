@@ -0,0 +1,52 @@
+"""
+Marca como vencidas las visitas que excedieron su tiempo máximo y alerta al
+personal de seguridad (ver apps/seguridad/visitas.py).
+
+Uso: cada minuto desde cron con --una-vez, o como proceso en bucle.
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.seguridad.visitas import barrer_visitas_vencidas
+
+
+class Command(BaseCommand):
+    help = 'Marca como vencidas las visitas que excedieron su tiempo máximo y envía alertas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez', action='store_true',
+            help='Ejecuta un barrido y termina (para cron)'
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=60.0,
+            help='Segundos entre barridos en modo bucle'
+        )
+
+    def handle(self, *args, **options):
+        self.detener = False
+        signal.signal(signal.SIGTERM, self.solicitar_detencion)
+        signal.signal(signal.SIGINT, self.solicitar_detencion)
+
+        while not self.detener:
+            inicio = time.monotonic()
+            barrido = barrer_visitas_vencidas()
+            if barrido.visitas_vencidas:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️  {barrido.visitas_vencidas} visita(s) vencida(s), "
+                    f"{barrido.alertas_enviadas} alerta(s) enviada(s) en {barrido.duracion_ms} ms"
+                ))
+            else:
+                self.stdout.write(f"✅ Sin visitas vencidas ({barrido.duracion_ms} ms)")
+
+            if options['una_vez']:
+                break
+            # Espera en tramos cortos para atender SIGTERM sin demora
+            while not self.detener and time.monotonic() - inicio < options['intervalo']:
+                time.sleep(min(1.0, options['intervalo']))
+
+    def solicitar_detencion(self, signum, frame):
+        """Termina después del barrido en curso"""
+        self.detener = True
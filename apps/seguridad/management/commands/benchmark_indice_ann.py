@@ -0,0 +1,75 @@
+"""
+Comando para comparar la búsqueda aproximada (IVF) contra la búsqueda exacta
+"""
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from apps.seguridad.similitud_facial import DIMENSION_CODIFICACION
+from apps.seguridad.indice_facial import IndiceFacial
+from apps.seguridad.indice_ivf import IndiceIVF, listas_por_defecto, recall_en_k
+
+
+class Command(BaseCommand):
+    help = 'Reporta recall@k y latencia del índice facial IVF frente a la búsqueda exacta'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rostros', type=int, nargs='+', default=[100_000, 500_000])
+        parser.add_argument('--listas', type=int, default=None, help='Listas IVF (por defecto ~4·sqrt(n))')
+        parser.add_argument('--sondeos', type=int, nargs='+', default=[1, 4, 16, 64])
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--consultas', type=int, default=50)
+        parser.add_argument('--metrica', choices=['coseno', 'l2'], default='coseno')
+        parser.add_argument('--grupos', type=int, default=2000,
+                            help='Identidades sintéticas (varias codificaciones por persona)')
+        parser.add_argument('--ruido', type=float, default=1.0,
+                            help='Dispersión de las codificaciones de una misma identidad')
+        parser.add_argument('--semilla', type=int, default=0)
+
+    def generar_rostros(self, rng, cantidad, grupos, ruido):
+        """Codificaciones sintéticas agrupadas por identidad, como en datos reales"""
+        centros = rng.standard_normal((grupos, DIMENSION_CODIFICACION), dtype=np.float32)
+        pertenencia = rng.integers(0, grupos, cantidad)
+        dispersion = rng.standard_normal((cantidad, DIMENSION_CODIFICACION), dtype=np.float32) * ruido
+        return centros[pertenencia] + dispersion, centros
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['semilla'])
+        k = options['k']
+        metrica = options['metrica']
+
+        self.stdout.write(f"📊 BENCHMARK ÍNDICE APROXIMADO IVF (recall@{k}, métrica: {metrica})")
+        for cantidad in options['rostros']:
+            vectores, centros = self.generar_rostros(rng, cantidad, options['grupos'], options['ruido'])
+            ids = np.arange(cantidad, dtype=np.int64)
+            sondas = centros[rng.integers(0, len(centros), options['consultas'])] + \
+                rng.standard_normal((options['consultas'], DIMENSION_CODIFICACION), dtype=np.float32) * options['ruido']
+
+            exacto = IndiceFacial.desde_arreglos(ids, vectores)
+            inicio = time.perf_counter()
+            resultados_exactos = [exacto.buscar(sonda, k, metrica)[0] for sonda in sondas]
+            ms_exacto = (time.perf_counter() - inicio) * 1000 / len(sondas)
+
+            n_listas = options['listas'] or listas_por_defecto(cantidad)
+            inicio = time.perf_counter()
+            ivf = IndiceIVF.construir(ids, vectores, n_listas, semilla=options['semilla'])
+            segundos_construccion = time.perf_counter() - inicio
+
+            self.stdout.write("-" * 70)
+            self.stdout.write(
+                f"{cantidad:,} rostros | exacto: {ms_exacto:.2f} ms/consulta | "
+                f"IVF {n_listas} listas construido en {segundos_construccion:.1f}s"
+            )
+            self.stdout.write(f"{'sondeos':>8} | {'recall@k':>9} | {'ms/consulta':>11} | {'aceleración':>11}")
+            for n_sondeos in options['sondeos']:
+                inicio = time.perf_counter()
+                resultados = [ivf.buscar(sonda, k, n_sondeos, metrica)[0] for sonda in sondas]
+                ms_ivf = (time.perf_counter() - inicio) * 1000 / len(sondas)
+                recall = np.mean([
+                    recall_en_k(esperado, obtenido)
+                    for esperado, obtenido in zip(resultados_exactos, resultados)
+                ])
+                self.stdout.write(
+                    f"{n_sondeos:>8} | {recall:>9.3f} | {ms_ivf:>11.2f} | {ms_exacto / ms_ivf:>10.1f}x"
+                )
@@ -0,0 +1,55 @@
+"""
+Comando para medir el rendimiento del motor de similitud facial
+"""
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from apps.seguridad.similitud_facial import DIMENSION_CODIFICACION, comparar_lote
+from apps.seguridad.indice_facial import IndiceFacial
+
+
+class Command(BaseCommand):
+    help = 'Mide el throughput de comparación facial con 10k/100k/1M rostros registrados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanos', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+            help='Cantidades de rostros registrados a evaluar'
+        )
+        parser.add_argument('--consultas', type=int, default=20, help='Consultas por tamaño')
+        parser.add_argument('--metrica', choices=['coseno', 'l2'], default='coseno')
+        parser.add_argument('--semilla', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['semilla'])
+        metrica = options['metrica']
+        consultas = options['consultas']
+
+        self.stdout.write(f"📊 BENCHMARK SIMILITUD FACIAL (métrica: {metrica})")
+        self.stdout.write("-" * 78)
+        self.stdout.write(
+            f"{'rostros':>10} | {'comparar_lote ms':>16} | {'índice ms':>10} | "
+            f"{'consultas/s':>11} | {'comparaciones/s':>15}"
+        )
+
+        for tamano in options['tamanos']:
+            registrados = rng.standard_normal((tamano, DIMENSION_CODIFICACION), dtype=np.float32)
+            sondas = rng.standard_normal((consultas, DIMENSION_CODIFICACION), dtype=np.float32)
+            indice = IndiceFacial.desde_arreglos(np.arange(tamano, dtype=np.int64), registrados)
+
+            inicio = time.perf_counter()
+            for sonda in sondas:
+                comparar_lote(sonda, registrados, metrica)
+            ms_lote = (time.perf_counter() - inicio) * 1000 / consultas
+
+            inicio = time.perf_counter()
+            for sonda in sondas:
+                indice.buscar(sonda, k=5, metrica=metrica)
+            ms_indice = (time.perf_counter() - inicio) * 1000 / consultas
+
+            self.stdout.write(
+                f"{tamano:>10,} | {ms_lote:>16.2f} | {ms_indice:>10.2f} | "
+                f"{1000 / ms_indice:>11.1f} | {tamano * 1000 / ms_indice:>15,.0f}"
+            )
@@ -0,0 +1,44 @@
+"""
+Comando para consolidar los resúmenes diarios de seguridad (ejecutar a diario,
+p. ej. poco después de medianoche)
+"""
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.seguridad.resumenes import consolidar_dias, dias_por_consolidar
+
+
+class Command(BaseCommand):
+    help = 'Consolida los resúmenes diarios de visitantes, accesos e incidentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde', type=date.fromisoformat,
+            help='Reconsolida desde esta fecha (AAAA-MM-DD), aunque ya esté consolidada'
+        )
+        parser.add_argument(
+            '--hasta', type=date.fromisoformat,
+            help='Última fecha a consolidar (por defecto ayer)'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        hasta = options['hasta']
+        if options['desde']:
+            hasta = hasta or options['desde']
+            if hasta < options['desde']:
+                raise CommandError('--hasta debe ser posterior a --desde')
+            dias = [options['desde'] + timedelta(days=n) for n in range((hasta - options['desde']).days + 1)]
+        else:
+            dias = dias_por_consolidar(hasta)
+
+        if not dias:
+            self.stdout.write("No hay días pendientes de consolidar")
+            return
+
+        consolidar_dias(dias)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(dias)} días consolidados ({dias[0]} a {dias[-1]}) en {time.perf_counter() - inicio:.2f}s"
+        ))
@@ -0,0 +1,49 @@
+"""
+Entrenamiento del modelo de morosidad con el historial de pagos
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.seguridad.morosidad import entrenar_modelo, evaluar_predicciones
+
+
+class Command(BaseCommand):
+    help = 'Entrena la regresión logística de morosidad y la guarda en MODELO_MOROSIDAD_RUTA'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses', type=int, default=24,
+            help='Cortes mensuales de historial usados para entrenar'
+        )
+        parser.add_argument(
+            '--validacion', type=float, default=0.25,
+            help='Proporción de cortes más recientes reservada para validar'
+        )
+        parser.add_argument(
+            '--salida', default=None,
+            help='Ruta del archivo .npz (por defecto MODELO_MOROSIDAD_RUTA)'
+        )
+
+    def handle(self, *args, **options):
+        evaluados, precisos = evaluar_predicciones()
+        if evaluados:
+            self.stdout.write(f"📊 Predicciones evaluadas: {evaluados} ({precisos} precisas)")
+
+        try:
+            modelo = entrenar_modelo(options['meses'], options['validacion'])
+        except ValueError as e:
+            raise CommandError(f"❌ {e}")
+
+        ruta = options['salida'] or settings.MODELO_MOROSIDAD_RUTA
+        modelo.guardar(ruta)
+
+        for conjunto in ('entrenamiento', 'validacion'):
+            metricas = modelo.metricas.get(conjunto)
+            if metricas:
+                self.stdout.write(
+                    f"📊 {conjunto}: {metricas['muestras']} muestras, exactitud {metricas['exactitud']}, "
+                    f"log-loss {metricas['log_loss']}, AUC {metricas['auc']}"
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Modelo {modelo.nombre} {modelo.version} guardado en {ruta}"
+        ))
@@ -0,0 +1,64 @@
+"""
+Análisis predictivo de morosidad por lotes para todas las unidades
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.autenticacion.models import Usuario
+from apps.finanzas.models import UnidadHabitacional
+from apps.seguridad.morosidad import analizar_unidades, evaluar_predicciones, modelo_vigente, DIAS_VALIDEZ
+
+
+class Command(BaseCommand):
+    help = 'Puntúa el riesgo de morosidad de las unidades activas y guarda un análisis por unidad'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--unidades', type=int, nargs='+',
+            help='Ids de las unidades a analizar (por defecto todas las activas)'
+        )
+        parser.add_argument(
+            '--generado-por',
+            help='Usuario registrado como autor de los análisis (por defecto el primer superusuario)'
+        )
+        parser.add_argument(
+            '--dias-validez', type=int, default=DIAS_VALIDEZ,
+            help='Días de validez de los análisis'
+        )
+        parser.add_argument(
+            '--forzar-recalculo', action='store_true',
+            help='Crea análisis nuevos aunque haya uno vigente con el mismo historial'
+        )
+
+    def handle(self, *args, **options):
+        if options['generado_por']:
+            usuario = Usuario.objects.filter(username=options['generado_por']).first()
+        else:
+            usuario = Usuario.objects.filter(is_superuser=True, is_active=True).order_by('id').first()
+        if usuario is None:
+            raise CommandError("❌ No se encontró el usuario para registrar los análisis")
+
+        unidades = None
+        if options['unidades']:
+            unidades = UnidadHabitacional.objects.filter(id__in=options['unidades'])
+
+        # Backtesting: completa fue_preciso de las predicciones cuyo horizonte ya terminó
+        evaluados, precisos = evaluar_predicciones()
+        if evaluados:
+            self.stdout.write(f"📊 Predicciones evaluadas: {evaluados} ({precisos} precisas)")
+
+        modelo = modelo_vigente()
+        analisis, reutilizados = analizar_unidades(
+            usuario, unidades, modelo, dias_validez=options['dias_validez'],
+            forzar_recalculo=options['forzar_recalculo']
+        )
+
+        por_nivel = {}
+        for item in analisis:
+            por_nivel[item.nivel_riesgo] = por_nivel.get(item.nivel_riesgo, 0) + 1
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(analisis)} unidades analizadas con {modelo.nombre} {modelo.version}"
+        ))
+        if reutilizados:
+            self.stdout.write(f"📦 {reutilizados} análisis vigentes reutilizados (historial sin cambios)")
+        for nivel, cantidad in sorted(por_nivel.items()):
+            self.stdout.write(f"📊 {nivel}: {cantidad}")
@@ -0,0 +1,88 @@
+"""
+Mantenimiento de las particiones mensuales de registros_accesos
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.seguridad.particiones import (
+    soporta_particiones, esta_particionada, listar_particiones, crear_particion,
+    desprender_particion, meses_a_crear, particiones_vencidas, nombre_particion,
+    retencion_meses_configurada, MESES_FUTUROS, ESQUEMA_ARCHIVO, TABLA
+)
+from apps.seguridad.metricas import recalcular_contadores
+
+
+class Command(BaseCommand):
+    help = 'Crea las particiones mensuales futuras de registros_accesos y desprende las vencidas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses-futuros', type=int, default=MESES_FUTUROS,
+            help='Meses a crear por adelantado además del mes actual'
+        )
+        parser.add_argument(
+            '--retencion-meses', type=int, default=None,
+            help='Meses a conservar en la tabla (por defecto RETENCION_REGISTROS_ACCESOS_MESES)'
+        )
+        parser.add_argument(
+            '--solo-crear', action='store_true',
+            help='Solo crea particiones, sin aplicar la retención'
+        )
+        parser.add_argument(
+            '--eliminar', action='store_true',
+            help=f'Elimina las particiones vencidas en lugar de archivarlas en el esquema {ESQUEMA_ARCHIVO}'
+        )
+        parser.add_argument(
+            '--simular', action='store_true',
+            help='Muestra los cambios sin aplicarlos'
+        )
+
+    def handle(self, *args, **options):
+        if not soporta_particiones(connection):
+            self.stdout.write(self.style.WARNING(
+                "⚠️  El particionamiento de registros_accesos solo está disponible en PostgreSQL"
+            ))
+            return
+
+        with connection.cursor() as cursor:
+            if not esta_particionada(cursor):
+                self.stdout.write(self.style.ERROR(
+                    "❌ registros_accesos no está particionada; ejecute las migraciones pendientes"
+                ))
+                return
+            existentes = set(listar_particiones(cursor))
+
+        hoy = timezone.localdate()
+        simular = options['simular']
+        prefijo = "[simulación] " if simular else ""
+
+        for mes in meses_a_crear(hoy, options['meses_futuros']):
+            nombre = nombre_particion(mes)
+            if nombre in existentes:
+                continue
+            if not simular:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    crear_particion(cursor, mes)
+            self.stdout.write(self.style.SUCCESS(f"✅ {prefijo}Partición {nombre} creada"))
+
+        if options['solo_crear']:
+            return
+
+        retencion = options['retencion_meses'] or retencion_meses_configurada()
+        archivar = not options['eliminar']
+        vencidas = particiones_vencidas(existentes, hoy, retencion)
+        for nombre in vencidas:
+            if not simular:
+                # Una transacción por partición para no retener bloqueos sobre la tabla
+                with transaction.atomic(), connection.cursor() as cursor:
+                    desprender_particion(cursor, nombre, archivar=archivar)
+            destino = f"archivada en {ESQUEMA_ARCHIVO}" if archivar else "eliminada"
+            self.stdout.write(f"📦 {prefijo}Partición {nombre} desprendida y {destino}")
+
+        if vencidas and not simular:
+            # Las filas desprendidas no pasan por señales: el total se recalcula
+            total = recalcular_contadores([TABLA])[TABLA]
+            self.stdout.write(f"📊 Registros de acceso en la tabla: {total}")
+
+        self.stdout.write(f"📊 Retención: {retencion} meses")
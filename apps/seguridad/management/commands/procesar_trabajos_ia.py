@@ -0,0 +1,73 @@
+"""
+Worker que procesa la cola de trabajos de IA (tabla trabajos_ia)
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.seguridad.trabajos import (
+    tomar_trabajo, procesar_trabajo, recuperar_trabajos_abandonados, identificador_worker
+)
+
+
+class Command(BaseCommand):
+    help = 'Procesa los trabajos de IA pendientes (se pueden ejecutar varios workers en paralelo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez', action='store_true',
+            help='Procesa los trabajos pendientes y termina, en lugar de esperar nuevos'
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=2.0,
+            help='Segundos de espera cuando la cola está vacía'
+        )
+        parser.add_argument(
+            '--max-trabajos', type=int, default=None,
+            help='Termina después de procesar esta cantidad de trabajos'
+        )
+
+    def handle(self, *args, **options):
+        self.detener = False
+        signal.signal(signal.SIGTERM, self.solicitar_detencion)
+        signal.signal(signal.SIGINT, self.solicitar_detencion)
+
+        worker = identificador_worker()
+        procesados = 0
+        self.stdout.write(f"🤖 Worker de IA {worker} iniciado")
+
+        while not self.detener:
+            reencolados, fallidos = recuperar_trabajos_abandonados()
+            if reencolados or fallidos:
+                self.stdout.write(
+                    f"⚠️  Trabajos abandonados: {reencolados} reencolados, {fallidos} fallidos"
+                )
+
+            trabajo = tomar_trabajo(worker)
+            if trabajo is None:
+                if options['una_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+
+            inicio = time.perf_counter()
+            procesar_trabajo(trabajo)
+            procesados += 1
+            if trabajo.estado == 'completado':
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ Trabajo {trabajo.id} completado en {time.perf_counter() - inicio:.2f}s"
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f"❌ Trabajo {trabajo.id} {trabajo.estado} (intento {trabajo.intentos}): {trabajo.error}"
+                ))
+
+            if options['max_trabajos'] and procesados >= options['max_trabajos']:
+                break
+
+        self.stdout.write(f"Worker detenido. Trabajos procesados: {procesados}")
+
+    def solicitar_detencion(self, signum, frame):
+        """Termina después del trabajo en curso"""
+        self.detener = True
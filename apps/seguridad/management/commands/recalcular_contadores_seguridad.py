@@ -0,0 +1,20 @@
+"""
+Comando para recalcular los totales de contadores_seguridad
+"""
+from django.core.management.base import BaseCommand
+
+from apps.seguridad.metricas import recalcular_contadores, MODELOS_CONTADOS
+
+
+class Command(BaseCommand):
+    help = 'Recalcula con COUNT(*) los contadores usados por el dashboard de seguridad'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'contadores', nargs='*', choices=sorted(MODELOS_CONTADOS),
+            help='Contadores a recalcular (por defecto todos)'
+        )
+
+    def handle(self, *args, **options):
+        for nombre, valor in recalcular_contadores(options['contadores']).items():
+            self.stdout.write(self.style.SUCCESS(f"✅ {nombre}: {valor}"))
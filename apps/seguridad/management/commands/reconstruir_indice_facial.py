@@ -0,0 +1,37 @@
+"""
+Comando para reconstruir el índice facial desde la base de datos.
+
+Es el único que compacta el diario y entrena el IVF (las consultas no lo
+hacen): programarlo con --compactar (p. ej. cada hora desde cron) cuando se
+usa el modo de búsqueda 'ivf'.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.seguridad.indice_facial import reconstruir_indice, compactar_indice, preparar_ivf
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye (o compacta) el índice vectorial de codificaciones faciales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--compactar', action='store_true',
+            help='Solo aplica el diario de cambios a una nueva instantánea, sin leer la base de datos'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        if options['compactar']:
+            compactar_indice()
+            self.stdout.write(self.style.SUCCESS("✅ Índice facial compactado"))
+        else:
+            indice = reconstruir_indice()
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Índice facial reconstruido con {len(indice)} visitantes"
+            ))
+        indice_ivf = preparar_ivf()
+        if indice_ivf is not None:
+            self.stdout.write(f"Índice aproximado IVF preparado con {indice_ivf.n_listas} listas")
+        self.stdout.write(f"Tiempo: {time.perf_counter() - inicio:.2f}s")
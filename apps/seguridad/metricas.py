@@ -0,0 +1,159 @@
+"""
+Métricas del dashboard de seguridad.
+
+- Los totales por tabla se leen de contadores_seguridad, que las señales
+  mantienen al crear/eliminar filas (la ingesta masiva, que usa bulk_create,
+  actualiza su contador explícitamente).
+- Las métricas por período o estado se calculan con agregación condicional:
+  una consulta por tabla, restringida con WHERE a las filas que participan en
+  alguna métrica (índices/particiones), y todas unidas en un único SELECT.
+
+El dashboard completo se resuelve en una sola consulta, cuyo costo no depende
+del tamaño total de las tablas.
+"""
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.utils import timezone
+
+from .models import (
+    RegistroVisitante, AccesoVehiculo, RegistroAcceso, IncidenteSeguridad,
+    ConfiguracionIA, AnalisisPredictivoMorosidad, ContadorSeguridad
+)
+
+# Contador -> modelo contado (el nombre es la tabla)
+MODELOS_CONTADOS = {
+    modelo._meta.db_table: modelo
+    for modelo in (RegistroVisitante, AccesoVehiculo, RegistroAcceso, IncidenteSeguridad)
+}
+ESTADOS_INCIDENTE_ABIERTO = ['reportado', 'en_investigacion', 'escalado']
+
+
+def nombre_contador(modelo):
+    return modelo._meta.db_table
+
+
+def recalcular_contadores(nombres=None):
+    """Recalcula contadores con COUNT(*) (inicialización o corrección de desvíos)"""
+    valores = {}
+    for nombre in nombres or MODELOS_CONTADOS:
+        valores[nombre] = MODELOS_CONTADOS[nombre].objects.count()
+        ContadorSeguridad.objects.update_or_create(nombre=nombre, defaults={'valor': valores[nombre]})
+    return valores
+
+
+def _aplicar_incremento(nombre, cantidad):
+    actualizados = ContadorSeguridad.objects.filter(nombre=nombre).update(
+        valor=F('valor') + cantidad, fecha_actualizacion=timezone.now()
+    )
+    if not actualizados:
+        recalcular_contadores([nombre])
+
+
+def incrementar_contador(nombre, cantidad=1):
+    """
+    Suma `cantidad` al contador cuando la transacción en curso confirma; así
+    la fila del contador no queda bloqueada durante la transacción y un
+    rollback no altera el total.
+    """
+    transaction.on_commit(lambda: _aplicar_incremento(nombre, cantidad))
+
+
+def _fila(queryset, **agregados):
+    # Agregados sin GROUP BY: siempre exactamente una fila, aunque no haya coincidencias
+    return queryset.order_by().annotate(_fila=Value(1)).values('_fila').annotate(**agregados).values(*agregados)
+
+
+def _consulta_unica(*querysets):
+    """Ejecuta varias consultas de una fila como un único SELECT ... CROSS JOIN"""
+    partes, parametros = [], []
+    for posicion, queryset in enumerate(querysets):
+        sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+        partes.append(f"({sql}) AS m{posicion}")
+        parametros.extend(params)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT * FROM " + " CROSS JOIN ".join(partes), parametros)
+        columnas = [columna[0] for columna in cursor.description]
+        return dict(zip(columnas, cursor.fetchone()))
+
+
+def metricas_dashboard():
+    """Métricas del dashboard de seguridad en una sola consulta"""
+    ahora = timezone.now()
+    inicio_hoy = timezone.localtime(ahora).replace(hour=0, minute=0, second=0, microsecond=0)
+    inicio_manana = inicio_hoy + timedelta(days=1)
+    hace_7_dias = inicio_hoy - timedelta(days=7)
+    hace_30_dias = inicio_hoy - timedelta(days=30)
+    incidente_abierto = Q(estado__in=ESTADOS_INCIDENTE_ABIERTO)
+
+    def contador(modelo):
+        return Sum('valor', filter=Q(nombre=nombre_contador(modelo)), default=0)
+
+    m = _consulta_unica(
+        _fila(
+            ContadorSeguridad.objects.all(),
+            total_visitantes=contador(RegistroVisitante),
+            total_accesos=contador(RegistroAcceso),
+            total_incidentes=contador(IncidenteSeguridad),
+            total_vehiculos=contador(AccesoVehiculo),
+        ),
+        _fila(
+            RegistroVisitante.objects.filter(Q(fecha_creacion__gte=inicio_hoy) | Q(estado='en_visita')),
+            visitantes_hoy=Count('id', filter=Q(fecha_creacion__gte=inicio_hoy)),
+            visitantes_en_complejo=Count('id', filter=Q(estado='en_visita')),
+        ),
+        _fila(
+            RegistroAcceso.objects.filter(fecha_hora__gte=hace_7_dias),
+            accesos_hoy=Count('id', filter=Q(fecha_hora__gte=inicio_hoy, fecha_hora__lt=inicio_manana)),
+            accesos_no_autorizados_7d=Count('id', filter=Q(exitoso=False)),
+        ),
+        _fila(
+            IncidenteSeguridad.objects.filter(incidente_abierto | Q(fecha_incidente__gte=hace_30_dias)),
+            incidentes_abiertos=Count('id', filter=incidente_abierto),
+            incidentes_criticos=Count('id', filter=incidente_abierto & Q(nivel_gravedad='critico')),
+            incidentes_ia_30d=Count('id', filter=Q(fecha_incidente__gte=hace_30_dias) & ~Q(datos_ia_json={})),
+        ),
+        _fila(
+            AccesoVehiculo.objects.filter(estado_acceso='autorizado'),
+            vehiculos_autorizados=Count('id'),
+        ),
+        _fila(
+            AnalisisPredictivoMorosidad.objects.filter(
+                nivel_riesgo__in=['alto', 'muy_alto'], valido_hasta__gte=ahora
+            ),
+            riesgo_alto_morosidad=Count('id'),
+        ),
+        _fila(
+            ConfiguracionIA.objects.filter(esta_activo=True),
+            configuraciones_ia=Count('id'),
+        ),
+    )
+
+    return {
+        'visitantes': {
+            'hoy': m['visitantes_hoy'],
+            'en_complejo': m['visitantes_en_complejo'],
+            'total_registrados': m['total_visitantes'],
+        },
+        'accesos': {
+            'hoy': m['accesos_hoy'],
+            'no_autorizados_7d': m['accesos_no_autorizados_7d'],
+            'total_registros': m['total_accesos'],
+        },
+        'incidentes': {
+            'abiertos': m['incidentes_abiertos'],
+            'criticos': m['incidentes_criticos'],
+            'detectados_ia_30d': m['incidentes_ia_30d'],
+            'total': m['total_incidentes'],
+        },
+        'vehiculos': {
+            'registrados': m['total_vehiculos'],
+            'autorizados': m['vehiculos_autorizados'],
+        },
+        'predicciones': {
+            'riesgo_alto_morosidad': m['riesgo_alto_morosidad'],
+            'configuraciones_ia': m['configuraciones_ia'],
+        },
+        'fecha_actualizacion': ahora.isoformat(),
+    }
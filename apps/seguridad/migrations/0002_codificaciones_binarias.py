@@ -0,0 +1,96 @@
+# Generated by Django 5.0.6 on 2026-10-17 10:08
+
+import numpy as np
+from django.db import migrations, models
+
+TAMANO_LOTE = 1000
+DIMENSION_CODIFICACION = 128
+TIPO_VECTOR = np.dtype('<f4')
+
+
+def separar_codificacion(datos):
+    """
+    Copia de apps.seguridad.models.separar_codificacion al crear esta
+    migración: (datos sin 'face_encoding', bytes float32) o (datos, None) si
+    la codificación no es válida.
+    """
+    if not isinstance(datos, dict) or not datos.get('face_encoding'):
+        return datos, None
+    try:
+        vector = np.asarray(datos['face_encoding'], dtype=np.float32)
+    except (TypeError, ValueError):
+        return datos, None
+    if vector.shape != (DIMENSION_CODIFICACION,) or not np.isfinite(vector).all():
+        return datos, None
+    datos = {clave: valor for clave, valor in datos.items() if clave != 'face_encoding'}
+    return datos, np.ascontiguousarray(vector, dtype=TIPO_VECTOR).tobytes()
+
+
+def _migrar(modelo, campo_json, campo_binario):
+    """Empaqueta 'face_encoding' de campo_json en campo_binario por lotes"""
+    pendientes = []
+    registros = modelo.objects.filter(
+        **{f'{campo_json}__has_key': 'face_encoding'}
+    ).only('id', campo_json).iterator(chunk_size=TAMANO_LOTE)
+    for registro in registros:
+        datos, codificacion = separar_codificacion(getattr(registro, campo_json))
+        if codificacion is None:
+            continue
+        setattr(registro, campo_json, datos)
+        setattr(registro, campo_binario, codificacion)
+        pendientes.append(registro)
+        if len(pendientes) >= TAMANO_LOTE:
+            modelo.objects.bulk_update(pendientes, [campo_json, campo_binario])
+            pendientes = []
+    if pendientes:
+        modelo.objects.bulk_update(pendientes, [campo_json, campo_binario])
+
+
+def _revertir(modelo, campo_json, campo_binario):
+    """Devuelve las codificaciones binarias a listas JSON"""
+    pendientes = []
+    registros = modelo.objects.filter(
+        **{f'{campo_binario}__isnull': False}
+    ).only('id', campo_json, campo_binario).iterator(chunk_size=TAMANO_LOTE)
+    for registro in registros:
+        datos = dict(getattr(registro, campo_json) or {})
+        datos['face_encoding'] = np.frombuffer(getattr(registro, campo_binario), dtype=TIPO_VECTOR).tolist()
+        setattr(registro, campo_json, datos)
+        setattr(registro, campo_binario, None)
+        pendientes.append(registro)
+        if len(pendientes) >= TAMANO_LOTE:
+            modelo.objects.bulk_update(pendientes, [campo_json, campo_binario])
+            pendientes = []
+    if pendientes:
+        modelo.objects.bulk_update(pendientes, [campo_json, campo_binario])
+
+
+def empaquetar_codificaciones(apps, schema_editor):
+    _migrar(apps.get_model('seguridad', 'RegistroVisitante'), 'datos_faciales_json', 'codificacion_facial')
+    _migrar(apps.get_model('seguridad', 'RegistroAcceso'), 'datos_biometricos', 'codificacion_biometrica')
+
+
+def desempaquetar_codificaciones(apps, schema_editor):
+    _revertir(apps.get_model('seguridad', 'RegistroVisitante'), 'datos_faciales_json', 'codificacion_facial')
+    _revertir(apps.get_model('seguridad', 'RegistroAcceso'), 'datos_biometricos', 'codificacion_biometrica')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguridad', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registroacceso',
+            name='codificacion_biometrica',
+            field=models.BinaryField(blank=True, help_text='Codificación biométrica empaquetada (float32)', null=True, verbose_name='Codificación Biométrica'),
+        ),
+        migrations.AddField(
+            model_name='registrovisitante',
+            name='codificacion_facial',
+            field=models.BinaryField(blank=True, help_text='Codificación facial empaquetada (float32)', null=True, verbose_name='Codificación Facial'),
+        ),
+        migrations.RunPython(empaquetar_codificaciones, desempaquetar_codificaciones),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.6 on 2026-10-17 10:16
+
+import apps.seguridad.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguridad', '0002_codificaciones_binarias'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoIA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_trabajo', models.CharField(choices=[('deteccion_anomalias', 'Detección de Anomalías')], max_length=30, verbose_name='Tipo de Trabajo')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completado', 'Completado'), ('fallido', 'Fallido')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('archivo', models.FileField(upload_to=apps.seguridad.models.upload_to_seguridad, verbose_name='Archivo a Procesar')),
+                ('parametros', models.JSONField(blank=True, default=dict, help_text='Parámetros del análisis en formato JSON', verbose_name='Parámetros')),
+                ('resultado', models.JSONField(blank=True, default=dict, help_text='Resultado del análisis en formato JSON', verbose_name='Resultado')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('intentos', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Inicio de Procesamiento')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin de Procesamiento')),
+                ('incidente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trabajos_ia', to='seguridad.incidenteseguridad', verbose_name='Incidente Generado')),
+                ('solicitado_por', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trabajos_ia', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de IA',
+                'verbose_name_plural': 'Trabajos de IA',
+                'db_table': 'trabajos_ia',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='trabajos_ia_estado_5b92d6_idx')],
+            },
+        ),
+    ]
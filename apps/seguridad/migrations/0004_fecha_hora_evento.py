@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-17 10:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguridad', '0003_trabajos_ia'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='registroacceso',
+            name='fecha_hora',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha y Hora'),
+        ),
+    ]
@@ -0,0 +1,134 @@
+"""
+Convierte registros_accesos en una tabla particionada por mes de fecha_hora.
+
+Solo aplica en PostgreSQL; en otros motores (p. ej. SQLite en desarrollo) la
+tabla queda como está. La clave primaria pasa a ser (id, fecha_hora), porque
+PostgreSQL exige que incluya la columna de partición; `id` sigue siendo único
+(lo asigna una secuencia) y el ORM lo sigue usando como pk.
+"""
+from datetime import date, datetime, time
+
+from django.db import migrations
+from django.utils import timezone
+
+# Copia de apps.seguridad.particiones al crear esta migración
+TABLA = 'registros_accesos'
+PARTICION_DEFECTO = f"{TABLA}_defecto"
+SECUENCIA = f"{TABLA}_id_seq"
+MESES_FUTUROS = 3
+
+
+def inicio_mes(fecha):
+    return date(fecha.year, fecha.month, 1)
+
+
+def sumar_meses(mes, cantidad):
+    indice = mes.year * 12 + mes.month - 1 + cantidad
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def crear_particion(cursor, mes):
+    """Partición del mes; la partición por defecto recién creada todavía está vacía"""
+    zona = timezone.get_default_timezone()
+    inicio = datetime.combine(mes, time.min, tzinfo=zona)
+    fin = datetime.combine(sumar_meses(mes, 1), time.min, tzinfo=zona)
+    cursor.execute(
+        f"CREATE TABLE {TABLA}_p{mes:%Y_%m} PARTITION OF {TABLA} "
+        f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fin.isoformat()}')"
+    )
+
+
+def _definiciones(cursor, tabla):
+    """Índices (salvo la clave primaria) y claves foráneas de la tabla, para recrearlos"""
+    cursor.execute(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+        "WHERE indrelid = to_regclass(%s) AND NOT indisprimary",
+        [tabla]
+    )
+    indices = [fila[0].replace(' ON ONLY ', ' ON ') for fila in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [tabla]
+    )
+    foraneas = [
+        f"ALTER TABLE {tabla} ADD CONSTRAINT {nombre} {definicion}"
+        for nombre, definicion in cursor.fetchall()
+    ]
+    return indices + foraneas
+
+
+def particionar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        definiciones = _definiciones(cursor, TABLA)
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {TABLA}")
+        ultimo_id = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {TABLA} RENAME TO {TABLA}_anterior")
+        cursor.execute(f"ALTER TABLE {TABLA}_anterior ALTER COLUMN id DROP IDENTITY IF EXISTS")
+        cursor.execute(
+            f"CREATE TABLE {TABLA} (LIKE {TABLA}_anterior INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE (fecha_hora)"
+        )
+        cursor.execute(f"CREATE SEQUENCE {SECUENCIA} OWNED BY {TABLA}.id")
+        cursor.execute(f"SELECT setval('{SECUENCIA}', {ultimo_id + 1}, false)")
+        cursor.execute(f"ALTER TABLE {TABLA} ALTER COLUMN id SET DEFAULT nextval('{SECUENCIA}')")
+        cursor.execute(f"CREATE TABLE {PARTICION_DEFECTO} PARTITION OF {TABLA} DEFAULT")
+
+        # Un mes por cada mes con datos históricos, más el actual y los próximos
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', fecha_hora AT TIME ZONE %s)::date FROM {TABLA}_anterior",
+            [timezone.get_default_timezone_name()]
+        )
+        meses = {inicio_mes(fila[0]) for fila in cursor.fetchall()}
+        actual = inicio_mes(timezone.localdate())
+        meses.update(sumar_meses(actual, desplazamiento) for desplazamiento in range(MESES_FUTUROS + 1))
+        for mes in sorted(meses):
+            crear_particion(cursor, mes)
+
+        cursor.execute(f"INSERT INTO {TABLA} SELECT * FROM {TABLA}_anterior")
+        cursor.execute(f"DROP TABLE {TABLA}_anterior")
+
+        cursor.execute(f"ALTER TABLE {TABLA} ADD PRIMARY KEY (id, fecha_hora)")
+        for definicion in definiciones:
+            cursor.execute(definicion)
+
+
+def desparticionar(apps, schema_editor):
+    """
+    Vuelve a una tabla simple con las filas de las particiones adjuntas; las
+    particiones ya desprendidas o archivadas no se reincorporan.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        definiciones = _definiciones(cursor, TABLA)
+        cursor.execute(f"ALTER TABLE {TABLA} RENAME TO {TABLA}_anterior")
+        cursor.execute(
+            f"CREATE TABLE {TABLA} (LIKE {TABLA}_anterior INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(f"ALTER TABLE {TABLA} ALTER COLUMN id DROP DEFAULT")
+        cursor.execute(f"INSERT INTO {TABLA} SELECT * FROM {TABLA}_anterior")
+        cursor.execute(f"DROP TABLE {TABLA}_anterior CASCADE")
+
+        cursor.execute(f"ALTER TABLE {TABLA} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{TABLA}', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+            f"FROM {TABLA}"
+        )
+        cursor.execute(f"ALTER TABLE {TABLA} ADD PRIMARY KEY (id)")
+        for definicion in definiciones:
+            cursor.execute(definicion)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguridad', '0004_fecha_hora_evento'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-17 10:27
+
+from django.db import migrations, models
+
+MODELOS_CONTADOS = ['RegistroVisitante', 'AccesoVehiculo', 'RegistroAcceso', 'IncidenteSeguridad']
+
+
+def inicializar_contadores(apps, schema_editor):
+    ContadorSeguridad = apps.get_model('seguridad', 'ContadorSeguridad')
+    for nombre_modelo in MODELOS_CONTADOS:
+        modelo = apps.get_model('seguridad', nombre_modelo)
+        ContadorSeguridad.objects.create(nombre=modelo._meta.db_table, valor=modelo.objects.count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguridad', '0005_particionar_registros_accesos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorSeguridad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True, verbose_name='Nombre')),
+                ('valor', models.BigIntegerField(default=0, verbose_name='Valor')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+            ],
+            options={
+                'verbose_name': 'Contador de Seguridad',
+                'verbose_name_plural': 'Contadores de Seguridad',
+                'db_table': 'contadores_seguridad',
+            },
+        ),
+        migrations.RunPython(inicializar_contadores, migrations.RunPython.noop),
+    ]
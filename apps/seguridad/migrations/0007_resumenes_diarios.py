@@ -0,0 +1,78 @@
+# Generated by Django 5.0.6 on 2026-10-17 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguridad', '0006_contadores_seguridad'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaResumenSeguridad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True, verbose_name='Fecha')),
+                ('consolidado', models.BooleanField(default=False, verbose_name='Consolidado')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+                ('fecha_consolidacion', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Consolidación')),
+            ],
+            options={
+                'verbose_name': 'Día de Resumen de Seguridad',
+                'verbose_name_plural': 'Días de Resumen de Seguridad',
+                'db_table': 'dias_resumen_seguridad',
+                'indexes': [models.Index(fields=['consolidado', 'fecha'], name='dias_resume_consoli_ba3894_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenDiarioAccesos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('tipo_acceso', models.CharField(max_length=20, verbose_name='Tipo de Acceso')),
+                ('metodo_acceso', models.CharField(max_length=20, verbose_name='Método de Acceso')),
+                ('exitoso', models.BooleanField(verbose_name='Acceso Exitoso')),
+                ('cantidad', models.PositiveIntegerField(default=0, verbose_name='Cantidad')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Accesos',
+                'verbose_name_plural': 'Resúmenes Diarios de Accesos',
+                'db_table': 'resumenes_diarios_accesos',
+                'unique_together': {('fecha', 'tipo_acceso', 'metodo_acceso', 'exitoso')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenDiarioIncidentes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('tipo_incidente', models.CharField(max_length=30, verbose_name='Tipo de Incidente')),
+                ('nivel_gravedad', models.CharField(max_length=10, verbose_name='Nivel de Gravedad')),
+                ('detectado_ia', models.BooleanField(verbose_name='Detectado por IA')),
+                ('cantidad', models.PositiveIntegerField(default=0, verbose_name='Cantidad')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Incidentes',
+                'verbose_name_plural': 'Resúmenes Diarios de Incidentes',
+                'db_table': 'resumenes_diarios_incidentes',
+                'unique_together': {('fecha', 'tipo_incidente', 'nivel_gravedad', 'detectado_ia')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenDiarioVisitantes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('estado', models.CharField(max_length=20, verbose_name='Estado')),
+                ('cantidad', models.PositiveIntegerField(default=0, verbose_name='Cantidad')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Visitantes',
+                'verbose_name_plural': 'Resúmenes Diarios de Visitantes',
+                'db_table': 'resumenes_diarios_visitantes',
+                'unique_together': {('fecha', 'estado')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-17 10:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0001_initial'),
+        ('seguridad', '0007_resumenes_diarios'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analisispredictivomorosidad',
+            name='huella_entrada',
+            field=models.CharField(blank=True, default='', help_text='SHA-256 del historial de pagos y multas usado como entrada', max_length=64, verbose_name='Huella de Entrada'),
+        ),
+        migrations.AddIndex(
+            model_name='analisispredictivomorosidad',
+            index=models.Index(fields=['unidad', 'version_modelo', 'huella_entrada'], name='analisis_pr_unidad__cf7254_idx'),
+        ),
+    ]
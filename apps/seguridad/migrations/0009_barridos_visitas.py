@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-17 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguridad', '0008_huella_analisis_morosidad'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BarridoVisitas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_ejecucion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Ejecución')),
+                ('visitas_vencidas', models.PositiveIntegerField(default=0, verbose_name='Visitas Vencidas')),
+                ('alertas_enviadas', models.PositiveIntegerField(default=0, verbose_name='Alertas Enviadas')),
+                ('duracion_ms', models.PositiveIntegerField(default=0, verbose_name='Duración (ms)')),
+            ],
+            options={
+                'verbose_name': 'Barrido de Visitas',
+                'verbose_name_plural': 'Barridos de Visitas',
+                'db_table': 'barridos_visitas',
+                'ordering': ['-fecha_ejecucion'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 11:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguridad', '0009_barridos_visitas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajoia',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
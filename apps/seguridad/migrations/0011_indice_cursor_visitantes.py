@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-17 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seguridad', '0010_trabajos_ia_fecha_actualizacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registrovisitante',
+            index=models.Index(fields=['-fecha_creacion', '-id'], name='registros_v_fecha_c_e81b6f_idx'),
+        ),
+    ]
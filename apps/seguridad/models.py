@@ -1,16 +1,65 @@
 from django.db import models
+from django.utils import timezone
 from django.core.validators import RegexValidator, FileExtensionValidator
 from apps.autenticacion.models import Usuario
 from apps.finanzas.models import UnidadHabitacional
 from decimal import Decimal
+import copy
 import uuid
 import os
 
+from .similitud_facial import extraer_codificacion
+from .vectores import empaquetar_vector, desempaquetar_vector
+
 def upload_to_seguridad(instance, filename):
     ext = filename.split('.')[-1]
     filename = f"{uuid.uuid4()}.{ext}"
     return os.path.join('seguridad', instance.__class__.__name__.lower(), filename)
 
+def separar_codificacion(datos):
+    """
+    Extrae 'face_encoding' de un JSON de datos faciales/biométricos.
+    Retorna (datos_sin_codificacion, bytes_empaquetados); si la codificación
+    no es válida, los datos se devuelven sin cambios y los bytes como None.
+    """
+    vector = extraer_codificacion(datos)
+    if vector is None:
+        return datos, None
+    datos = {clave: valor for clave, valor in datos.items() if clave != 'face_encoding'}
+    return datos, empaquetar_vector(vector)
+
+class CodificacionEmpaquetadaMixin:
+    """
+    Al guardar, mueve 'face_encoding' de `campo_datos` (JSON) a
+    `campo_codificacion` (bytes). Si `campo_datos` cambió respecto de lo
+    leído o guardado y ya no trae codificación, la codificación guardada se
+    elimina: borrar los datos faciales también quita el vector del índice.
+    """
+    campo_datos = None
+    campo_codificacion = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        if cls.campo_datos in instancia.__dict__:
+            instancia._datos_guardados = copy.deepcopy(instancia.__dict__[cls.campo_datos])
+        return instancia
+    
+    def save(self, *args, **kwargs):
+        campos = kwargs.get('update_fields')
+        if campos is not None and self.campo_datos not in campos:
+            return super().save(*args, **kwargs)
+        datos, codificacion = separar_codificacion(getattr(self, self.campo_datos))
+        setattr(self, self.campo_datos, datos)
+        # Sin lectura previa (instancia nueva o campo diferido) no hay cambio que detectar
+        eliminada = codificacion is None and datos != getattr(self, '_datos_guardados', datos)
+        if codificacion is not None or eliminada:
+            setattr(self, self.campo_codificacion, codificacion)
+            if campos is not None and self.campo_codificacion not in campos:
+                kwargs['update_fields'] = [*campos, self.campo_codificacion]
+        super().save(*args, **kwargs)
+        self._datos_guardados = copy.deepcopy(datos)
+
 class TipoVisitante(models.Model):
     nombre = models.CharField(max_length=50, unique=True, verbose_name="Nombre")
     descripcion = models.TextField(blank=True, verbose_name="Descripción")
@@ -44,7 +93,7 @@ class TipoVisitante(models.Model):
     def __str__(self):
         return self.nombre
 
-class RegistroVisitante(models.Model):
+class RegistroVisitante(CodificacionEmpaquetadaMixin, models.Model):
     ESTADOS_VISITA = (
         ('pendiente', 'Pendiente de Autorización'),
         ('autorizado', 'Autorizado'),
@@ -133,6 +182,15 @@ class RegistroVisitante(models.Model):
         help_text="Datos de reconocimiento facial en formato JSON",
         verbose_name="Datos Faciales"
     )
+    codificacion_facial = models.BinaryField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Codificación facial empaquetada (float32)",
+        verbose_name="Codificación Facial"
+    )
+    campo_datos = 'datos_faciales_json'
+    campo_codificacion = 'codificacion_facial'
     confianza_reconocimiento = models.DecimalField(
         max_digits=5,
         decimal_places=2,
@@ -174,6 +232,8 @@ class RegistroVisitante(models.Model):
             models.Index(fields=['estado']),
             models.Index(fields=['fecha_ingreso']),
             models.Index(fields=['documento_identidad']),
+            # Orden de la paginación por cursor
+            models.Index(fields=['-fecha_creacion', '-id']),
         ]
     
     def save(self, *args, **kwargs):
@@ -187,6 +247,15 @@ class RegistroVisitante(models.Model):
     @property
     def nombre_completo(self):
         return f"{self.nombres} {self.apellidos}"
+    
+    @property
+    def vector_facial(self):
+        """Codificación facial como vista NumPy float32 (sin copia)"""
+        return desempaquetar_vector(self.codificacion_facial)
+    
+    @vector_facial.setter
+    def vector_facial(self, vector):
+        self.codificacion_facial = empaquetar_vector(vector)
 
 class AccesoVehiculo(models.Model):
     TIPOS_VEHICULO = (
@@ -294,7 +363,7 @@ class AccesoVehiculo(models.Model):
     def __str__(self):
         return f"{self.placa_vehiculo} - {self.marca} {self.modelo}"
 
-class RegistroAcceso(models.Model):
+class RegistroAcceso(CodificacionEmpaquetadaMixin, models.Model):
     TIPOS_ACCESO = (
         ('entrada', 'Entrada'),
         ('salida', 'Salida'),
@@ -330,7 +399,8 @@ class RegistroAcceso(models.Model):
         help_text="Ubicación específica del acceso",
         verbose_name="Ubicación"
     )
-    fecha_hora = models.DateTimeField(auto_now_add=True, verbose_name="Fecha y Hora")
+    # Por defecto la hora de registro; la ingesta masiva conserva la hora del evento
+    fecha_hora = models.DateTimeField(default=timezone.now, verbose_name="Fecha y Hora")
     
     exitoso = models.BooleanField(default=True, verbose_name="Acceso Exitoso")
     
@@ -339,6 +409,15 @@ class RegistroAcceso(models.Model):
         blank=True,
         verbose_name="Datos Biométricos"
     )
+    codificacion_biometrica = models.BinaryField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Codificación biométrica empaquetada (float32)",
+        verbose_name="Codificación Biométrica"
+    )
+    campo_datos = 'datos_biometricos'
+    campo_codificacion = 'codificacion_biometrica'
     
     foto_acceso = models.ImageField(
         upload_to=upload_to_seguridad,
@@ -363,6 +442,15 @@ class RegistroAcceso(models.Model):
     
     def __str__(self):
         return f"{self.usuario.get_full_name()} - {self.tipo_acceso} - {self.fecha_hora.strftime('%d/%m/%Y %H:%M')}"
+    
+    @property
+    def vector_biometrico(self):
+        """Codificación biométrica como vista NumPy float32 (sin copia)"""
+        return desempaquetar_vector(self.codificacion_biometrica)
+    
+    @vector_biometrico.setter
+    def vector_biometrico(self, vector):
+        self.codificacion_biometrica = empaquetar_vector(vector)
 
 class IncidenteSeguridad(models.Model):
     TIPOS_INCIDENTE = (
@@ -647,6 +735,13 @@ class AnalisisPredictivoMorosidad(models.Model):
         help_text="Si la predicción fue precisa (se evalúa posteriormente)",
         verbose_name="Fue Preciso"
     )
+    huella_entrada = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text="SHA-256 del historial de pagos y multas usado como entrada",
+        verbose_name="Huella de Entrada"
+    )
     
     generado_por = models.ForeignKey(
         Usuario,
@@ -663,7 +758,195 @@ class AnalisisPredictivoMorosidad(models.Model):
         indexes = [
             models.Index(fields=['nivel_riesgo']),
             models.Index(fields=['fecha_analisis']),
+            models.Index(fields=['unidad', 'version_modelo', 'huella_entrada']),
         ]
     
     def __str__(self):
-        return f"Análisis {self.unidad} - Riesgo: {self.get_nivel_riesgo_display()}"
\ No newline at end of file
+        return f"Análisis {self.unidad} - Riesgo: {self.get_nivel_riesgo_display()}"
+
+class TrabajoIA(models.Model):
+    """Trabajo de IA encolado en la base de datos y procesado por un worker aparte"""
+    
+    TIPOS_TRABAJO = (
+        ('deteccion_anomalias', 'Detección de Anomalías'),
+    )
+    
+    ESTADOS_TRABAJO = (
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completado', 'Completado'),
+        ('fallido', 'Fallido'),
+    )
+    
+    tipo_trabajo = models.CharField(
+        max_length=30,
+        choices=TIPOS_TRABAJO,
+        verbose_name="Tipo de Trabajo"
+    )
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADOS_TRABAJO,
+        default='pendiente',
+        verbose_name="Estado"
+    )
+    archivo = models.FileField(
+        upload_to=upload_to_seguridad,
+        verbose_name="Archivo a Procesar"
+    )
+    parametros = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Parámetros del análisis en formato JSON",
+        verbose_name="Parámetros"
+    )
+    resultado = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Resultado del análisis en formato JSON",
+        verbose_name="Resultado"
+    )
+    error = models.TextField(blank=True, verbose_name="Error")
+    intentos = models.PositiveIntegerField(default=0, verbose_name="Intentos")
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    
+    incidente = models.ForeignKey(
+        IncidenteSeguridad,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='trabajos_ia',
+        verbose_name="Incidente Generado"
+    )
+    solicitado_por = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        related_name='trabajos_ia',
+        verbose_name="Solicitado por"
+    )
+    
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True, verbose_name="Inicio de Procesamiento")
+    fecha_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fin de Procesamiento")
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Trabajo de IA"
+        verbose_name_plural = "Trabajos de IA"
+        db_table = "trabajos_ia"
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_tipo_trabajo_display()} #{self.id} - {self.get_estado_display()}"
+
+class ContadorSeguridad(models.Model):
+    """
+    Totales por tabla mantenidos por señales (ver metricas.py), para que el
+    dashboard no ejecute COUNT(*) sobre tablas grandes
+    """
+    
+    nombre = models.CharField(max_length=50, unique=True, verbose_name="Nombre")
+    valor = models.BigIntegerField(default=0, verbose_name="Valor")
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Última Actualización")
+    
+    class Meta:
+        verbose_name = "Contador de Seguridad"
+        verbose_name_plural = "Contadores de Seguridad"
+        db_table = "contadores_seguridad"
+    
+    def __str__(self):
+        return f"{self.nombre}: {self.valor}"
+
+class DiaResumenSeguridad(models.Model):
+    """
+    Control de los resúmenes diarios: un día consolidado tiene sus filas en
+    las tablas resumenes_diarios_*; al modificarse datos de un día pasado
+    vuelve a quedar pendiente hasta la siguiente consolidación
+    """
+    
+    fecha = models.DateField(unique=True, verbose_name="Fecha")
+    consolidado = models.BooleanField(default=False, verbose_name="Consolidado")
+    fecha_modificacion = models.DateTimeField(auto_now=True, verbose_name="Última Modificación")
+    fecha_consolidacion = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Consolidación")
+    
+    class Meta:
+        verbose_name = "Día de Resumen de Seguridad"
+        verbose_name_plural = "Días de Resumen de Seguridad"
+        db_table = "dias_resumen_seguridad"
+        indexes = [
+            models.Index(fields=['consolidado', 'fecha']),
+        ]
+    
+    def __str__(self):
+        return f"{self.fecha} - {'Consolidado' if self.consolidado else 'Pendiente'}"
+
+class ResumenDiarioVisitantes(models.Model):
+    """Visitantes registrados por día y estado"""
+    
+    fecha = models.DateField(verbose_name="Fecha")
+    estado = models.CharField(max_length=20, verbose_name="Estado")
+    cantidad = models.PositiveIntegerField(default=0, verbose_name="Cantidad")
+    
+    class Meta:
+        verbose_name = "Resumen Diario de Visitantes"
+        verbose_name_plural = "Resúmenes Diarios de Visitantes"
+        db_table = "resumenes_diarios_visitantes"
+        unique_together = ['fecha', 'estado']
+    
+    def __str__(self):
+        return f"{self.fecha} {self.estado}: {self.cantidad}"
+
+class ResumenDiarioAccesos(models.Model):
+    """Accesos por día, tipo, método y resultado"""
+    
+    fecha = models.DateField(verbose_name="Fecha")
+    tipo_acceso = models.CharField(max_length=20, verbose_name="Tipo de Acceso")
+    metodo_acceso = models.CharField(max_length=20, verbose_name="Método de Acceso")
+    exitoso = models.BooleanField(verbose_name="Acceso Exitoso")
+    cantidad = models.PositiveIntegerField(default=0, verbose_name="Cantidad")
+    
+    class Meta:
+        verbose_name = "Resumen Diario de Accesos"
+        verbose_name_plural = "Resúmenes Diarios de Accesos"
+        db_table = "resumenes_diarios_accesos"
+        unique_together = ['fecha', 'tipo_acceso', 'metodo_acceso', 'exitoso']
+    
+    def __str__(self):
+        return f"{self.fecha} {self.tipo_acceso}/{self.metodo_acceso}: {self.cantidad}"
+
+class ResumenDiarioIncidentes(models.Model):
+    """Incidentes por día, tipo, gravedad y origen (IA o manual)"""
+    
+    fecha = models.DateField(verbose_name="Fecha")
+    tipo_incidente = models.CharField(max_length=30, verbose_name="Tipo de Incidente")
+    nivel_gravedad = models.CharField(max_length=10, verbose_name="Nivel de Gravedad")
+    detectado_ia = models.BooleanField(verbose_name="Detectado por IA")
+    cantidad = models.PositiveIntegerField(default=0, verbose_name="Cantidad")
+    
+    class Meta:
+        verbose_name = "Resumen Diario de Incidentes"
+        verbose_name_plural = "Resúmenes Diarios de Incidentes"
+        db_table = "resumenes_diarios_incidentes"
+        unique_together = ['fecha', 'tipo_incidente', 'nivel_gravedad', 'detectado_ia']
+    
+    def __str__(self):
+        return f"{self.fecha} {self.tipo_incidente}/{self.nivel_gravedad}: {self.cantidad}"
+
+class BarridoVisitas(models.Model):
+    """Ejecución del barrido que marca como vencidas las visitas excedidas (ver visitas.py)"""
+    
+    fecha_ejecucion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Ejecución")
+    visitas_vencidas = models.PositiveIntegerField(default=0, verbose_name="Visitas Vencidas")
+    alertas_enviadas = models.PositiveIntegerField(default=0, verbose_name="Alertas Enviadas")
+    duracion_ms = models.PositiveIntegerField(default=0, verbose_name="Duración (ms)")
+    
+    class Meta:
+        verbose_name = "Barrido de Visitas"
+        verbose_name_plural = "Barridos de Visitas"
+        db_table = "barridos_visitas"
+        ordering = ['-fecha_ejecucion']
+    
+    def __str__(self):
+        return f"Barrido {self.fecha_ejecucion:%Y-%m-%d %H:%M}: {self.visitas_vencidas} vencidas"
@@ -0,0 +1,627 @@
+"""
+Análisis predictivo de morosidad por lotes.
+
+El historial de pagos (los últimos VENTANA_PAGOS exigibles de cada unidad) se
+obtiene en una sola consulta con ROW_NUMBER() por unidad; las características
+se calculan por columnas con NumPy (np.bincount agrupa por unidad) y todas las
+unidades se puntúan en una sola operación matricial. Los análisis se insertan
+con bulk_create.
+
+Las características se calculan "a una fecha de corte" con lo que se sabía ese
+día (fecha de pago, abonos de historial_pagos, multas), de modo que el
+entrenamiento sobre cortes pasados y la puntuación actual usan el mismo código.
+Columnas de la matriz, en el orden de CARACTERISTICAS:
+- tasa_a_tiempo: fracción de pagos pagados a tiempo (1.0 sin historial)
+- retraso_promedio: días de retraso promedio; un pago impago al corte
+  acumula los días transcurridos desde su vencimiento
+- saldo_pendiente: log(1 + saldo impago al corte)
+- tendencia: pendiente del retraso respecto de la antigüedad del pago
+  (días por pago; positiva si los retrasos recientes son mayores)
+- pago_en_cuotas: fracción de pagos abonados en más de una transacción
+- multas_12m: multas de la unidad en los 365 días previos al corte
+
+Modelo: regresión logística entrenada por el comando
+`entrenar_modelo_morosidad` y guardada en settings.MODELO_MOROSIDAD_RUTA
+(.npz). Cada worker la carga una vez y la recarga si el archivo cambia; sin
+archivo se usa MODELO_HEURISTICO. La variable objetivo es que la unidad deje
+un pago impago más de DIAS_GRACIA días tras su vencimiento en los
+HORIZONTE_DIAS posteriores al corte; evaluar_predicciones() compara esa misma
+variable con las predicciones ya vencidas y completa fue_preciso.
+
+Cada análisis guarda la huella (SHA-256) de sus entradas: la fila de
+características y los factores calculados al corte, de modo que un pago que
+sigue impago (su retraso crece con el corte) cambia la huella. Mientras siga vigente
+(valido_hasta), un nuevo análisis con el mismo modelo, versión y huella
+reutiliza el existente en lugar de puntuar e insertar otra fila.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value, Window
+from django.db.models.functions import Coalesce, RowNumber, TruncDate
+from django.utils import timezone
+
+from apps.finanzas.models import Pago, HistorialPago, Multa, UnidadHabitacional
+from apps.autenticacion.cache_dashboards import invalidar_dashboard
+from .models import AnalisisPredictivoMorosidad
+from .resumenes import inicio_dia
+
+logger = logging.getLogger(__name__)
+
+VENTANA_PAGOS = 12
+DIAS_VALIDEZ = 30
+HORIZONTE_DIAS = 90
+DIAS_GRACIA = 15
+DIAS_MULTAS = 365
+UMBRAL_MOROSIDAD = 0.5
+TAMANO_BLOQUE_INSERCION = 1_000
+# Redondeo de los valores antes de calcular la huella (ruido de coma flotante)
+DECIMALES_HUELLA = 9
+
+CARACTERISTICAS = (
+    'tasa_a_tiempo', 'retraso_promedio', 'saldo_pendiente', 'tendencia', 'pago_en_cuotas', 'multas_12m'
+)
+
+# Límites inferiores de probabilidad (%) de cada nivel de riesgo
+UMBRALES_RIESGO = np.array([20, 40, 60, 80])
+NIVELES_RIESGO = np.array(['muy_bajo', 'bajo', 'medio', 'alto', 'muy_alto'])
+
+
+class ModeloMorosidad:
+    """Regresión logística sobre las características estandarizadas"""
+
+    def __init__(self, nombre, version, coeficientes, intercepto, media=None, escala=None, metricas=None):
+        self.nombre = nombre
+        self.version = version
+        self.coeficientes = np.asarray(coeficientes, dtype=np.float64)
+        self.intercepto = float(intercepto)
+        self.media = np.zeros(len(CARACTERISTICAS)) if media is None else np.asarray(media, dtype=np.float64)
+        self.escala = np.ones(len(CARACTERISTICAS)) if escala is None else np.asarray(escala, dtype=np.float64)
+        self.metricas = metricas or {}
+
+    def probabilidades(self, matriz):
+        """Probabilidad de morosidad (0-1) de cada fila de `matriz`"""
+        z = ((matriz - self.media) / self.escala) @ self.coeficientes + self.intercepto
+        return 1.0 / (1.0 + np.exp(-np.clip(z, -50, 50)))
+
+    def guardar(self, ruta):
+        """Escribe el modelo en `ruta` (.npz) reemplazando el anterior de forma atómica"""
+        directorio = os.path.dirname(ruta) or '.'
+        os.makedirs(directorio, exist_ok=True)
+        metadatos = {
+            'nombre': self.nombre, 'version': self.version,
+            'caracteristicas': list(CARACTERISTICAS), 'metricas': self.metricas,
+        }
+        descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.npz')
+        try:
+            with os.fdopen(descriptor, 'wb') as archivo:
+                np.savez(
+                    archivo, coeficientes=self.coeficientes, intercepto=np.array([self.intercepto]),
+                    media=self.media, escala=self.escala, metadatos=np.array(json.dumps(metadatos))
+                )
+            os.replace(temporal, ruta)
+        except BaseException:
+            os.unlink(temporal)
+            raise
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta) as datos:
+            metadatos = json.loads(str(datos['metadatos']))
+            if tuple(metadatos['caracteristicas']) != CARACTERISTICAS:
+                raise ValueError(f"El modelo {ruta} usa otras características: {metadatos['caracteristicas']}")
+            return cls(
+                metadatos['nombre'], metadatos['version'], datos['coeficientes'], datos['intercepto'][0],
+                datos['media'], datos['escala'], metadatos['metricas']
+            )
+
+
+# Coeficientes fijos sobre las características sin estandarizar (sin modelo entrenado)
+MODELO_HEURISTICO = ModeloMorosidad(
+    'morosidad_heuristico', '2.1.0',
+    coeficientes=[-4.0, 0.05, 0.3, 0.1, 0.5, 0.3], intercepto=1.0
+)
+
+_modelo_cargado = {'clave': None, 'modelo': None}
+_bloqueo_modelo = threading.Lock()
+
+
+def modelo_vigente():
+    """Modelo entrenado de settings.MODELO_MOROSIDAD_RUTA (cargado una vez por proceso)"""
+    ruta = settings.MODELO_MOROSIDAD_RUTA
+    try:
+        clave = (ruta, os.stat(ruta).st_mtime_ns)
+    except FileNotFoundError:
+        return MODELO_HEURISTICO
+    with _bloqueo_modelo:
+        if _modelo_cargado['clave'] != clave:
+            try:
+                modelo = ModeloMorosidad.cargar(ruta)
+            except Exception as e:
+                logger.error(f"Error cargando el modelo de morosidad {ruta}: {e}")
+                modelo = MODELO_HEURISTICO
+            _modelo_cargado.update(clave=clave, modelo=modelo)
+        return _modelo_cargado['modelo']
+
+
+# =====================================================================
+# CARACTERÍSTICAS
+# =====================================================================
+
+def _dia_pago():
+    return TruncDate('fecha_pago', tzinfo=timezone.get_default_timezone())
+
+
+def historial_pagos(unidades_ids, corte):
+    """
+    Últimos VENTANA_PAGOS pagos exigibles al `corte` de cada unidad, en una
+    sola consulta: (unidad_id, posición, estado, monto_total, monto_pagado,
+    abonado al corte, transacciones al corte, fecha_vencimiento, día de pago).
+    La posición 1 es el pago que venció más recientemente.
+    """
+    transacciones = HistorialPago.objects.filter(
+        pago=OuterRef('pk'), fecha_transaccion__lt=inicio_dia(corte + timedelta(days=1))
+    ).order_by().values('pago')
+    return Pago.objects.filter(
+        unidad_id__in=unidades_ids, fecha_vencimiento__lte=corte
+    ).exclude(estado='cancelado').annotate(
+        posicion=Window(
+            RowNumber(), partition_by=[F('unidad_id')],
+            order_by=[F('fecha_vencimiento').desc(), F('id').desc()]
+        ),
+        dia_pago=_dia_pago(),
+        abonado=Coalesce(
+            Subquery(transacciones.annotate(total=Sum('monto_transaccion')).values('total')),
+            Value(Decimal('0')), output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+        transacciones=Coalesce(
+            Subquery(transacciones.annotate(cantidad=Count('id')).values('cantidad')),
+            Value(0), output_field=IntegerField()
+        ),
+    ).filter(posicion__lte=VENTANA_PAGOS).values_list(
+        'unidad_id', 'posicion', 'estado', 'monto_total', 'monto_pagado', 'abonado', 'transacciones',
+        'fecha_vencimiento', 'dia_pago'
+    )
+
+
+def multas_recientes(unidades_ids, corte):
+    """(unidad_id, cantidad) de multas con infracción en los DIAS_MULTAS previos al corte"""
+    return Multa.objects.filter(
+        unidad_id__in=unidades_ids,
+        fecha_infraccion__gt=corte - timedelta(days=DIAS_MULTAS), fecha_infraccion__lte=corte
+    ).values('unidad_id').annotate(cantidad=Count('id')).values_list('unidad_id', 'cantidad')
+
+
+def _dias_de_pago(estado, vencimiento, dia_pago):
+    # Un pago marcado como pagado sin fecha de pago se considera pagado al vencer
+    return np.where((estado == 'pagado') & np.isnat(dia_pago), vencimiento, dia_pago)
+
+
+def matriz_caracteristicas(unidades_ids, filas, multas=(), corte=None):
+    """
+    Retorna (matriz n_unidades x CARACTERISTICAS, resumen) con `resumen` un
+    diccionario de arreglos por unidad para los factores de riesgo.
+    `unidades_ids` debe estar ordenado.
+    """
+    hoy = timezone.localdate()
+    corte = corte or hoy
+    dia_corte = np.datetime64(corte, 'D')
+    unidades_ids = np.asarray(unidades_ids, dtype=np.int64)
+    n = len(unidades_ids)
+
+    columnas = list(zip(*filas)) if filas else [()] * 9
+    unidad, posicion, estado, monto_total, monto_pagado, abonado, transacciones, vencimiento, dia_pago = columnas
+    indice = np.searchsorted(unidades_ids, np.array(unidad, dtype=np.int64))
+    antiguedad = np.array(posicion, dtype=np.float64)
+    estado = np.array(estado, dtype=object)
+    monto_total = np.array(monto_total, dtype=np.float64)
+    abonado = np.array(abonado, dtype=np.float64)
+    if corte >= hoy:
+        # Abonos registrados solo en monto_pagado (sin historial) cuentan para el saldo actual
+        abonado = np.maximum(abonado, np.array(monto_pagado, dtype=np.float64))
+    vencimiento = np.array(vencimiento, dtype='datetime64[D]')
+    dia_pago = _dias_de_pago(estado, vencimiento, np.array(dia_pago, dtype='datetime64[D]'))
+
+    pagado = ~np.isnat(dia_pago) & (dia_pago <= dia_corte)
+    a_tiempo = pagado & (dia_pago <= vencimiento)
+    retraso = np.where(pagado, dia_pago - vencimiento, dia_corte - vencimiento).astype(np.int64)
+    retraso = retraso.clip(min=0).astype(np.float64)
+    saldo = np.where(pagado, 0.0, (monto_total - abonado).clip(min=0))
+    en_cuotas = np.array(transacciones, dtype=np.int64) > 1
+
+    def por_unidad(valores=None):
+        return np.bincount(indice, weights=valores, minlength=n).astype(np.float64)
+
+    total_pagos = por_unidad()
+    pagos_a_tiempo = por_unidad(a_tiempo)
+    suma_retraso = por_unidad(retraso)
+    saldo_pendiente = por_unidad(saldo)
+    pagos_en_cuotas = por_unidad(en_cuotas)
+
+    multas = list(multas)
+    cantidad_multas = np.zeros(n)
+    if multas:
+        unidades_multa, cantidades = zip(*multas)
+        cantidad_multas[np.searchsorted(unidades_ids, np.array(unidades_multa, dtype=np.int64))] = cantidades
+
+    # Pendiente por mínimos cuadrados del retraso frente a -posición
+    x = -antiguedad
+    sx, sy, sxx, sxy = por_unidad(x), suma_retraso, por_unidad(x * x), por_unidad(x * retraso)
+    denominador = total_pagos * sxx - sx * sx
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tasa_a_tiempo = np.where(total_pagos > 0, pagos_a_tiempo / total_pagos, 1.0)
+        retraso_promedio = np.where(total_pagos > 0, suma_retraso / total_pagos, 0.0)
+        tendencia = np.where(denominador > 0, (total_pagos * sxy - sx * sy) / denominador, 0.0)
+        fraccion_cuotas = np.where(total_pagos > 0, pagos_en_cuotas / total_pagos, 0.0)
+
+    matriz = np.column_stack([
+        tasa_a_tiempo, retraso_promedio, np.log1p(saldo_pendiente), tendencia, fraccion_cuotas, cantidad_multas
+    ])
+    resumen = {
+        'total_pagos': total_pagos.astype(np.int64),
+        'pagos_a_tiempo': pagos_a_tiempo.astype(np.int64),
+        'tasa_a_tiempo': tasa_a_tiempo,
+        'retraso_promedio': retraso_promedio,
+        'saldo_pendiente': saldo_pendiente,
+        'tendencia': tendencia,
+        'pagos_en_cuotas': pagos_en_cuotas.astype(np.int64),
+        'multas_12m': cantidad_multas.astype(np.int64),
+    }
+    return matriz, resumen
+
+
+def huellas_entrada(matriz, resumen):
+    """
+    SHA-256 por unidad de los valores calculados al corte: la fila de
+    características que puntúa el modelo y los factores que se reportan
+    """
+    valores = np.column_stack([matriz] + [np.asarray(columna, dtype=np.float64) for columna in resumen.values()])
+    valores = np.ascontiguousarray(np.round(valores, DECIMALES_HUELLA))
+    return [hashlib.sha256(fila.tobytes()).hexdigest() for fila in valores]
+
+
+def caracteristicas(unidades_ids, corte=None):
+    """
+    Matriz y resumen de `unidades_ids` (ordenados) al `corte` (por defecto
+    hoy); resumen['huella'] tiene la huella de entrada de cada unidad.
+    """
+    corte = corte or timezone.localdate()
+    filas = list(historial_pagos(unidades_ids, corte))
+    multas = list(multas_recientes(unidades_ids, corte))
+    matriz, resumen = matriz_caracteristicas(unidades_ids, filas, multas, corte)
+    resumen['huella'] = huellas_entrada(matriz, resumen)
+    return matriz, resumen
+
+
+def resultados(unidades_ids, corte, horizonte=HORIZONTE_DIAS):
+    """
+    Variable objetivo por unidad de `unidades_ids` (ordenados):
+    (tiene pagos que vencen en (corte, corte + horizonte], alguno quedó impago
+    más de DIAS_GRACIA días tras vencer). Requiere que corte + horizonte +
+    DIAS_GRACIA ya haya pasado.
+    """
+    filas = list(Pago.objects.filter(
+        unidad_id__in=unidades_ids,
+        fecha_vencimiento__gt=corte, fecha_vencimiento__lte=corte + timedelta(days=horizonte)
+    ).exclude(estado='cancelado').annotate(dia_pago=_dia_pago()).values_list(
+        'unidad_id', 'estado', 'fecha_vencimiento', 'dia_pago'
+    ))
+    unidades_ids = np.asarray(unidades_ids, dtype=np.int64)
+    unidad, estado, vencimiento, dia_pago = list(zip(*filas)) if filas else [()] * 4
+    indice = np.searchsorted(unidades_ids, np.array(unidad, dtype=np.int64))
+    estado = np.array(estado, dtype=object)
+    vencimiento = np.array(vencimiento, dtype='datetime64[D]')
+    dia_pago = _dias_de_pago(estado, vencimiento, np.array(dia_pago, dtype='datetime64[D]'))
+    tardio = np.isnat(dia_pago) | (dia_pago > vencimiento + np.timedelta64(DIAS_GRACIA, 'D'))
+
+    n = len(unidades_ids)
+    return (
+        np.bincount(indice, minlength=n) > 0,
+        np.bincount(indice, weights=tardio, minlength=n) > 0,
+    )
+
+
+def puntuar(matriz, total_pagos, modelo=None):
+    """
+    Retorna (probabilidad %, nivel de riesgo, confianza %) por fila. La
+    confianza crece con la cantidad de pagos analizados.
+    """
+    modelo = modelo or modelo_vigente()
+    probabilidad = np.clip(np.round(modelo.probabilidades(matriz) * 100, 2), 5, 95)
+    niveles = NIVELES_RIESGO[np.digitize(probabilidad, UMBRALES_RIESGO)]
+    confianza = np.round(50 + 45 * np.minimum(total_pagos, VENTANA_PAGOS) / VENTANA_PAGOS, 2)
+    return probabilidad, niveles, confianza
+
+
+# =====================================================================
+# ENTRENAMIENTO Y BACKTESTING
+# =====================================================================
+
+def cortes_entrenamiento(meses, hoy=None):
+    """Cortes cada 30 días, del más antiguo al más reciente cuyo horizonte ya terminó"""
+    hoy = hoy or timezone.localdate()
+    ultimo = hoy - timedelta(days=HORIZONTE_DIAS + DIAS_GRACIA)
+    return [ultimo - timedelta(days=30 * i) for i in reversed(range(meses))]
+
+
+def conjunto_entrenamiento(cortes):
+    """
+    (X, y, corte de cada muestra): una muestra por unidad y corte, de las
+    unidades con historial al corte y pagos dentro del horizonte
+    """
+    ids = list(UnidadHabitacional.objects.order_by('id').values_list('id', flat=True))
+    matrices, objetivos, grupos = [], [], []
+    for posicion, corte in enumerate(cortes):
+        matriz, resumen = caracteristicas(ids, corte)
+        con_pagos, moroso = resultados(ids, corte)
+        validas = con_pagos & (resumen['total_pagos'] > 0)
+        matrices.append(matriz[validas])
+        objetivos.append(moroso[validas])
+        grupos.append(np.full(validas.sum(), posicion))
+    if not matrices:
+        return np.empty((0, len(CARACTERISTICAS))), np.empty(0, dtype=bool), np.empty(0, dtype=np.int64)
+    return np.vstack(matrices), np.concatenate(objetivos), np.concatenate(grupos)
+
+
+def entrenar_regresion_logistica(X, y, iteraciones=2_000, tasa_aprendizaje=0.1, l2=0.01):
+    """Regresión logística por descenso de gradiente sobre X estandarizada"""
+    media = X.mean(axis=0)
+    escala = X.std(axis=0)
+    escala[escala == 0] = 1.0
+    Z = (X - media) / escala
+    y = y.astype(np.float64)
+    coeficientes = np.zeros(X.shape[1])
+    intercepto = 0.0
+    for _ in range(iteraciones):
+        p = 1.0 / (1.0 + np.exp(-np.clip(Z @ coeficientes + intercepto, -50, 50)))
+        error = p - y
+        coeficientes -= tasa_aprendizaje * (Z.T @ error / len(y) + l2 * coeficientes)
+        intercepto -= tasa_aprendizaje * error.mean()
+    return coeficientes, intercepto, media, escala
+
+
+def evaluar_modelo(modelo, X, y):
+    """Exactitud, log-loss y AUC de `modelo` sobre (X, y)"""
+    p = modelo.probabilidades(X)
+    y = y.astype(bool)
+    metricas = {
+        'muestras': int(len(y)),
+        'tasa_morosidad': round(float(y.mean()), 4) if len(y) else None,
+        'exactitud': round(float(((p >= UMBRAL_MOROSIDAD) == y).mean()), 4) if len(y) else None,
+        'log_loss': None,
+        'auc': None,
+    }
+    if len(y):
+        p = np.clip(p, 1e-12, 1 - 1e-12)
+        metricas['log_loss'] = round(float(-np.mean(np.where(y, np.log(p), np.log(1 - p)))), 4)
+    positivos, negativos = int(y.sum()), int((~y).sum())
+    if positivos and negativos:
+        rangos = np.empty(len(p))
+        rangos[np.argsort(p, kind='stable')] = np.arange(1, len(p) + 1)
+        metricas['auc'] = round(float(
+            (rangos[y].sum() - positivos * (positivos + 1) / 2) / (positivos * negativos)
+        ), 4)
+    return metricas
+
+
+def entrenar_modelo(meses=24, proporcion_validacion=0.25, hoy=None, **parametros):
+    """
+    Entrena con los cortes de los últimos `meses`: valida sobre los cortes más
+    recientes (proporcion_validacion) y ajusta el modelo final con todos.
+    Retorna el ModeloMorosidad con sus métricas de validación.
+    """
+    cortes = cortes_entrenamiento(meses, hoy)
+    X, y, grupos = conjunto_entrenamiento(cortes)
+    if len(y) == 0 or y.all() or not y.any():
+        raise ValueError("El historial no tiene ejemplos de ambas clases para entrenar el modelo")
+
+    primer_corte_validacion = max(1, int(round(len(cortes) * (1 - proporcion_validacion))))
+    entrenamiento = grupos < primer_corte_validacion
+    validacion = ~entrenamiento
+    metricas = {}
+    if y[entrenamiento].any() and not y[entrenamiento].all() and validacion.any():
+        parcial = ModeloMorosidad('parcial', '0', *entrenar_regresion_logistica(
+            X[entrenamiento], y[entrenamiento], **parametros
+        ))
+        metricas['validacion'] = evaluar_modelo(parcial, X[validacion], y[validacion])
+
+    modelo = ModeloMorosidad(
+        'morosidad_logistica', timezone.now().strftime('%Y%m%d.%H%M%S'),
+        *entrenar_regresion_logistica(X, y, **parametros)
+    )
+    metricas['entrenamiento'] = evaluar_modelo(modelo, X, y)
+    metricas['cortes'] = [cortes[0].isoformat(), cortes[-1].isoformat()]
+    modelo.metricas = metricas
+    return modelo
+
+
+def evaluar_predicciones(hoy=None):
+    """
+    Completa fue_preciso de los análisis cuyo horizonte (más la gracia) ya
+    terminó: la predicción es precisa si (probabilidad >= UMBRAL_MOROSIDAD)
+    coincide con la morosidad observada. Retorna (evaluados, precisos).
+    """
+    hoy = hoy or timezone.localdate()
+    limite = inicio_dia(hoy - timedelta(days=HORIZONTE_DIAS + DIAS_GRACIA - 1))
+    por_corte = defaultdict(list)
+    for analisis_id, unidad_id, fecha, probabilidad in AnalisisPredictivoMorosidad.objects.filter(
+        fue_preciso__isnull=True, fecha_analisis__lt=limite
+    ).values_list('id', 'unidad_id', 'fecha_analisis', 'probabilidad_morosidad'):
+        por_corte[timezone.localdate(fecha)].append((analisis_id, unidad_id, probabilidad))
+
+    precisos, imprecisos = [], []
+    umbral = Decimal(UMBRAL_MOROSIDAD * 100)
+    for corte, analisis in por_corte.items():
+        ids = sorted({unidad_id for _, unidad_id, _ in analisis})
+        _, morosas = resultados(ids, corte)
+        morosas = dict(zip(ids, morosas))
+        for analisis_id, unidad_id, probabilidad in analisis:
+            acierto = (probabilidad >= umbral) == bool(morosas[unidad_id])
+            (precisos if acierto else imprecisos).append(analisis_id)
+
+    with transaction.atomic():
+        for valor, ids in ((True, precisos), (False, imprecisos)):
+            for inicio in range(0, len(ids), TAMANO_BLOQUE_INSERCION):
+                AnalisisPredictivoMorosidad.objects.filter(
+                    id__in=ids[inicio:inicio + TAMANO_BLOQUE_INSERCION]
+                ).update(fue_preciso=valor)
+    return len(precisos) + len(imprecisos), len(precisos)
+
+
+# =====================================================================
+# ANÁLISIS
+# =====================================================================
+
+def generar_recomendaciones_morosidad(probabilidad, factores):
+    """Genera recomendaciones basadas en el análisis predictivo"""
+    
+    recomendaciones_texto = []
+    acciones_sugeridas = []
+    
+    if probabilidad >= 80:
+        recomendaciones_texto.append(
+            "RIESGO MUY ALTO: Se recomienda contacto inmediato con el residente "
+            "para establecer un plan de pagos personalizado."
+        )
+        acciones_sugeridas.extend([
+            "Contactar al residente en 24 horas",
+            "Ofrecer plan de pagos flexible",
+            "Evaluar situación financiera personal",
+            "Considerar mediación administrativa"
+        ])
+    elif probabilidad >= 60:
+        recomendaciones_texto.append(
+            "RIESGO ALTO: Monitoreo cercano y comunicación proactiva recomendada."
+        )
+        acciones_sugeridas.extend([
+            "Enviar recordatorio de pago anticipado",
+            "Ofrecer facilidades de pago",
+            "Programar seguimiento semanal"
+        ])
+    elif probabilidad >= 40:
+        recomendaciones_texto.append(
+            "RIESGO MEDIO: Mantener comunicación regular y monitoreo."
+        )
+        acciones_sugeridas.extend([
+            "Enviar recordatorios automáticos",
+            "Monitorear puntualidad de pagos",
+            "Ofrecer canales de pago adicionales"
+        ])
+    else:
+        recomendaciones_texto.append(
+            "RIESGO BAJO: Continuar con procedimientos normales de cobranza."
+        )
+        acciones_sugeridas.extend([
+            "Mantener comunicación estándar",
+            "Reconocer buen historial de pagos"
+        ])
+    
+    # Agregar recomendaciones específicas basadas en factores
+    if factores.get('historial_pagos', {}).get('tasa_pago_a_tiempo', 0) < 50:
+        recomendaciones_texto.append(
+            "Historial de pagos tardíos detectado. Considerar incentivos por pago puntual."
+        )
+    
+    return {
+        'texto': ' '.join(recomendaciones_texto),
+        'acciones': acciones_sugeridas
+    }
+
+
+def analisis_vigentes(unidades_ids, huellas, modelo):
+    """{(unidad_id, huella): análisis vigente más reciente} de `modelo` con alguna de `huellas`"""
+    vigentes = {}
+    for analisis in AnalisisPredictivoMorosidad.objects.filter(
+        unidad_id__in=unidades_ids, huella_entrada__in=set(huellas),
+        modelo_utilizado=modelo.nombre, version_modelo=modelo.version, valido_hasta__gt=timezone.now()
+    ).order_by('unidad_id', '-fecha_analisis', '-id'):
+        vigentes.setdefault((analisis.unidad_id, analisis.huella_entrada), analisis)
+    return vigentes
+
+
+def analizar_unidades(generado_por, unidades=None, modelo=None, dias_validez=DIAS_VALIDEZ,
+                      forzar_recalculo=False):
+    """
+    Analiza las unidades activas (o `unidades`) con responsable. Reutiliza el
+    análisis vigente de las unidades cuya huella de entrada no cambió (salvo
+    `forzar_recalculo`) y crea uno nuevo para las demás.
+    Retorna (análisis por unidad, cantidad reutilizada).
+    """
+    modelo = modelo or modelo_vigente()
+    if unidades is None:
+        unidades = UnidadHabitacional.objects.filter(esta_activa=True)
+    unidades = list(
+        unidades.exclude(propietario__isnull=True, inquilino__isnull=True).order_by('id').only(
+            'id', 'propietario_id', 'inquilino_id'
+        )
+    )
+    if not unidades:
+        return [], 0
+
+    hoy = timezone.localdate()
+    ids = [unidad.id for unidad in unidades]
+    matriz, resumen = caracteristicas(ids, hoy)
+    huellas = resumen['huella']
+    vigentes = {} if forzar_recalculo else analisis_vigentes(ids, huellas, modelo)
+    resultado = [vigentes.get((unidad_id, huella)) for unidad_id, huella in zip(ids, huellas)]
+    pendientes = [i for i, analisis in enumerate(resultado) if analisis is None]
+    if not pendientes:
+        return resultado, len(resultado)
+
+    probabilidad, niveles, confianza = puntuar(matriz[pendientes], resumen['total_pagos'][pendientes], modelo)
+    valido_hasta = timezone.now() + timedelta(days=dias_validez)
+    nuevos = []
+    for j, i in enumerate(pendientes):
+        unidad = unidades[i]
+        factores = {
+            'historial_pagos': {
+                'total_pagos': int(resumen['total_pagos'][i]),
+                'pagos_a_tiempo': int(resumen['pagos_a_tiempo'][i]),
+                'pagos_tardios': int(resumen['total_pagos'][i] - resumen['pagos_a_tiempo'][i]),
+                'tasa_pago_a_tiempo': round(float(resumen['tasa_a_tiempo'][i]) * 100, 2),
+                'retraso_promedio_dias': round(float(resumen['retraso_promedio'][i]), 2),
+                'saldo_pendiente': round(float(resumen['saldo_pendiente'][i]), 2),
+                'tendencia_retraso': round(float(resumen['tendencia'][i]), 4),
+                'pagos_en_cuotas': int(resumen['pagos_en_cuotas'][i]),
+            },
+            'multas_12_meses': int(resumen['multas_12m'][i]),
+        }
+        recomendaciones = generar_recomendaciones_morosidad(float(probabilidad[j]), factores)
+        resultado[i] = AnalisisPredictivoMorosidad(
+            unidad_id=unidad.id,
+            usuario_analizado_id=unidad.inquilino_id or unidad.propietario_id,
+            probabilidad_morosidad=round(float(probabilidad[j]), 2),
+            nivel_riesgo=str(niveles[j]),
+            factores_riesgo=factores,
+            historial_pagos_analizado={
+                'pagos_analizados': int(resumen['total_pagos'][i]),
+                'tasa_cumplimiento': factores['historial_pagos']['tasa_pago_a_tiempo'],
+                'saldo_pendiente': factores['historial_pagos']['saldo_pendiente'],
+                'fecha_corte': hoy.isoformat(),
+            },
+            recomendaciones=recomendaciones['texto'],
+            acciones_sugeridas=recomendaciones['acciones'],
+            modelo_utilizado=modelo.nombre,
+            version_modelo=modelo.version,
+            confianza_prediccion=round(float(confianza[j]), 2),
+            valido_hasta=valido_hasta,
+            huella_entrada=huellas[i],
+            generado_por=generado_por,
+        )
+        nuevos.append(resultado[i])
+
+    with transaction.atomic():
+        AnalisisPredictivoMorosidad.objects.bulk_create(nuevos, batch_size=TAMANO_BLOQUE_INSERCION)
+        # bulk_create no emite post_save
+        invalidar_dashboard('dashboard_seguridad')
+    return resultado, len(resultado) - len(nuevos)
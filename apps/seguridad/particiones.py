@@ -0,0 +1,150 @@
+"""
+Particionamiento mensual de registros_accesos (PostgreSQL).
+
+La tabla está particionada por rango de `fecha_hora` con una partición por mes
+(registros_accesos_pAAAA_MM) más una partición por defecto que recibe eventos
+fuera de los meses creados. Los meses se cortan a medianoche en la zona
+horaria del proyecto (TIME_ZONE).
+
+Las consultas por rango de `fecha_hora` solo leen las particiones del período,
+y la retención se aplica desprendiendo particiones completas (DETACH) en lugar
+de borrar filas. El comando `gestionar_particiones_accesos` crea los meses
+futuros y desprende/archiva los vencidos.
+"""
+import re
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RegistroAcceso
+
+TABLA = RegistroAcceso._meta.db_table
+PARTICION_DEFECTO = f"{TABLA}_defecto"
+ESQUEMA_ARCHIVO = 'archivo_accesos'
+MESES_FUTUROS = 3
+
+_PATRON_PARTICION = re.compile(rf"^{TABLA}_p(\d{{4}})_(\d{{2}})$")
+
+
+def soporta_particiones(connection):
+    return connection.vendor == 'postgresql'
+
+
+def inicio_mes(fecha):
+    return date(fecha.year, fecha.month, 1)
+
+
+def sumar_meses(mes, cantidad):
+    indice = mes.year * 12 + mes.month - 1 + cantidad
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def rango_mes(mes):
+    """Límites [inicio, fin) del mes en la zona horaria del proyecto"""
+    zona = timezone.get_default_timezone()
+    return (
+        datetime.combine(mes, time.min, tzinfo=zona),
+        datetime.combine(sumar_meses(mes, 1), time.min, tzinfo=zona),
+    )
+
+
+def nombre_particion(mes):
+    return f"{TABLA}_p{mes:%Y_%m}"
+
+
+def mes_de_particion(nombre):
+    """Mes de una partición mensual, o None para la partición por defecto u otras tablas"""
+    coincidencia = _PATRON_PARTICION.match(nombre)
+    if coincidencia is None:
+        return None
+    return date(int(coincidencia.group(1)), int(coincidencia.group(2)), 1)
+
+
+def meses_a_crear(hoy, meses_futuros=MESES_FUTUROS):
+    """Mes actual y los `meses_futuros` siguientes"""
+    actual = inicio_mes(hoy)
+    return [sumar_meses(actual, desplazamiento) for desplazamiento in range(meses_futuros + 1)]
+
+
+def particiones_vencidas(nombres, hoy, retencion_meses):
+    """
+    Particiones mensuales cuyo mes completo es anterior a la ventana de
+    retención (el mes actual cuenta como el primero de la ventana).
+    """
+    limite = sumar_meses(inicio_mes(hoy), -(retencion_meses - 1))
+    meses = {nombre: mes_de_particion(nombre) for nombre in nombres}
+    return sorted(
+        (nombre for nombre, mes in meses.items() if mes is not None and mes < limite),
+        key=meses.get
+    )
+
+
+def _literal(valor):
+    # Solo se formatean datetimes generados aquí: los límites de partición no admiten parámetros
+    return f"'{valor.isoformat()}'"
+
+
+def esta_particionada(cursor):
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+        [TABLA]
+    )
+    return cursor.fetchone()[0]
+
+
+def listar_particiones(cursor):
+    """Nombres de las particiones adjuntas a registros_accesos"""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname",
+        [TABLA]
+    )
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def crear_particion(cursor, mes):
+    """
+    Crea la partición del mes si no existe. Si la partición por defecto ya
+    tiene filas de ese mes, se mueven a la nueva tabla antes de adjuntarla.
+    Debe ejecutarse dentro de una transacción. Retorna True si la creó.
+    """
+    nombre = nombre_particion(mes)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [nombre])
+    if cursor.fetchone()[0]:
+        return False
+
+    inicio, fin = rango_mes(mes)
+    limites = f"FOR VALUES FROM ({_literal(inicio)}) TO ({_literal(fin)})"
+    filtro = f"fecha_hora >= {_literal(inicio)} AND fecha_hora < {_literal(fin)}"
+
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {PARTICION_DEFECTO} WHERE {filtro})")
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE TABLE {nombre} PARTITION OF {TABLA} {limites}")
+        return True
+
+    cursor.execute(f"CREATE TABLE {nombre} (LIKE {TABLA} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(
+        f"WITH movidas AS (DELETE FROM {PARTICION_DEFECTO} WHERE {filtro} RETURNING *) "
+        f"INSERT INTO {nombre} SELECT * FROM movidas"
+    )
+    cursor.execute(f"ALTER TABLE {TABLA} ATTACH PARTITION {nombre} {limites}")
+    return True
+
+
+def desprender_particion(cursor, nombre, archivar=True):
+    """
+    Desprende una partición de registros_accesos. Si `archivar`, la tabla se
+    conserva en el esquema ESQUEMA_ARCHIVO (para respaldo o consulta); si no,
+    se elimina.
+    """
+    cursor.execute(f"ALTER TABLE {TABLA} DETACH PARTITION {nombre}")
+    if archivar:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {ESQUEMA_ARCHIVO}")
+        cursor.execute(f"ALTER TABLE {nombre} SET SCHEMA {ESQUEMA_ARCHIVO}")
+    else:
+        cursor.execute(f"DROP TABLE {nombre}")
+
+
+def retencion_meses_configurada():
+    return getattr(settings, 'RETENCION_REGISTROS_ACCESOS_MESES', 24)
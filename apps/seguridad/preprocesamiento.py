@@ -0,0 +1,136 @@
+"""
+Preprocesamiento de imágenes subidas para los endpoints de IA.
+
+Cada imagen se abre desde el archivo temporal de la subida (o el buffer en
+memoria si es pequeña), se decodifica a tamaño reducido con `draft()` cuando
+el formato lo permite (JPEG), se recorta a la región de interés y se
+normaliza al tamaño de entrada del modelo. El original decodificado y el
+buffer de la subida se liberan al terminar, de modo que el pico de memoria por
+request queda acotado por el tamaño de entrada y no por el de la subida.
+"""
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+# Tamaño de entrada (ancho, alto) de cada modelo
+TAMANO_ENTRADA_FACIAL = (160, 160)
+TAMANO_ENTRADA_PLACA = (320, 96)
+TAMANO_ENTRADA_ANOMALIAS = (224, 224)
+
+# Límite de píxeles decodificables (protección contra "bombas de descompresión")
+PIXELES_MAXIMOS = 40_000_000
+
+
+class ImagenPreprocesada(NamedTuple):
+    imagen: Image.Image
+    tamano_original: Tuple[int, int]
+    region: Tuple[int, int, int, int]
+    formato: Optional[str]
+
+    def a_arreglo(self):
+        """Matriz float32 (alto, ancho, canales) escalada a [0, 1]"""
+        return np.asarray(self.imagen, dtype=np.float32) / 255.0
+
+    def metadatos(self):
+        return {
+            'tamano_original': list(self.tamano_original),
+            'tamano_entrada': list(self.imagen.size),
+            'region_analizada': list(self.region),
+            'formato': self.formato,
+        }
+
+
+def _abrir(archivo):
+    """Abre la subida sin copiarla: ruta del temporal o el propio objeto archivo"""
+    if hasattr(archivo, 'temporary_file_path'):
+        return Image.open(archivo.temporary_file_path())
+    archivo.seek(0)
+    return Image.open(archivo)
+
+
+def region_desde_porcentajes(zona, tamano):
+    """
+    Convierte [x1, y1, x2, y2] en porcentajes (formato de `zona_analisis`) a
+    una caja en píxeles. Retorna None si la zona no es válida.
+    """
+    try:
+        x1, y1, x2, y2 = (float(valor) for valor in zona)
+    except (TypeError, ValueError):
+        return None
+    ancho, alto = tamano
+    caja = (
+        int(max(0.0, min(x1, x2)) * ancho / 100), int(max(0.0, min(y1, y2)) * alto / 100),
+        int(min(100.0, max(x1, x2)) * ancho / 100), int(min(100.0, max(y1, y2)) * alto / 100),
+    )
+    if caja[2] <= caja[0] or caja[3] <= caja[1]:
+        return None
+    return caja
+
+
+def _ajustar_proporcion(region, tamano_objetivo):
+    """Recorte centrado dentro de la región con la proporción de la entrada del modelo"""
+    x1, y1, x2, y2 = region
+    proporcion = tamano_objetivo[0] / tamano_objetivo[1]
+    ancho_region, alto_region = x2 - x1, y2 - y1
+    if ancho_region / alto_region > proporcion:
+        ancho_region = alto_region * proporcion
+    else:
+        alto_region = ancho_region / proporcion
+    x1 = (x1 + x2 - ancho_region) / 2
+    y1 = (y1 + y2 - alto_region) / 2
+    return (int(x1), int(y1), int(x1 + ancho_region), int(y1 + alto_region))
+
+
+def preprocesar_imagen(archivo, tamano_objetivo, region=None, modo='RGB', liberar_original=True):
+    """
+    Decodifica, recorta y redimensiona una imagen subida.
+
+    `region` es una caja (x1, y1, x2, y2) en píxeles de la imagen original.
+    Retorna ImagenPreprocesada, o None si el archivo no es una imagen fija
+    (p. ej. un video o un GIF animado). Lanza ValueError si la imagen excede PIXELES_MAXIMOS.
+    """
+    try:
+        original = _abrir(archivo)
+    except UnidentifiedImageError:
+        return None
+    if getattr(original, 'is_animated', False):
+        # GIF/WebP animados se tratan como video. No se llama a close(): en
+        # imágenes multi-frame Pillow cerraría también el archivo subido, que
+        # aún no se decodificó y se necesita para encolarlo.
+        return None
+
+    try:
+        tamano_original = original.size
+        formato = original.format
+        if tamano_original[0] * tamano_original[1] > PIXELES_MAXIMOS:
+            raise ValueError(
+                f"La imagen excede el máximo de {PIXELES_MAXIMOS:,} píxeles"
+            )
+
+        region = region or (0, 0, *tamano_original)
+        region = _ajustar_proporcion(region, tamano_objetivo)
+
+        # Decodificar solo a la escala necesaria para cubrir la región al tamaño objetivo
+        escala_requerida = max(
+            tamano_objetivo[0] / (region[2] - region[0]),
+            tamano_objetivo[1] / (region[3] - region[1]),
+        )
+        original.draft(modo, (
+            max(1, int(tamano_original[0] * escala_requerida)),
+            max(1, int(tamano_original[1] * escala_requerida)),
+        ))
+        escala = original.size[0] / tamano_original[0]
+        caja = tuple(coordenada * escala for coordenada in region)
+
+        convertida = original if original.mode == modo else original.convert(modo)
+        imagen = convertida.resize(
+            tamano_objetivo, Image.Resampling.BILINEAR, box=caja, reducing_gap=2.0
+        )
+        convertida.close()
+    finally:
+        original.close()
+        if liberar_original:
+            archivo.close()
+
+    return ImagenPreprocesada(imagen, tamano_original, region, formato)
@@ -0,0 +1,246 @@
+"""
+Resúmenes diarios de seguridad para reportes por período.
+
+Las tablas resumenes_diarios_* guardan conteos por día (en la zona horaria del
+proyecto) y por dimensión (estado, tipo, método, gravedad...). El comando
+`consolidar_resumenes_seguridad` los calcula día por día; dias_resumen_seguridad
+registra qué días están consolidados.
+
+Un día consolidado que vuelve a modificarse (eventos que llegan tarde,
+ediciones o eliminaciones) se marca como pendiente desde las señales y la
+ingesta masiva, y el reporte lo lee de las filas originales hasta la siguiente
+consolidación. Las ediciones que mueven un registro a otro día marcan tanto
+el día anterior como el nuevo.
+
+El reporte suma los resúmenes de los días completos consolidados y solo
+consulta filas originales para los tramos restantes: los bordes parciales del
+período, el día en curso y los días pendientes.
+"""
+from collections import Counter, namedtuple
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, Min, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    RegistroVisitante, RegistroAcceso, IncidenteSeguridad, DiaResumenSeguridad,
+    ResumenDiarioVisitantes, ResumenDiarioAccesos, ResumenDiarioIncidentes
+)
+
+DIAS_POR_TRANSACCION = 31
+
+FuenteResumen = namedtuple('FuenteResumen', 'nombre modelo campo_fecha resumen dimensiones anotaciones')
+
+FUENTES = (
+    FuenteResumen(
+        'visitantes', RegistroVisitante, 'fecha_creacion', ResumenDiarioVisitantes, ('estado',), {}
+    ),
+    FuenteResumen(
+        'accesos', RegistroAcceso, 'fecha_hora', ResumenDiarioAccesos,
+        ('tipo_acceso', 'metodo_acceso', 'exitoso'), {}
+    ),
+    FuenteResumen(
+        'incidentes', IncidenteSeguridad, 'fecha_incidente', ResumenDiarioIncidentes,
+        ('tipo_incidente', 'nivel_gravedad', 'detectado_ia'),
+        {'detectado_ia': Case(
+            When(datos_ia_json={}, then=Value(False)), default=Value(True), output_field=BooleanField()
+        )}
+    ),
+)
+
+
+def inicio_dia(dia):
+    return datetime.combine(dia, time.min, tzinfo=timezone.get_default_timezone())
+
+
+def _rangos_contiguos(dias, maximo=None):
+    """Agrupa fechas ordenadas en rangos [desde, hasta] de días consecutivos"""
+    rangos = []
+    for dia in dias:
+        if rangos and rangos[-1][1] + timedelta(days=1) == dia and (
+            maximo is None or (dia - rangos[-1][0]).days < maximo
+        ):
+            rangos[-1][1] = dia
+        else:
+            rangos.append([dia, dia])
+    return [tuple(rango) for rango in rangos]
+
+
+def _agrupar(fuente, filtro, por_dia=False):
+    """Conteos de filas originales por dimensiones (y por día si `por_dia`)"""
+    consulta = fuente.modelo.objects.filter(filtro).order_by()
+    if fuente.anotaciones:
+        consulta = consulta.annotate(**fuente.anotaciones)
+    campos = list(fuente.dimensiones)
+    if por_dia:
+        consulta = consulta.annotate(
+            dia=TruncDate(fuente.campo_fecha, tzinfo=timezone.get_default_timezone())
+        )
+        campos.insert(0, 'dia')
+    return consulta.values(*campos).annotate(cantidad=Count('id'))
+
+
+def marcar_dias_pendientes(fechas_hora):
+    """
+    Marca como pendientes los días consolidados que contienen `fechas_hora`.
+    Los días sin consolidar (incluido el actual) no requieren marca: el
+    reporte ya los lee de las filas originales.
+    """
+    hoy = timezone.localdate()
+    dias = {timezone.localdate(fecha) for fecha in fechas_hora if fecha is not None}
+    dias = [dia for dia in dias if dia < hoy]
+    if dias:
+        DiaResumenSeguridad.objects.filter(fecha__in=dias, consolidado=True).update(
+            consolidado=False, fecha_modificacion=timezone.now()
+        )
+
+
+def consolidar_dias(dias):
+    """Recalcula los resúmenes de los días indicados. Retorna los días consolidados"""
+    dias = sorted(set(dias))
+    for desde, hasta in _rangos_contiguos(dias, DIAS_POR_TRANSACCION):
+        rango = [inicio_dia(desde), inicio_dia(hasta + timedelta(days=1))]
+        with transaction.atomic():
+            DiaResumenSeguridad.objects.bulk_create(
+                [DiaResumenSeguridad(fecha=desde + timedelta(days=n)) for n in range((hasta - desde).days + 1)],
+                ignore_conflicts=True
+            )
+            # Bloquea los días: una escritura concurrente sobre ellos espera y
+            # luego los vuelve a marcar como pendientes
+            list(DiaResumenSeguridad.objects.select_for_update().filter(fecha__range=[desde, hasta]))
+
+            for fuente in FUENTES:
+                fuente.resumen.objects.filter(fecha__range=[desde, hasta]).delete()
+                filtro = Q(**{f'{fuente.campo_fecha}__gte': rango[0], f'{fuente.campo_fecha}__lt': rango[1]})
+                fuente.resumen.objects.bulk_create([
+                    fuente.resumen(
+                        fecha=fila['dia'], cantidad=fila['cantidad'],
+                        **{dimension: fila[dimension] for dimension in fuente.dimensiones}
+                    )
+                    for fila in _agrupar(fuente, filtro, por_dia=True)
+                ])
+
+            DiaResumenSeguridad.objects.filter(fecha__range=[desde, hasta]).update(
+                consolidado=True, fecha_consolidacion=timezone.now(), fecha_modificacion=timezone.now()
+            )
+    return dias
+
+
+def dias_por_consolidar(hasta=None):
+    """
+    Días pendientes más los posteriores al último consolidado (o desde el
+    primer dato si nunca se consolidó), hasta ayer inclusive.
+    """
+    hasta = hasta or timezone.localdate() - timedelta(days=1)
+    pendientes = set(
+        DiaResumenSeguridad.objects.filter(consolidado=False, fecha__lte=hasta).values_list('fecha', flat=True)
+    )
+    ultimo = DiaResumenSeguridad.objects.filter(consolidado=True).order_by('-fecha').values_list(
+        'fecha', flat=True
+    ).first()
+    if ultimo is not None:
+        desde = ultimo + timedelta(days=1)
+    else:
+        primeros = [
+            fuente.modelo.objects.aggregate(primero=Min(fuente.campo_fecha))['primero'] for fuente in FUENTES
+        ]
+        primeros = [timezone.localdate(primero) for primero in primeros if primero is not None]
+        desde = min(primeros) if primeros else hasta + timedelta(days=1)
+    return sorted(pendientes | {desde + timedelta(days=n) for n in range((hasta - desde).days + 1)})
+
+
+def _tramos_sin_resumen(inicio, fin, dias_resumen):
+    """Tramos de [inicio, fin] no cubiertos por días resumidos (bordes, pendientes, hoy)"""
+    tramos = []
+    cursor = inicio
+    for desde, hasta in _rangos_contiguos(dias_resumen):
+        if cursor < inicio_dia(desde):
+            tramos.append((cursor, inicio_dia(desde), 'lt'))
+        cursor = inicio_dia(hasta + timedelta(days=1))
+    if cursor <= fin:
+        tramos.append((cursor, fin, 'lte'))
+    return tramos
+
+
+def _filtro_tramos(campo, tramos):
+    filtro = Q()
+    for desde, hasta, operador in tramos:
+        filtro |= Q(**{f'{campo}__gte': desde, f'{campo}__{operador}': hasta})
+    return filtro
+
+
+def conteos_periodo(inicio, fin):
+    """
+    Conteos por fuente y dimensiones de [inicio, fin] (ambos inclusive).
+    Retorna ({fuente: Counter({dimensiones: cantidad})}, días leídos de resúmenes).
+    """
+    primer_dia = timezone.localdate(inicio)
+    if inicio > inicio_dia(primer_dia):
+        primer_dia += timedelta(days=1)
+    ultimo_dia = timezone.localdate(fin)
+    if inicio_dia(ultimo_dia + timedelta(days=1)) > fin + timedelta(microseconds=1):
+        ultimo_dia -= timedelta(days=1)
+    ultimo_dia = min(ultimo_dia, timezone.localdate() - timedelta(days=1))
+
+    dias_resumen = []
+    if primer_dia <= ultimo_dia:
+        dias_resumen = sorted(DiaResumenSeguridad.objects.filter(
+            consolidado=True, fecha__range=[primer_dia, ultimo_dia]
+        ).values_list('fecha', flat=True))
+    tramos = _tramos_sin_resumen(inicio, fin, dias_resumen)
+
+    conteos = {}
+    for fuente in FUENTES:
+        conteo = Counter()
+        if dias_resumen:
+            filas = fuente.resumen.objects.filter(fecha__in=dias_resumen).values(
+                *fuente.dimensiones
+            ).annotate(total=Sum('cantidad'))
+            for fila in filas:
+                conteo[tuple(fila[dimension] for dimension in fuente.dimensiones)] += fila['total']
+        if tramos:
+            for fila in _agrupar(fuente, _filtro_tramos(fuente.campo_fecha, tramos)):
+                conteo[tuple(fila[dimension] for dimension in fuente.dimensiones)] += fila['cantidad']
+        conteos[fuente.nombre] = conteo
+    return conteos, len(dias_resumen)
+
+
+def _por(conteo, posicion):
+    resultado = Counter()
+    for clave, cantidad in conteo.items():
+        resultado[clave[posicion]] += cantidad
+    return dict(resultado)
+
+
+def reporte_seguridad(inicio, fin):
+    """Reporte de visitantes, accesos e incidentes de [inicio, fin]"""
+    conteos, dias_resumidos = conteos_periodo(inicio, fin)
+    visitantes, accesos, incidentes = conteos['visitantes'], conteos['accesos'], conteos['incidentes']
+    accesos_por_resultado = _por(accesos, 2)
+    return {
+        'periodo': {
+            'inicio': inicio.isoformat(),
+            'fin': fin.isoformat(),
+            'dias': (fin - inicio).days + 1,
+            'dias_desde_resumenes': dias_resumidos,
+        },
+        'visitantes': {
+            'total_registrados': sum(visitantes.values()),
+            'por_estado': _por(visitantes, 0),
+        },
+        'accesos': {
+            'total': sum(accesos.values()),
+            'autorizados': accesos_por_resultado.get(True, 0),
+            'no_autorizados': accesos_por_resultado.get(False, 0),
+            'por_tipo': _por(accesos, 0),
+            'por_metodo': _por(accesos, 1),
+        },
+        'incidentes': {
+            'total': sum(incidentes.values()),
+            'por_gravedad': _por(incidentes, 1),
+            'por_tipo': _por(incidentes, 0),
+            'detectados_ia': _por(incidentes, 2).get(True, 0),
+        },
+    }
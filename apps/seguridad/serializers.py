@@ -2,7 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import (
     TipoVisitante, RegistroVisitante, AccesoVehiculo, RegistroAcceso,
-    IncidenteSeguridad, ConfiguracionIA, AnalisisPredictivoMorosidad
+    IncidenteSeguridad, ConfiguracionIA, AnalisisPredictivoMorosidad, TrabajoIA
 )
 from apps.finanzas.models import UnidadHabitacional
 from apps.autenticacion.serializers import UsuarioSerializer
@@ -228,6 +228,18 @@ class AnalisisPredictivoMorosidadSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'fecha_analisis']
 
+class TrabajoIASerializer(serializers.ModelSerializer):
+    """Serializer para consultar el estado de trabajos de IA"""
+    
+    class Meta:
+        model = TrabajoIA
+        fields = [
+            'id', 'tipo_trabajo', 'estado', 'parametros', 'resultado', 'error',
+            'intentos', 'incidente', 'fecha_creacion', 'fecha_inicio', 'fecha_fin',
+            'fecha_actualizacion'
+        ]
+        read_only_fields = fields
+
 # Serializers simplificados para listas
 class RegistroVisitanteListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listas de visitantes"""
@@ -328,13 +340,16 @@ class DeteccionAnomaliaSerializer(serializers.Serializer):
         max_digits=5, decimal_places=2, default=70.00, 
         min_value=10.00, max_value=100.00, required=False
     )
+    paso_frames = serializers.IntegerField(
+        default=5, min_value=1, max_value=300, required=False,
+        help_text="Analizar un frame de cada N (solo videos)"
+    )
 
 class AnalisisMorosidadSerializer(serializers.Serializer):
     """Serializer para solicitar análisis de morosidad"""
     
     unidad_id = serializers.IntegerField(required=True)
-    incluir_factores_externos = serializers.BooleanField(default=True, required=False)
-    modelo_version = serializers.CharField(max_length=20, required=False)
+    forzar_recalculo = serializers.BooleanField(default=False, required=False)
     
     def validate_unidad_id(self, value):
         """Validar que la unidad existe"""
@@ -344,3 +359,9 @@ class AnalisisMorosidadSerializer(serializers.Serializer):
             raise serializers.ValidationError("La unidad especificada no existe")
         
         return value
+
+class IngresoQRSerializer(serializers.Serializer):
+    """Serializer para el ingreso de visitantes con código QR"""
+    
+    codigo_qr = serializers.CharField(max_length=100, required=True, trim_whitespace=True)
+    ubicacion = serializers.CharField(max_length=100, default='Portería principal', required=False)
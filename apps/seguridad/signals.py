@@ -0,0 +1,100 @@
+"""
+Señales del módulo de seguridad
+"""
+import functools
+import logging
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import (
+    RegistroVisitante, AccesoVehiculo, RegistroAcceso, IncidenteSeguridad,
+    AnalisisPredictivoMorosidad, ConfiguracionIA
+)
+from . import indice_facial
+from .indice_placas import invalidar_indice_placas
+from .metricas import MODELOS_CONTADOS, nombre_contador, incrementar_contador
+from .resumenes import FUENTES, marcar_dias_pendientes
+from apps.autenticacion.cache_dashboards import conectar_invalidacion
+
+logger = logging.getLogger(__name__)
+
+
+def _registrar_en_indice(visitante_id, vector):
+    try:
+        indice_facial.registrar_visitante(visitante_id, vector)
+    except Exception as e:
+        logger.error(f"Error actualizando índice facial para visitante {visitante_id}: {e}")
+
+
+@receiver(post_save, sender=RegistroVisitante)
+def actualizar_indice_facial(sender, instance, update_fields=None, **kwargs):
+    """Mantiene el índice facial al crear o editar un visitante (al confirmar la transacción)"""
+    if update_fields is not None and 'codificacion_facial' not in update_fields:
+        return
+    transaction.on_commit(functools.partial(_registrar_en_indice, instance.id, instance.vector_facial))
+
+
+@receiver(post_delete, sender=RegistroVisitante)
+def eliminar_de_indice_facial(sender, instance, **kwargs):
+    """Quita al visitante eliminado del índice facial (al confirmar la transacción)"""
+    transaction.on_commit(functools.partial(_registrar_en_indice, instance.id, None))
+
+
+@receiver(post_save, sender=AccesoVehiculo)
+@receiver(post_delete, sender=AccesoVehiculo)
+def invalidar_placas(sender, instance, **kwargs):
+    """Fuerza la recarga del índice de placas en este worker"""
+    invalidar_indice_placas()
+
+
+def sumar_a_contador(sender, created, **kwargs):
+    """Suma la fila creada al total de su tabla en contadores_seguridad"""
+    if created:
+        incrementar_contador(nombre_contador(sender), 1)
+
+
+def restar_de_contador(sender, **kwargs):
+    """Resta la fila eliminada del total de su tabla en contadores_seguridad"""
+    incrementar_contador(nombre_contador(sender), -1)
+
+
+for modelo_contado in MODELOS_CONTADOS.values():
+    post_save.connect(sumar_a_contador, sender=modelo_contado)
+    post_delete.connect(restar_de_contador, sender=modelo_contado)
+
+
+CAMPOS_FECHA_RESUMEN = {fuente.modelo: fuente.campo_fecha for fuente in FUENTES}
+
+
+def recordar_fecha_resumen(sender, instance, update_fields=None, **kwargs):
+    """Guarda la fecha almacenada de una fila existente, por si la edición la mueve de día"""
+    campo = CAMPOS_FECHA_RESUMEN[sender]
+    instance._fecha_resumen_anterior = None
+    if instance._state.adding or (update_fields is not None and campo not in update_fields):
+        return
+    instance._fecha_resumen_anterior = sender._base_manager.filter(
+        pk=instance.pk
+    ).values_list(campo, flat=True).first()
+
+
+def marcar_resumen_pendiente(sender, instance, **kwargs):
+    """Un cambio en un día ya consolidado (o que saca la fila de él) lo deja pendiente de reconsolidar"""
+    marcar_dias_pendientes([
+        getattr(instance, CAMPOS_FECHA_RESUMEN[sender]), getattr(instance, '_fecha_resumen_anterior', None)
+    ])
+
+
+for modelo_resumido in CAMPOS_FECHA_RESUMEN:
+    pre_save.connect(recordar_fecha_resumen, sender=modelo_resumido)
+    post_save.connect(marcar_resumen_pendiente, sender=modelo_resumido)
+    post_delete.connect(marcar_resumen_pendiente, sender=modelo_resumido)
+
+
+# Después de los contadores: la invalidación se aplica cuando ya están actualizados
+conectar_invalidacion(
+    'dashboard_seguridad',
+    RegistroVisitante, RegistroAcceso, IncidenteSeguridad, AccesoVehiculo,
+    AnalisisPredictivoMorosidad, ConfiguracionIA
+)
@@ -0,0 +1,122 @@
+"""
+Motor determinista de similitud facial sobre codificaciones 'face_encoding'.
+
+API NumPy pura (sin dependencias de Django) utilizable desde vistas,
+comandos de gestión y tests:
+
+    resultado = comparar_lote(sonda, candidatos)
+    resultado.similitudes      -> similitud (%) de la sonda contra cada candidato
+    resultado.indice_mejor     -> posición del mejor candidato (o None)
+    resultado.similitud_mejor  -> similitud (%) del mejor candidato
+"""
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+DIMENSION_CODIFICACION = 128
+METRICAS = ('coseno', 'l2')
+
+# Distancia euclidiana a la que la similitud L2 llega a 0 %. Equivale al doble
+# de la tolerancia habitual (0.6) de codificaciones de 128 dimensiones.
+DISTANCIA_MAXIMA_L2 = 1.2
+
+
+class ResultadoComparacion(NamedTuple):
+    similitudes: np.ndarray
+    indice_mejor: Optional[int]
+    similitud_mejor: float
+
+
+def extraer_codificacion(datos_faciales):
+    """
+    Extrae el vector 'face_encoding' de datos_faciales_json.
+    Retorna un arreglo float32 de 128 posiciones o None si no es válido.
+    """
+    if not isinstance(datos_faciales, dict):
+        return None
+    codificacion = datos_faciales.get('face_encoding')
+    if codificacion is None or len(codificacion) == 0:
+        return None
+    try:
+        vector = np.asarray(codificacion, dtype=np.float32)
+    except (TypeError, ValueError):
+        return None
+    if vector.shape != (DIMENSION_CODIFICACION,) or not np.isfinite(vector).all():
+        return None
+    return vector
+
+
+def a_matriz(candidatos):
+    """
+    Convierte candidatos (matriz NumPy, listas de floats o diccionarios
+    datos_faciales_json) a una matriz float32 (n, 128). Los candidatos sin
+    codificación válida quedan como filas de ceros (similitud 0).
+    """
+    if isinstance(candidatos, np.ndarray):
+        return np.asarray(candidatos, dtype=np.float32).reshape(-1, DIMENSION_CODIFICACION)
+    matriz = np.zeros((len(candidatos), DIMENSION_CODIFICACION), dtype=np.float32)
+    for fila, candidato in enumerate(candidatos):
+        if isinstance(candidato, dict):
+            vector = extraer_codificacion(candidato)
+        else:
+            vector = extraer_codificacion({'face_encoding': candidato})
+        if vector is not None:
+            matriz[fila] = vector
+    return matriz
+
+
+def puntuar_matriz(vectores, normas2, sonda, metrica='coseno'):
+    """
+    Puntuación cruda de la sonda contra todas las filas con un único producto
+    matriz-vector. 'coseno' retorna similitud en [-1, 1] (mayor es mejor);
+    'l2' retorna distancia euclidiana (menor es mejor).
+    """
+    if metrica not in METRICAS:
+        raise ValueError(f"Métrica no soportada: {metrica}")
+    productos = vectores @ sonda
+    norma2_sonda = float(sonda @ sonda)
+    if metrica == 'coseno':
+        denominador = np.sqrt(normas2 * norma2_sonda)
+        return np.divide(productos, denominador, out=np.zeros_like(productos), where=denominador > 0)
+    return np.sqrt(np.maximum(normas2 - 2.0 * productos + norma2_sonda, 0.0))
+
+
+def a_porcentaje(puntuaciones, metrica='coseno'):
+    """Convierte puntuaciones crudas a similitud en porcentaje [0, 100]"""
+    puntuaciones = np.asarray(puntuaciones, dtype=np.float32)
+    if metrica == 'coseno':
+        return np.clip(puntuaciones, 0.0, 1.0) * 100.0
+    return np.clip(1.0 - puntuaciones / DISTANCIA_MAXIMA_L2, 0.0, 1.0) * 100.0
+
+
+def comparar_lote(sonda, candidatos, metrica='coseno'):
+    """
+    Compara una codificación contra N candidatos en una sola operación
+    vectorizada y retorna las similitudes (%) y el mejor candidato.
+    """
+    if isinstance(sonda, dict):
+        sonda = extraer_codificacion(sonda)
+    if sonda is None:
+        raise ValueError("La sonda no contiene una codificación facial válida")
+    sonda = np.asarray(sonda, dtype=np.float32).reshape(DIMENSION_CODIFICACION)
+
+    vectores = a_matriz(candidatos)
+    if len(vectores) == 0:
+        return ResultadoComparacion(np.empty(0, dtype=np.float32), None, 0.0)
+
+    normas2 = np.einsum('ij,ij->i', vectores, vectores)
+    similitudes = a_porcentaje(puntuar_matriz(vectores, normas2, sonda, metrica), metrica)
+    indice_mejor = int(np.argmax(similitudes))
+    return ResultadoComparacion(similitudes, indice_mejor, float(similitudes[indice_mejor]))
+
+
+def calcular_similitud_facial(datos1, datos2, metrica='coseno'):
+    """
+    Similitud (%) entre dos conjuntos de datos faciales. Retorna 0.0 si
+    alguno no tiene codificación válida.
+    """
+    vector1 = extraer_codificacion(datos1)
+    vector2 = extraer_codificacion(datos2)
+    if vector1 is None or vector2 is None:
+        return 0.0
+    return comparar_lote(vector1, vector2.reshape(1, -1), metrica).similitud_mejor
@@ -1,15 +1,37 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+import numpy as np
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
 from django.urls import reverse
-from rest_framework.test import APITestCase
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
 from rest_framework import status
 from decimal import Decimal
 from .models import (
     TipoVisitante, RegistroVisitante, AccesoVehiculo, 
     RegistroAcceso, IncidenteSeguridad, ConfiguracionIA,
-    AnalisisPredictivoMorosidad
+    AnalisisPredictivoMorosidad, TrabajoIA
 )
+from . import analisis_video, indice_facial, trabajos
+from .indice_facial import IndiceFacial, AlmacenIndiceFacial
+from .indice_ivf import IndiceIVF, recall_en_k
+from . import indice_placas
+from .indice_placas import IndicePlacas, distancia_ponderada
+from .preprocesamiento import preprocesar_imagen, region_desde_porcentajes
+from .similitud_facial import comparar_lote, calcular_similitud_facial
+from .views import RegistroAccesoListCreateView, StandardResultsSetPagination
 from apps.autenticacion.models import PerfilUsuario
+from apps.autenticacion.paginacion import MODO_PAGINA, MODO_CURSOR
+from apps.finanzas.models import UnidadHabitacional
 
 Usuario = get_user_model()
 
@@ -154,3 +176,1326 @@ class SeguridadUtilsTest(TestCase):
         self.assertEqual(str(analisis), 'Análisis - 201 - alto')
         self.assertEqual(analisis.nivel_riesgo, 'alto')
         self.assertEqual(analisis.probabilidad_morosidad, Decimal('0.75'))
+
+
+class IndiceFacialTest(TestCase):
+    """Tests para el índice vectorial de reconocimiento facial"""
+    
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+        self.vectores = self.rng.standard_normal((500, 128)).astype(np.float32)
+        self.ids = np.arange(1000, 1500, dtype=np.int64)
+        self.indice = IndiceFacial()
+        for visitante_id, vector in zip(self.ids, self.vectores):
+            self.indice.agregar(visitante_id, vector)
+    
+    def test_busqueda_coseno_igual_a_fuerza_bruta(self):
+        """Test de top-k por coseno contra el cálculo directo"""
+        consulta = self.rng.standard_normal(128).astype(np.float32)
+        ids, similitudes = self.indice.buscar(consulta, k=5, metrica='coseno')
+        
+        normas = np.linalg.norm(self.vectores, axis=1) * np.linalg.norm(consulta)
+        esperadas = (self.vectores @ consulta) / normas
+        orden = np.argsort(-esperadas)[:5]
+        self.assertEqual(list(ids), list(self.ids[orden]))
+        np.testing.assert_allclose(similitudes, esperadas[orden], rtol=1e-5)
+    
+    def test_busqueda_l2_encuentra_vector_exacto(self):
+        """Test de búsqueda L2 de un vector indexado"""
+        ids, distancias = self.indice.buscar(self.vectores[17], k=1, metrica='l2')
+        self.assertEqual(ids[0], self.ids[17])
+        self.assertAlmostEqual(float(distancias[0]), 0.0, places=2)
+    
+    def test_actualizacion_y_eliminacion(self):
+        """Test de edición y baja incremental"""
+        nuevo = self.rng.standard_normal(128).astype(np.float32)
+        self.indice.agregar(1003, nuevo)
+        self.assertEqual(len(self.indice), 500)
+        self.assertEqual(self.indice.buscar(nuevo, k=1)[0][0], 1003)
+        
+        self.assertTrue(self.indice.eliminar(1003))
+        self.assertFalse(self.indice.eliminar(1003))
+        self.assertEqual(len(self.indice), 499)
+        self.assertNotIn(1003, self.indice)
+        self.assertEqual(self.indice.buscar(self.vectores[499], k=1)[0][0], 1499)
+    
+    def test_persistencia_mmap_y_diario(self):
+        """Test de instantánea con memory-map más diario de cambios"""
+        with tempfile.TemporaryDirectory() as directorio:
+            almacen = AlmacenIndiceFacial(directorio)
+            with almacen.bloqueo():
+                version = almacen.guardar(self.indice)
+            
+            cargado = almacen.cargar(version)
+            self.assertIsInstance(cargado.vectores, np.memmap)
+            self.assertEqual(len(cargado), 500)
+            
+            nuevo = self.rng.standard_normal(128).astype(np.float32)
+            almacen.registrar_cambio(2000, nuevo)
+            almacen.registrar_cambio(1000, None)
+            registros, desplazamiento = almacen.leer_diario(version)
+            indice_facial.aplicar_diario(cargado, registros)
+            
+            self.assertEqual(len(cargado), 500)
+            self.assertIn(2000, cargado)
+            self.assertNotIn(1000, cargado)
+            self.assertEqual(almacen.leer_diario(version, desplazamiento)[0].size, 0)
+    
+    def test_nueva_instantanea_conserva_la_anterior(self):
+        """Test de que un worker que leyó ACTUAL todavía puede abrir la versión previa"""
+        with tempfile.TemporaryDirectory() as directorio:
+            almacen = AlmacenIndiceFacial(directorio)
+            with almacen.bloqueo():
+                primera = almacen.guardar(self.indice)
+                segunda = almacen.guardar(self.indice)
+                tercera = almacen.guardar(self.indice)
+            
+            self.assertEqual(len(almacen.cargar(segunda)), 500)
+            self.assertEqual(almacen.version_actual(), tercera)
+            self.assertFalse(os.path.exists(os.path.join(directorio, primera)))
+    
+    def test_baja_de_alta_registrada_por_otro_worker(self):
+        """Test de que la baja se escribe aunque este worker no haya leído el alta del diario"""
+        nuevo = self.rng.standard_normal(128).astype(np.float32)
+        with tempfile.TemporaryDirectory() as directorio:
+            with override_settings(INDICE_FACIAL_DIR=directorio):
+                almacen = indice_facial.obtener_almacen()
+                with almacen.bloqueo():
+                    almacen.guardar(self.indice)
+                indice_facial._estado_proceso.invalidar()
+                indice_facial.obtener_indice()
+                
+                # Otro worker registra el alta directamente en el diario compartido
+                almacen.registrar_cambio(3000, nuevo)
+                indice_facial.registrar_visitante(3000, None)
+                # Volver a la codificación ya indexada no agrega registros
+                indice_facial.registrar_visitante(1000, self.vectores[0])
+                
+                registros, _ = almacen.leer_diario(almacen.version_actual())
+                self.assertEqual(
+                    list(registros['operacion']), [indice_facial.OPERACION_ALTA, indice_facial.OPERACION_BAJA]
+                )
+                self.assertNotIn(3000, indice_facial.obtener_indice())
+            indice_facial._estado_proceso.invalidar()
+    
+    def test_reconstruccion_conserva_cambios_confirmados_durante_la_lectura(self):
+        """Test de que la reconstrucción reaplica el diario escrito mientras leía la base de datos"""
+        nuevo = self.rng.standard_normal(128).astype(np.float32)
+        with tempfile.TemporaryDirectory() as directorio:
+            with override_settings(INDICE_FACIAL_DIR=directorio):
+                almacen = indice_facial.obtener_almacen()
+                with almacen.bloqueo():
+                    almacen.guardar(self.indice)
+                almacen.registrar_cambio(1001, None)
+                
+                def leer_bd():
+                    # Cambios confirmados después de que la lectura tomó su foto de la base de datos
+                    almacen.registrar_cambio(3000, nuevo)
+                    almacen.registrar_cambio(1002, None)
+                    return IndiceFacial.desde_arreglos(self.ids.copy(), self.vectores.copy())
+                
+                with mock.patch.object(indice_facial, 'construir_indice_desde_bd', side_effect=leer_bd):
+                    indice_facial.reconstruir_indice()
+                
+                indice = almacen.cargar(almacen.version_actual())
+                self.assertIn(3000, indice)
+                self.assertNotIn(1002, indice)
+                # Los registros anteriores a la lectura no se reaplican: ahí manda la base de datos
+                self.assertIn(1001, indice)
+            indice_facial._estado_proceso.invalidar()
+    
+    def test_obtener_indice_sin_instantanea_construye_desde_bd(self):
+        """Test de construcción inicial del índice desde la base de datos"""
+        with tempfile.TemporaryDirectory() as directorio:
+            with override_settings(INDICE_FACIAL_DIR=directorio):
+                indice_facial._estado_proceso.invalidar()
+                indice = indice_facial.obtener_indice()
+                self.assertEqual(len(indice), 0)
+                self.assertTrue(indice_facial.obtener_almacen().existe())
+            indice_facial._estado_proceso.invalidar()
+
+
+class SimilitudFacialTest(TestCase):
+    """Tests para el motor de similitud facial"""
+    
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.candidatos = rng.standard_normal((50, 128)).astype(np.float32)
+    
+    def test_comparar_lote_identifica_mejor_candidato(self):
+        """Test de comparación por lote contra N candidatos"""
+        sonda = self.candidatos[23] + 0.01
+        resultado = comparar_lote(sonda, self.candidatos)
+        self.assertEqual(resultado.similitudes.shape, (50,))
+        self.assertEqual(resultado.indice_mejor, 23)
+        self.assertGreater(resultado.similitud_mejor, 99.0)
+    
+    def test_resultado_determinista(self):
+        """Test de que la misma entrada produce el mismo resultado"""
+        datos1 = {'face_encoding': self.candidatos[0].tolist()}
+        datos2 = {'face_encoding': self.candidatos[1].tolist()}
+        self.assertEqual(
+            calcular_similitud_facial(datos1, datos2),
+            calcular_similitud_facial(datos1, datos2)
+        )
+        self.assertAlmostEqual(calcular_similitud_facial(datos1, datos1), 100.0, places=3)
+    
+    def test_acepta_datos_faciales_json(self):
+        """Test de candidatos en formato datos_faciales_json"""
+        candidatos = [{'face_encoding': vector.tolist()} for vector in self.candidatos[:3]]
+        candidatos.append({})
+        resultado = comparar_lote(candidatos[2], candidatos, metrica='l2')
+        self.assertEqual(resultado.indice_mejor, 2)
+        self.assertEqual(resultado.similitudes[3], 0.0)
+    
+    def test_sin_codificacion(self):
+        """Test de datos faciales sin codificación"""
+        self.assertEqual(calcular_similitud_facial({}, {'face_encoding': [0.1] * 128}), 0.0)
+        with self.assertRaises(ValueError):
+            comparar_lote({}, self.candidatos)
+
+
+class CodificacionBinariaTest(TestCase):
+    """Tests para el almacenamiento binario de codificaciones faciales"""
+    
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            username='guardia', email='guardia@example.com', password='testpass123'
+        )
+        self.unidad = UnidadHabitacional.objects.create(
+            numero_unidad='101', edificio='A', propietario=self.usuario,
+            area_m2=Decimal('80.00'), dormitorios=2
+        )
+        self.tipo_visitante = TipoVisitante.objects.create(nombre='Familiar')
+        self.codificacion = np.linspace(-1, 1, 128, dtype=np.float32)
+    
+    def crear_visitante(self, **kwargs):
+        return RegistroVisitante.objects.create(
+            nombres='Ana', apellidos='Rojas', tipo_visitante=self.tipo_visitante,
+            unidad_destino=self.unidad, motivo_visita='Visita',
+            registrado_por=self.usuario, **kwargs
+        )
+    
+    def test_codificacion_se_empaqueta_al_guardar(self):
+        """Test de que face_encoding pasa del JSON al campo binario"""
+        visitante = self.crear_visitante(datos_faciales_json={
+            'face_encoding': self.codificacion.tolist(), 'face_bbox': [1, 2, 3, 4]
+        })
+        visitante.refresh_from_db()
+        
+        self.assertEqual(visitante.datos_faciales_json, {'face_bbox': [1, 2, 3, 4]})
+        self.assertEqual(len(visitante.codificacion_facial), 128 * 4)
+        np.testing.assert_array_equal(visitante.vector_facial, self.codificacion)
+        self.assertFalse(visitante.vector_facial.flags.writeable)
+    
+    def test_indice_se_construye_desde_campo_binario(self):
+        """Test de construcción del índice a partir de codificaciones binarias"""
+        visitante = self.crear_visitante()
+        visitante.vector_facial = self.codificacion
+        visitante.save()
+        self.crear_visitante(datos_faciales_json={'face_bbox': [0, 0, 1, 1]})
+        
+        indice = indice_facial.construir_indice_desde_bd()
+        self.assertEqual(list(indice.ids), [visitante.id])
+        np.testing.assert_array_equal(indice.obtener_vector(visitante.id), self.codificacion)
+    
+    def test_borrar_datos_faciales_elimina_la_codificacion(self):
+        """Test de que vaciar el JSON quita también el vector guardado"""
+        visitante = self.crear_visitante(datos_faciales_json={
+            'face_encoding': self.codificacion.tolist(), 'face_bbox': [1, 2, 3, 4]
+        })
+        visitante = RegistroVisitante.objects.get(id=visitante.id)
+        visitante.estado = 'autorizado'
+        visitante.save()
+        self.assertIsNotNone(RegistroVisitante.objects.get(id=visitante.id).codificacion_facial)
+        
+        visitante.datos_faciales_json = {}
+        visitante.save(update_fields=['datos_faciales_json'])
+        
+        self.assertIsNone(RegistroVisitante.objects.get(id=visitante.id).codificacion_facial)
+        self.assertEqual(list(indice_facial.construir_indice_desde_bd().ids), [])
+    
+    def test_update_fields_guarda_la_codificacion(self):
+        """Test de que update_fields con el JSON también escribe el campo binario"""
+        visitante = self.crear_visitante()
+        visitante.datos_faciales_json = {'face_encoding': self.codificacion.tolist()}
+        visitante.save(update_fields=['datos_faciales_json'])
+        
+        visitante.refresh_from_db()
+        self.assertEqual(visitante.datos_faciales_json, {})
+        np.testing.assert_array_equal(visitante.vector_facial, self.codificacion)
+    
+    def test_indice_se_actualiza_al_confirmar(self):
+        """Test de que el diario del índice solo recibe cambios confirmados"""
+        with mock.patch.object(indice_facial, 'registrar_visitante') as registrar:
+            with self.captureOnCommitCallbacks() as pendientes:
+                try:
+                    with transaction.atomic():
+                        self.crear_visitante(datos_faciales_json={'face_encoding': self.codificacion.tolist()})
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+            self.assertEqual(pendientes, [])
+            
+            with self.captureOnCommitCallbacks(execute=True):
+                visitante = self.crear_visitante(datos_faciales_json={'face_encoding': self.codificacion.tolist()})
+                registrar.assert_not_called()
+            registrar.assert_called_once()
+            self.assertEqual(registrar.call_args.args[0], visitante.id)
+
+
+class IndiceIVFTest(TestCase):
+    """Tests para la búsqueda aproximada IVF del índice facial"""
+    
+    def setUp(self):
+        self.rng = np.random.default_rng(7)
+        centros = self.rng.standard_normal((20, 128)).astype(np.float32)
+        self.vectores = (
+            centros[self.rng.integers(0, 20, 2000)]
+            + self.rng.standard_normal((2000, 128)).astype(np.float32) * 0.3
+        )
+        self.ids = np.arange(1, 2001, dtype=np.int64)
+        self.indice = IndiceFacial.desde_arreglos(self.ids, self.vectores)
+    
+    def test_todas_las_listas_equivale_a_busqueda_exacta(self):
+        """Test de que sondear todas las listas da el resultado exacto"""
+        ivf = IndiceIVF.construir(self.ids, self.vectores, n_listas=16)
+        consulta = self.rng.standard_normal(128).astype(np.float32)
+        
+        ids_exactos, puntuaciones_exactas = self.indice.buscar(consulta, k=10)
+        ids, puntuaciones = ivf.buscar(consulta, k=10, n_sondeos=16)
+        self.assertEqual(list(ids), list(ids_exactos))
+        np.testing.assert_allclose(puntuaciones, puntuaciones_exactas, rtol=1e-5)
+    
+    def test_recall_con_pocos_sondeos(self):
+        """Test de recall@10 con una fracción de las listas"""
+        ivf = IndiceIVF.construir(self.ids, self.vectores, n_listas=32)
+        recalls = []
+        for fila in self.rng.integers(0, 2000, 20):
+            ids_exactos, _ = self.indice.buscar(self.vectores[fila], k=10)
+            ids, _ = ivf.buscar(self.vectores[fila], k=10, n_sondeos=4)
+            recalls.append(recall_en_k(ids_exactos, ids))
+        self.assertGreaterEqual(np.mean(recalls), 0.9)
+    
+    def test_modo_ivf_puntua_exacto_los_cambios_del_diario(self):
+        """Test de que los visitantes del diario se encuentran en modo IVF"""
+        configuracion = dict(indice_facial.CONFIGURACION_BUSQUEDA_POR_DEFECTO)
+        configuracion.update({'modo_busqueda': 'ivf', 'ivf_listas': 8, 'ivf_minimo_rostros': 0})
+        nuevo = self.rng.standard_normal(128).astype(np.float32)
+        
+        with tempfile.TemporaryDirectory() as directorio:
+            with override_settings(INDICE_FACIAL_DIR=directorio):
+                almacen = indice_facial.obtener_almacen()
+                with almacen.bloqueo():
+                    version = almacen.guardar(self.indice)
+                indice_facial._estado_proceso.invalidar()
+                
+                # Las consultas no entrenan el IVF: hasta que el comando lo prepara, la búsqueda es exacta
+                ids, _ = indice_facial.buscar_visitantes(self.vectores[3], k=1, configuracion=configuracion)
+                self.assertEqual(ids[0], self.ids[3])
+                self.assertFalse(os.path.exists(almacen.ruta_ivf(version, 8)))
+                indice_facial.preparar_ivf(configuracion)
+                self.assertTrue(os.path.exists(almacen.ruta_ivf(version, 8)))
+                
+                indice_facial.registrar_visitante(5000, nuevo)
+                indice_facial.registrar_visitante(1, None)
+                ids, similitudes = indice_facial.buscar_visitantes(nuevo, k=3, configuracion=configuracion)
+                self.assertEqual(ids[0], 5000)
+                self.assertAlmostEqual(float(similitudes[0]), 100.0, places=3)
+                
+                ids, _ = indice_facial.buscar_visitantes(self.vectores[0], k=5, configuracion=configuracion)
+                self.assertNotIn(1, list(ids))
+            indice_facial._estado_proceso.invalidar()
+            indice_facial._estado_proceso.ivf = None
+
+
+class IndicePlacasTest(TestCase):
+    """Tests para el índice de placas tolerante a errores de OCR"""
+    
+    def setUp(self):
+        self.indice = IndicePlacas([
+            (1, '1234-ABC'), (2, '1234-ABC'), (3, '5678-XYZ'), (4, '9012-KLM'),
+        ])
+    
+    def test_coincidencia_exacta_con_placa_repetida(self):
+        """Test de placa registrada en dos unidades"""
+        candidatos = self.indice.buscar('1234abc')
+        self.assertEqual([c.vehiculo_id for c in candidatos], [1, 2])
+        self.assertTrue(all(c.coincidencia_exacta and c.confianza == 100.0 for c in candidatos))
+    
+    def test_confusiones_de_ocr(self):
+        """Test de 0/O, 8/B y 1/I confundidos por el OCR"""
+        candidato = self.indice.buscar('I234-A8C')[0]
+        self.assertEqual(candidato.placa, '1234ABC')
+        self.assertFalse(candidato.coincidencia_exacta)
+        self.assertGreater(candidato.confianza, 90.0)
+        self.assertEqual(self.indice.buscar('9O12KLM')[0].vehiculo_id, 4)
+    
+    def test_errores_de_edicion(self):
+        """Test de caracteres faltantes o cambiados"""
+        self.assertEqual(self.indice.buscar('5678XY')[0].vehiculo_id, 3)
+        self.assertEqual(self.indice.buscar('5678-XWZ')[0].vehiculo_id, 3)
+        self.assertEqual(self.indice.buscar('56-XYZ')[0].vehiculo_id, 3)
+        self.assertEqual(self.indice.buscar('0000-QQQ'), [])
+    
+    def test_distancia_ponderada(self):
+        """Test de costo reducido para caracteres confundibles"""
+        self.assertEqual(distancia_ponderada('1234ABC', '1234ABC'), 0.0)
+        self.assertEqual(distancia_ponderada('1234ABC', '1234A8C'), 0.25)
+        self.assertEqual(distancia_ponderada('1234ABC', '1234AXC'), 1.0)
+    
+    def test_invalidacion_por_senal(self):
+        """Test de recarga del índice al registrar un vehículo"""
+        usuario = Usuario.objects.create_user(
+            username='propietario', email='propietario@example.com', password='testpass123'
+        )
+        unidad = UnidadHabitacional.objects.create(
+            numero_unidad='101', edificio='A', propietario=usuario,
+            area_m2=Decimal('80.00'), dormitorios=2
+        )
+        indice_placas.invalidar_indice_placas()
+        self.assertEqual(indice_placas.buscar_placa('3456-DEF'), [])
+        
+        vehiculo = AccesoVehiculo.objects.create(
+            placa_vehiculo='3456-DEF', propietario=usuario,
+            unidad_asignada=unidad, registrado_por=usuario
+        )
+        self.assertEqual(indice_placas.buscar_placa('3456-DEF')[0].vehiculo_id, vehiculo.id)
+        
+        vehiculo.delete()
+        self.assertEqual(indice_placas.buscar_placa('3456-DEF'), [])
+
+
+class PreprocesamientoImagenTest(TestCase):
+    """Tests para el preprocesamiento de imágenes de los endpoints de IA"""
+    
+    def crear_subida(self, tamano=(1600, 1200), formato='JPEG', nombre='foto.jpg'):
+        buffer = BytesIO()
+        Image.new('RGB', tamano, (200, 30, 30)).save(buffer, formato)
+        return SimpleUploadedFile(nombre, buffer.getvalue())
+    
+    def test_redimensiona_al_tamano_del_modelo(self):
+        """Test de normalización al tamaño de entrada y liberación del buffer"""
+        subida = self.crear_subida()
+        entrada = preprocesar_imagen(subida, (160, 160))
+        
+        self.assertEqual(entrada.imagen.size, (160, 160))
+        self.assertEqual(entrada.tamano_original, (1600, 1200))
+        self.assertEqual(entrada.region, (200, 0, 1400, 1200))
+        self.assertEqual(entrada.a_arreglo().shape, (160, 160, 3))
+        self.assertTrue(subida.closed)
+    
+    def test_recorte_de_region_en_escala_de_grises(self):
+        """Test de recorte a la zona de análisis"""
+        subida = self.crear_subida(formato='PNG', nombre='camara.png')
+        region = region_desde_porcentajes([0, 0, 50, 50], (1600, 1200))
+        entrada = preprocesar_imagen(subida, (320, 96), region=region, modo='L')
+        
+        self.assertEqual(region, (0, 0, 800, 600))
+        self.assertEqual(entrada.imagen.mode, 'L')
+        self.assertEqual(entrada.imagen.size, (320, 96))
+        self.assertEqual(entrada.region, (0, 180, 800, 420))
+    
+    def test_archivo_que_no_es_imagen(self):
+        """Test de videos u otros archivos"""
+        subida = SimpleUploadedFile('clip.mp4', b'\x00\x00\x00\x18ftypmp42')
+        self.assertIsNone(preprocesar_imagen(subida, (224, 224)))
+        self.assertFalse(subida.closed)
+        self.assertIsNone(region_desde_porcentajes([10, 10, 10, 50], (100, 100)))
+    
+    def test_imagen_demasiado_grande_responde_400(self):
+        """Test de que los endpoints rechazan con 400 las imágenes que exceden PIXELES_MAXIMOS"""
+        usuario = Usuario.objects.create_user(
+            username='guardia', email='guardia@example.com', password='testpass123'
+        )
+        cliente = APIClient()
+        cliente.force_authenticate(user=usuario)
+        
+        with mock.patch('apps.seguridad.preprocesamiento.PIXELES_MAXIMOS', 1000):
+            for nombre in ['reconocimiento-facial', 'ocr-placa']:
+                with self.subTest(nombre=nombre):
+                    response = cliente.post(reverse(nombre), {'imagen': self.crear_subida()}, format='multipart')
+                    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                    self.assertIn('píxeles', response.data['error'])
+
+
+def crear_video_gif(cantidad_frames, frames_con_movimiento=None):
+    """GIF animado de prueba: un bloque que se desplaza en los frames indicados"""
+    frames_con_movimiento = frames_con_movimiento or range(cantidad_frames)
+    frames = []
+    for indice in range(cantidad_frames):
+        frame = np.full((240, 320), 40, dtype=np.uint8)
+        posicion = 10 * indice if indice in frames_con_movimiento else 0
+        frame[80:140, posicion:posicion + 60] = 220
+        # Ruido leve para que el GIF no fusione frames idénticos
+        frame[0, indice % 320] = 41
+        frames.append(Image.fromarray(frame))
+    buffer = BytesIO()
+    frames[0].save(buffer, 'GIF', save_all=True, append_images=frames[1:], duration=40)
+    return buffer.getvalue()
+
+
+class AnalisisVideoTest(TestCase):
+    """Tests para el motor de muestreo de frames"""
+    
+    def test_muestreo_y_descarte_de_segmentos_estaticos(self):
+        """Test de paso de muestreo y filtro por movimiento"""
+        video = BytesIO(crear_video_gif(30, frames_con_movimiento=range(10, 20)))
+        resultado = analisis_video.analizar_video(video, paso=2, paralelo=False)
+        
+        self.assertEqual(resultado['frames_totales'], 30)
+        self.assertEqual(resultado['frames_muestreados'], 15)
+        indices = [frame['indice'] for frame in resultado['frames']]
+        self.assertEqual(indices, [0, 10, 12, 14, 16, 18, 20])
+        self.assertEqual(resultado['frames_analizados'], 7)
+        self.assertGreater(resultado['fps_procesamiento'], 0)
+    
+    def test_pool_de_procesos_da_el_mismo_resultado(self):
+        """Test de análisis paralelo por lotes"""
+        contenido = crear_video_gif(40)
+        secuencial = analisis_video.analizar_video(BytesIO(contenido), paso=1, paralelo=False)
+        with mock.patch.object(analisis_video, 'cpus_disponibles', return_value=2):
+            paralelo = analisis_video.analizar_video(BytesIO(contenido), paso=1)
+        
+        self.assertEqual(paralelo['procesos_analisis'], 2)
+        self.assertEqual(paralelo['frames'], secuencial['frames'])
+    
+    def test_formato_no_soportado(self):
+        """Test de archivo que no es un video decodificable"""
+        with self.assertRaises(ValueError):
+            analisis_video.analizar_video(BytesIO(b'\x00\x00\x00\x18ftypmp42'))
+
+
+class TrabajoIATest(APITestCase):
+    """Tests para la cola de trabajos de IA (detección de anomalías en video)"""
+    
+    def setUp(self):
+        self.directorio_media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio_media.cleanup)
+        configuracion = override_settings(MEDIA_ROOT=self.directorio_media.name)
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+        
+        self.usuario = Usuario.objects.create_user(
+            username='guardia', email='guardia@example.com', password='testpass123'
+        )
+        PerfilUsuario.objects.create(usuario=self.usuario, rol='seguridad')
+        self.client.force_authenticate(user=self.usuario)
+        cache.clear()
+    
+    def encolar_video(self):
+        video = SimpleUploadedFile('camara.gif', crear_video_gif(12))
+        return self.client.post(reverse('detectar-anomalias'), {
+            'imagen_o_video': video, 'tipo_analisis': 'presencia'
+        }, format='multipart')
+    
+    def test_video_se_encola_y_procesa(self):
+        """Test de 202, procesamiento por el worker y consulta de estado"""
+        response = self.encolar_video()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        trabajo_id = response.data['trabajo_id']
+        self.assertEqual(TrabajoIA.objects.get(id=trabajo_id).estado, 'pendiente')
+        
+        trabajo = trabajos.tomar_trabajo('test')
+        self.assertEqual(trabajo.id, trabajo_id)
+        self.assertIsNone(trabajos.tomar_trabajo('test'))
+        trabajos.procesar_trabajo(trabajo)
+        
+        response = self.client.get(reverse('trabajo-ia-detail', args=[trabajo_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['trabajo']['estado'], 'completado')
+        self.assertIn('confianza', response.data['trabajo']['resultado'])
+        self.assertEqual(response.data['trabajo']['parametros']['tipo_analisis'], 'presencia')
+    
+    def test_reintentos_y_fallo(self):
+        """Test de reintento ante errores hasta MAX_INTENTOS"""
+        self.encolar_video()
+        procesadores = dict(trabajos.PROCESADORES)
+        trabajos.PROCESADORES['deteccion_anomalias'] = trabajos.Procesador(
+            lambda trabajo, latido: 1 / 0, procesadores['deteccion_anomalias'].registrar
+        )
+        self.addCleanup(trabajos.PROCESADORES.update, procesadores)
+        
+        for _ in range(trabajos.MAX_INTENTOS):
+            trabajo = trabajos.procesar_trabajo(trabajos.tomar_trabajo('test'))
+        self.assertEqual(trabajo.estado, 'fallido')
+        self.assertEqual(trabajo.intentos, trabajos.MAX_INTENTOS)
+        self.assertIsNone(trabajos.tomar_trabajo('test'))
+    
+    def test_trabajo_largo_late_y_no_se_reencola(self):
+        """Test de que un trabajo que sigue latiendo no se da por abandonado"""
+        self.encolar_video()
+        trabajo = trabajos.tomar_trabajo('test')
+        hace_una_hora = timezone.now() - timedelta(hours=1)
+        TrabajoIA.objects.filter(id=trabajo.id).update(fecha_inicio=hace_una_hora, fecha_actualizacion=hace_una_hora)
+        
+        trabajos.Latido(trabajo, intervalo=timedelta(0))()
+        self.assertEqual(trabajos.recuperar_trabajos_abandonados(), (0, 0))
+        self.assertEqual(TrabajoIA.objects.get(id=trabajo.id).estado, 'procesando')
+    
+    def test_resultado_de_trabajo_retomado_se_descarta(self):
+        """Test de que un worker que perdió el trabajo no escribe el resultado ni crea incidentes"""
+        self.encolar_video()
+        primero = trabajos.tomar_trabajo('lento')
+        TrabajoIA.objects.filter(id=primero.id).update(fecha_actualizacion=timezone.now() - timedelta(hours=1))
+        self.assertEqual(trabajos.recuperar_trabajos_abandonados(), (1, 0))
+        segundo = trabajos.tomar_trabajo('rapido')
+        
+        procesadores = dict(trabajos.PROCESADORES)
+        registrar = mock.Mock(return_value=None)
+        trabajos.PROCESADORES['deteccion_anomalias'] = trabajos.Procesador(
+            lambda trabajo, latido: {'worker': trabajo.worker}, registrar
+        )
+        self.addCleanup(trabajos.PROCESADORES.update, procesadores)
+        
+        trabajos.procesar_trabajo(primero)
+        self.assertEqual(TrabajoIA.objects.get(id=primero.id).estado, 'procesando')
+        trabajos.procesar_trabajo(segundo)
+        
+        trabajo = TrabajoIA.objects.get(id=primero.id)
+        self.assertEqual(trabajo.estado, 'completado')
+        self.assertEqual(trabajo.resultado, {'worker': 'rapido'})
+        registrar.assert_called_once()
+    
+    def test_estado_de_trabajo_ajeno(self):
+        """Test de que un residente no ve trabajos de otros usuarios"""
+        trabajo_id = self.encolar_video().data['trabajo_id']
+        residente = Usuario.objects.create_user(
+            username='residente', email='residente@example.com', password='testpass123'
+        )
+        PerfilUsuario.objects.create(usuario=residente, rol='residente')
+        self.client.force_authenticate(user=residente)
+        response = self.client.get(reverse('trabajo-ia-detail', args=[trabajo_id]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class IngestaMasivaAccesosTest(APITestCase):
+    """Tests para la ingesta masiva de eventos de acceso"""
+    
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            username='controlador', email='controlador@example.com', password='testpass123'
+        )
+        PerfilUsuario.objects.create(usuario=self.usuario, rol='seguridad')
+        self.client.force_authenticate(user=self.usuario)
+        self.url = reverse('accesos-ingesta-masiva')
+    
+    def evento(self, **kwargs):
+        evento = {
+            'usuario': self.usuario.id, 'tipo_acceso': 'entrada', 'metodo_acceso': 'tarjeta',
+            'ubicacion': 'Puerta Principal', 'fecha_hora': '2026-03-01T08:15:00-04:00'
+        }
+        evento.update(kwargs)
+        return evento
+    
+    def test_arreglo_json_con_estado_por_fila(self):
+        """Test de inserción parcial con errores por evento"""
+        eventos = [
+            self.evento(),
+            self.evento(tipo_acceso='teletransporte'),
+            self.evento(usuario=999999, fecha_hora='ayer'),
+            self.evento(tipo_acceso='salida', datos_biometricos={'face_encoding': [0.5] * 128}),
+        ]
+        response = self.client.post(self.url, eventos, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['insertados'], 2)
+        estados = [resultado['estado'] for resultado in response.data['resultados']]
+        self.assertEqual(estados, ['creado', 'rechazado', 'rechazado', 'creado'])
+        self.assertIn('tipo_acceso', response.data['resultados'][1]['errores'])
+        self.assertEqual(
+            set(response.data['resultados'][2]['errores']), {'usuario', 'fecha_hora'}
+        )
+        
+        registro = RegistroAcceso.objects.get(id=response.data['resultados'][0]['id'])
+        self.assertEqual(registro.fecha_hora.isoformat(), '2026-03-01T12:15:00+00:00')
+        salida = RegistroAcceso.objects.get(id=response.data['resultados'][3]['id'])
+        self.assertEqual(len(salida.vector_biometrico), 128)
+    
+    def test_ndjson(self):
+        """Test de eventos enviados como NDJSON"""
+        import json
+        cuerpo = '\n'.join(json.dumps(self.evento(ubicacion=f'Puerta {i}')) for i in range(50))
+        response = self.client.post(self.url, cuerpo, content_type='application/x-ndjson')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['insertados'], 50)
+        self.assertEqual(RegistroAcceso.objects.count(), 50)
+    
+    def test_lote_sin_eventos_validos(self):
+        """Test de lote completamente rechazado"""
+        response = self.client.post(self.url, [{'tipo_acceso': 'entrada'}, 5], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(RegistroAcceso.objects.count(), 0)
+        
+        response = self.client.post(self.url, {'tipo_acceso': 'entrada'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PaginacionListadoAccesosTest(TestCase):
+    """Tests de la paginación del listado de accesos"""
+    
+    def test_pagina_por_numero_salvo_que_se_pida_cursor(self):
+        """Test de que el listado de accesos conserva la paginación por página por defecto"""
+        for parametros, modo in [({}, MODO_PAGINA), ({'paginacion': 'cursor'}, MODO_CURSOR)]:
+            paginador = StandardResultsSetPagination()
+            solicitud = Request(APIRequestFactory().get('/', parametros))
+            paginador.paginate_queryset(
+                RegistroAcceso.objects.order_by('-fecha_hora'), solicitud, view=RegistroAccesoListCreateView()
+            )
+            self.assertEqual(paginador.modo, modo)
+
+
+class ParticionesAccesosTest(TestCase):
+    """Tests del particionamiento mensual de registros_accesos"""
+    
+    def test_nombres_y_meses_a_crear(self):
+        """Test de nombres de partición y meses creados por adelantado"""
+        from datetime import date
+        from .particiones import meses_a_crear, nombre_particion, mes_de_particion
+        
+        meses = meses_a_crear(date(2026, 11, 17), meses_futuros=3)
+        self.assertEqual(meses, [date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1), date(2027, 2, 1)])
+        self.assertEqual(nombre_particion(meses[2]), 'registros_accesos_p2027_01')
+        self.assertEqual(mes_de_particion('registros_accesos_p2027_01'), date(2027, 1, 1))
+        self.assertIsNone(mes_de_particion('registros_accesos_defecto'))
+    
+    def test_particiones_vencidas(self):
+        """Test de la ventana de retención (el mes actual cuenta)"""
+        from datetime import date
+        from .particiones import particiones_vencidas
+        
+        nombres = [
+            'registros_accesos_defecto', 'registros_accesos_p2026_08',
+            'registros_accesos_p2026_07', 'registros_accesos_p2026_09', 'registros_accesos_p2026_10',
+        ]
+        vencidas = particiones_vencidas(nombres, date(2026, 10, 17), retencion_meses=3)
+        self.assertEqual(vencidas, ['registros_accesos_p2026_07'])
+    
+    def test_rango_mes_en_zona_horaria_local(self):
+        """Test de límites del mes a medianoche local"""
+        from datetime import date
+        from .particiones import rango_mes
+        
+        inicio, fin = rango_mes(date(2026, 12, 1))
+        self.assertEqual(inicio.isoformat(), '2026-12-01T00:00:00-04:00')
+        self.assertEqual(fin.isoformat(), '2027-01-01T00:00:00-04:00')
+    
+    def test_comando_sin_postgresql(self):
+        """Test del comando en motores sin particionamiento"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        salida = StringIO()
+        call_command('gestionar_particiones_accesos', stdout=salida)
+        self.assertIn('solo está disponible en PostgreSQL', salida.getvalue())
+
+
+class MetricasDashboardTest(APITestCase):
+    """Tests de las métricas del dashboard y los contadores por tabla"""
+    
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            username='guardia', email='guardia@example.com', password='testpass123'
+        )
+        PerfilUsuario.objects.create(usuario=self.usuario, rol='seguridad')
+        self.client.force_authenticate(user=self.usuario)
+        cache.clear()
+    
+    def crear_incidente(self, **kwargs):
+        datos = {
+            'titulo': 'Incidente', 'descripcion': 'Descripción', 'tipo_incidente': 'otro',
+            'ubicacion': 'Portería', 'fecha_incidente': timezone.now(), 'reportado_por': self.usuario
+        }
+        datos.update(kwargs)
+        return IncidenteSeguridad.objects.create(**datos)
+    
+    def test_contadores_mantenidos_por_senales_e_ingesta(self):
+        """Test de totales actualizados al confirmar cada transacción"""
+        from .ingesta_accesos import ingerir_eventos
+        from .metricas import metricas_dashboard
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            incidente = self.crear_incidente()
+            self.crear_incidente()
+        with self.captureOnCommitCallbacks(execute=True):
+            ingerir_eventos([
+                {'usuario': self.usuario.id, 'tipo_acceso': 'entrada', 'metodo_acceso': 'tarjeta',
+                 'ubicacion': 'Puerta'}
+            ] * 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            incidente.delete()
+        
+        metricas = metricas_dashboard()
+        self.assertEqual(metricas['incidentes']['total'], 1)
+        self.assertEqual(metricas['accesos']['total_registros'], 3)
+        self.assertEqual(metricas['accesos']['hoy'], 3)
+    
+    def test_dashboard_en_una_consulta(self):
+        """Test de métricas por período y estado calculadas en un único SELECT"""
+        from datetime import timedelta
+        from .metricas import metricas_dashboard, recalcular_contadores
+        
+        self.crear_incidente(nivel_gravedad='critico')
+        self.crear_incidente(estado='resuelto', datos_ia_json={'confianza': 90})
+        self.crear_incidente(estado='cerrado', fecha_incidente=timezone.now() - timedelta(days=60))
+        RegistroAcceso.objects.create(
+            usuario=self.usuario, tipo_acceso='intento_fallido', metodo_acceso='facial',
+            ubicacion='Puerta', exitoso=False, fecha_hora=timezone.now() - timedelta(days=2)
+        )
+        RegistroAcceso.objects.create(
+            usuario=self.usuario, tipo_acceso='entrada', metodo_acceso='tarjeta',
+            ubicacion='Puerta', fecha_hora=timezone.now() + timedelta(days=1)
+        )
+        recalcular_contadores()
+        
+        with self.assertNumQueries(1):
+            metricas = metricas_dashboard()
+        
+        self.assertEqual(metricas['incidentes'], {
+            'abiertos': 1, 'criticos': 1, 'detectados_ia_30d': 1, 'total': 3
+        })
+        self.assertEqual(metricas['accesos'], {'hoy': 0, 'no_autorizados_7d': 1, 'total_registros': 2})
+        
+        response = self.client.get(reverse('dashboard-seguridad'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['dashboard']['incidentes']['total'], 3)
+
+
+class ResumenesDiariosTest(TestCase):
+    """Tests de los resúmenes diarios y el reporte por período"""
+    
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            username='supervisor', email='supervisor@example.com', password='testpass123'
+        )
+        self.hoy = timezone.localdate()
+    
+    def momento(self, dias_atras, hora=12):
+        from .resumenes import inicio_dia
+        return inicio_dia(self.hoy - timedelta(days=dias_atras)) + timedelta(hours=hora)
+    
+    def crear_acceso(self, fecha_hora, **kwargs):
+        datos = {'usuario': self.usuario, 'tipo_acceso': 'entrada', 'metodo_acceso': 'tarjeta',
+                 'ubicacion': 'Puerta', 'fecha_hora': fecha_hora}
+        datos.update(kwargs)
+        return RegistroAcceso.objects.create(**datos)
+    
+    def crear_datos(self):
+        for dias_atras in range(10):
+            self.crear_acceso(self.momento(dias_atras))
+            self.crear_acceso(self.momento(dias_atras, hora=2), exitoso=False, metodo_acceso='facial')
+        IncidenteSeguridad.objects.create(
+            titulo='Anomalía', descripcion='IA', tipo_incidente='sospechoso', nivel_gravedad='alto',
+            ubicacion='Zona A', fecha_incidente=self.momento(5), reportado_por=self.usuario,
+            datos_ia_json={'confianza': 90}
+        )
+    
+    def test_reporte_combina_resumenes_y_bordes(self):
+        """Test de que el reporte con resúmenes coincide con el calculado sobre filas originales"""
+        from .resumenes import reporte_seguridad, consolidar_dias, dias_por_consolidar
+        self.crear_datos()
+        # Período con bordes parciales: desde las 06:00 de hace 8 días hasta ahora
+        inicio, fin = self.momento(8, hora=6), self.momento(-1, hora=0) - timedelta(microseconds=1)
+        esperado = reporte_seguridad(inicio, fin)
+        self.assertEqual(esperado['periodo']['dias_desde_resumenes'], 0)
+        
+        dias = dias_por_consolidar()
+        self.assertEqual(dias[0], self.hoy - timedelta(days=9))
+        self.assertEqual(dias[-1], self.hoy - timedelta(days=1))
+        consolidar_dias(dias)
+        
+        with self.assertNumQueries(7):
+            reporte = reporte_seguridad(inicio, fin)
+        self.assertEqual(reporte['periodo']['dias_desde_resumenes'], 7)
+        for seccion in ('visitantes', 'accesos', 'incidentes'):
+            self.assertEqual(reporte[seccion], esperado[seccion])
+        self.assertEqual(reporte['accesos']['total'], 17)
+        self.assertEqual(reporte['accesos']['no_autorizados'], 8)
+        self.assertEqual(reporte['incidentes']['detectados_ia'], 1)
+    
+    def test_evento_tardio_deja_el_dia_pendiente(self):
+        """Test de que un evento en un día consolidado se refleja antes de reconsolidar"""
+        from .resumenes import reporte_seguridad, consolidar_dias, dias_por_consolidar
+        self.crear_datos()
+        consolidar_dias(dias_por_consolidar())
+        inicio, fin = self.momento(9, hora=0), timezone.now()
+        antes = reporte_seguridad(inicio, fin)['accesos']['total']
+        
+        self.crear_acceso(self.momento(3, hora=20))
+        reporte = reporte_seguridad(inicio, fin)
+        self.assertEqual(reporte['accesos']['total'], antes + 1)
+        self.assertEqual(reporte['periodo']['dias_desde_resumenes'], 8)
+        self.assertEqual(dias_por_consolidar(), [self.hoy - timedelta(days=3)])
+    
+    def test_edicion_que_mueve_de_dia_deja_ambos_dias_pendientes(self):
+        """Test de que mover un registro a otro día no deja su conteo en el día anterior"""
+        from .resumenes import reporte_seguridad, consolidar_dias, dias_por_consolidar
+        self.crear_datos()
+        consolidar_dias(dias_por_consolidar())
+        
+        acceso = RegistroAcceso.objects.filter(fecha_hora=self.momento(3)).get()
+        acceso.fecha_hora = self.momento(5)
+        acceso.save()
+        self.assertEqual(dias_por_consolidar(), [self.hoy - timedelta(days=5), self.hoy - timedelta(days=3)])
+        
+        reporte = reporte_seguridad(self.momento(3, hora=0), self.momento(3, hora=23))
+        self.assertEqual(reporte['accesos']['total'], 1)
+    
+    def test_endpoint_reporte(self):
+        """Test del endpoint de reporte por período"""
+        from rest_framework.test import APIClient
+        PerfilUsuario.objects.create(usuario=self.usuario, rol='administrador')
+        self.crear_datos()
+        cliente = APIClient()
+        cliente.force_authenticate(user=self.usuario)
+        url = reverse('reporte-periodo')
+        
+        response = cliente.get(url, {'fecha_inicio': self.momento(3, hora=0).isoformat(),
+                                     'fecha_fin': self.momento(0, hora=23).isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['reporte']['accesos']['total'], 8)
+        
+        response = cliente.get(url, {'fecha_inicio': '2026-02-01', 'fecha_fin': '2026-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExportacionRegistrosTest(APITestCase):
+    """Tests de la exportación en streaming"""
+    
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            username='auditor', email='auditor@example.com', password='testpass123'
+        )
+        PerfilUsuario.objects.create(usuario=self.usuario, rol='seguridad')
+        self.client.force_authenticate(user=self.usuario)
+        ahora = timezone.now()
+        RegistroAcceso.objects.bulk_create([
+            RegistroAcceso(usuario=self.usuario, tipo_acceso='entrada', metodo_acceso='tarjeta',
+                           ubicacion=f'Puerta, {i}', fecha_hora=ahora - timedelta(hours=i))
+            for i in range(1200)
+        ])
+    
+    def test_csv_en_streaming(self):
+        """Test de exportación CSV completa, en bloques y ordenada por fecha"""
+        import csv
+        from .exportaciones import FILAS_POR_ENVIO
+        response = self.client.get(reverse('exportar-registros', args=['accesos']))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="accesos_', response['Content-Disposition'])
+        bloques = list(response.streaming_content)
+        self.assertEqual(len(bloques), 1 + 1200 // FILAS_POR_ENVIO + 1)
+        
+        filas = list(csv.reader(b''.join(bloques).decode().splitlines()))
+        self.assertEqual(filas[0][:2], ['id', 'fecha_hora'])
+        self.assertEqual(len(filas), 1201)
+        self.assertEqual(filas[1][6], 'Puerta, 1199')
+        self.assertEqual(filas[1][3], 'auditor')
+    
+    def test_ndjson_filtrado_por_fecha(self):
+        """Test de exportación NDJSON con rango de fechas"""
+        import json
+        desde = (timezone.now() - timedelta(hours=9, minutes=30)).isoformat()
+        response = self.client.get(
+            reverse('exportar-registros', args=['accesos']), {'formato': 'ndjson', 'fecha_desde': desde}
+        )
+        eventos = [json.loads(linea) for linea in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(eventos), 10)
+        self.assertEqual(eventos[-1]['ubicacion'], 'Puerta, 0')
+    
+    def test_parametros_invalidos(self):
+        """Test de recurso, formato y fechas inválidos"""
+        url = reverse('exportar-registros', args=['accesos'])
+        self.assertEqual(self.client.get(url, {'formato': 'xml'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'fecha_desde': 'ayer'}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('exportar-registros', args=['usuarios']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AnalisisMorosidadLoteTest(APITestCase):
+    """Tests del análisis predictivo de morosidad por lotes"""
+    
+    def setUp(self):
+        from apps.finanzas.models import Pago, TipoPago
+        self.admin = Usuario.objects.create_user(
+            username='administrador', email='admin@example.com', password='testpass123'
+        )
+        PerfilUsuario.objects.create(usuario=self.admin, rol='administrador')
+        tipo = TipoPago.objects.create(nombre='Expensa', monto_base=Decimal('100.00'))
+        hoy = timezone.localdate()
+        
+        self.unidades = {}
+        for numero in ('puntual', 'morosa', 'nueva'):
+            propietario = Usuario.objects.create_user(username=numero, email=f'{numero}@example.com')
+            self.unidades[numero] = UnidadHabitacional.objects.create(
+                numero_unidad=numero[:10], edificio='A', propietario=propietario,
+                area_m2=Decimal('80.00'), dormitorios=2
+            )
+        
+        def pago(unidad, meses_atras, **kwargs):
+            vencimiento = hoy - timedelta(days=30 * meses_atras)
+            return Pago.objects.create(
+                unidad=unidad, usuario_pagador=unidad.propietario, tipo_pago=tipo,
+                monto_total=Decimal('100.00'), fecha_vencimiento=vencimiento,
+                periodo=vencimiento.strftime('%Y-%m'), **kwargs
+            )
+        
+        # 15 pagos puntuales: solo se analizan los últimos 12
+        for meses in range(15, 0, -1):
+            pago(self.unidades['puntual'], meses, estado='pagado', monto_pagado=Decimal('100.00'),
+                 fecha_pago=timezone.now() - timedelta(days=30 * meses + 2))
+        for meses in range(6, 0, -1):
+            pago(self.unidades['morosa'], meses, estado='vencido')
+    
+    def test_caracteristicas_y_puntuacion(self):
+        """Test de la matriz de características y los niveles de riesgo"""
+        from .morosidad import (
+            historial_pagos, matriz_caracteristicas, puntuar, CARACTERISTICAS, MODELO_HEURISTICO
+        )
+        ids = sorted(unidad.id for unidad in self.unidades.values())
+        
+        with self.assertNumQueries(1):
+            filas = list(historial_pagos(ids, timezone.localdate()))
+        matriz, resumen = matriz_caracteristicas(ids, filas)
+        self.assertEqual(matriz.shape, (3, len(CARACTERISTICAS)))
+        
+        puntual, morosa, nueva = (ids.index(self.unidades[n].id) for n in ('puntual', 'morosa', 'nueva'))
+        self.assertEqual(resumen['total_pagos'][puntual], 12)
+        self.assertEqual(resumen['tasa_a_tiempo'][puntual], 1.0)
+        self.assertEqual(resumen['tasa_a_tiempo'][morosa], 0.0)
+        self.assertEqual(resumen['saldo_pendiente'][morosa], 600.0)
+        self.assertAlmostEqual(resumen['retraso_promedio'][morosa], 105.0)
+        # Los retrasos de la unidad morosa son menores en los pagos recientes
+        self.assertLess(resumen['tendencia'][morosa], 0)
+        self.assertEqual(resumen['total_pagos'][nueva], 0)
+        
+        probabilidad, niveles, confianza = puntuar(matriz, resumen['total_pagos'], MODELO_HEURISTICO)
+        self.assertEqual(niveles[puntual], 'muy_bajo')
+        self.assertEqual(niveles[morosa], 'muy_alto')
+        self.assertGreater(confianza[puntual], confianza[nueva])
+    
+    def test_endpoint_lote(self):
+        """Test del endpoint de administración: un análisis por unidad"""
+        url = reverse('generar-analisis-morosidad-lote')
+        
+        guardia = Usuario.objects.create_user(username='guardia', email='guardia@example.com')
+        PerfilUsuario.objects.create(usuario=guardia, rol='seguridad')
+        self.client.force_authenticate(user=guardia)
+        self.assertEqual(self.client.post(url, {}, format='json').status_code, status.HTTP_403_FORBIDDEN)
+        
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['unidades_analizadas'], 3)
+        self.assertEqual(AnalisisPredictivoMorosidad.objects.count(), 3)
+        analisis = AnalisisPredictivoMorosidad.objects.get(unidad=self.unidades['morosa'])
+        self.assertEqual(analisis.usuario_analizado, self.unidades['morosa'].propietario)
+        self.assertEqual(analisis.factores_riesgo['historial_pagos']['pagos_tardios'], 6)
+        
+        response = self.client.post(url, {'unidades': [self.unidades['nueva'].id]}, format='json')
+        self.assertEqual(response.data['unidades_analizadas'], 1)
+        self.assertEqual(response.data['analisis_reutilizados'], 1)
+        self.assertEqual(AnalisisPredictivoMorosidad.objects.count(), 3)
+        response = self.client.post(url, {'unidades': 'todas'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ModeloMorosidadTest(TestCase):
+    """Tests del entrenamiento, la persistencia y el backtesting del modelo de morosidad"""
+    
+    def setUp(self):
+        from apps.finanzas.models import Pago, TipoPago
+        self.admin = Usuario.objects.create_user(username='administrador', email='admin@example.com')
+        tipo = TipoPago.objects.create(nombre='Expensa', monto_base=Decimal('100.00'))
+        self.hoy = timezone.localdate()
+        
+        # Unidades puntuales y unidades que dejaron de pagar, con 24 meses de historial
+        self.unidades = {'puntual': [], 'morosa': []}
+        pagos = []
+        for grupo in self.unidades:
+            for i in range(4):
+                propietario = Usuario.objects.create_user(username=f'{grupo}{i}', email=f'{grupo}{i}@example.com')
+                unidad = UnidadHabitacional.objects.create(
+                    numero_unidad=f'{grupo[0]}{i}', edificio='A', propietario=propietario,
+                    area_m2=Decimal('80.00'), dormitorios=2
+                )
+                self.unidades[grupo].append(unidad)
+                for meses in range(24, 0, -1):
+                    vencimiento = self.hoy - timedelta(days=30 * meses)
+                    pagado = grupo == 'puntual' or meses > 18 + i
+                    pagos.append(Pago(
+                        unidad=unidad, usuario_pagador=propietario, tipo_pago=tipo,
+                        monto_total=Decimal('100.00'), fecha_vencimiento=vencimiento,
+                        periodo=vencimiento.strftime('%Y-%m'),
+                        estado='pagado' if pagado else 'vencido',
+                        monto_pagado=Decimal('100.00') if pagado else Decimal('0.00'),
+                        fecha_pago=timezone.now() - timedelta(days=30 * meses + 1) if pagado else None,
+                    ))
+        Pago.objects.bulk_create(pagos)
+    
+    def test_resultados_en_el_horizonte(self):
+        """Test de la variable objetivo: impagos dentro del horizonte posterior al corte"""
+        from .morosidad import resultados
+        ids = sorted(u.id for grupo in self.unidades.values() for u in grupo)
+        con_pagos, morosas = resultados(ids, self.hoy - timedelta(days=365))
+        self.assertTrue(con_pagos.all())
+        esperadas = {u.id for u in self.unidades['morosa']}
+        self.assertEqual({i for i, m in zip(ids, morosas) if m}, esperadas)
+    
+    def test_entrenamiento_persistencia_y_uso(self):
+        """Test del modelo entrenado: guardado, cargado por el worker y registrado en el análisis"""
+        from . import morosidad
+        modelo = morosidad.entrenar_modelo(meses=12, iteraciones=500)
+        self.assertEqual(modelo.metricas['entrenamiento']['auc'], 1.0)
+        self.assertGreater(modelo.metricas['validacion']['exactitud'], 0.9)
+        
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = f'{directorio}/modelos/morosidad.npz'
+            with override_settings(MODELO_MOROSIDAD_RUTA=ruta):
+                self.assertIs(morosidad.modelo_vigente(), morosidad.MODELO_HEURISTICO)
+                modelo.guardar(ruta)
+                cargado = morosidad.modelo_vigente()
+                self.assertIs(morosidad.modelo_vigente(), cargado)
+                self.assertEqual(cargado.version, modelo.version)
+                np.testing.assert_allclose(cargado.coeficientes, modelo.coeficientes)
+                
+                analisis = {a.unidad_id: a for a in morosidad.analizar_unidades(self.admin)[0]}
+        
+        self.assertEqual(analisis[self.unidades['morosa'][0].id].modelo_utilizado, 'morosidad_logistica')
+        self.assertEqual(analisis[self.unidades['morosa'][0].id].version_modelo, modelo.version)
+        self.assertEqual(analisis[self.unidades['morosa'][0].id].nivel_riesgo, 'muy_alto')
+        self.assertEqual(analisis[self.unidades['puntual'][0].id].nivel_riesgo, 'muy_bajo')
+        
+        # Mismas entradas, mismo resultado
+        repetido = morosidad.analizar_unidades(self.admin, modelo=modelo, forzar_recalculo=True)[0]
+        self.assertEqual(
+            [a.probabilidad_morosidad for a in analisis.values()],
+            [a.probabilidad_morosidad for a in repetido]
+        )
+    
+    def test_reutiliza_analisis_vigente_con_la_misma_huella(self):
+        """Test de la memoización por unidad, versión del modelo y huella del historial"""
+        from apps.finanzas.models import HistorialPago
+        from .morosidad import analizar_unidades, MODELO_HEURISTICO
+        
+        primeros, reutilizados = analizar_unidades(self.admin, modelo=MODELO_HEURISTICO)
+        self.assertEqual(reutilizados, 0)
+        with self.assertNumQueries(4):
+            segundos, reutilizados = analizar_unidades(self.admin, modelo=MODELO_HEURISTICO)
+        self.assertEqual(reutilizados, 8)
+        self.assertEqual([a.id for a in segundos], [a.id for a in primeros])
+        
+        # Un abono nuevo cambia la huella de su unidad
+        unidad = self.unidades['morosa'][0]
+        HistorialPago.objects.create(
+            pago=unidad.pagos.filter(estado='vencido').first(), monto_transaccion=Decimal('50.00'),
+            estado_anterior='vencido', estado_nuevo='parcial'
+        )
+        terceros, reutilizados = analizar_unidades(self.admin, modelo=MODELO_HEURISTICO)
+        self.assertEqual(reutilizados, 7)
+        nuevo = next(a for a in terceros if a.unidad_id == unidad.id)
+        self.assertNotIn(nuevo.id, {a.id for a in primeros})
+        
+        # Otra versión del modelo o el recálculo forzado no reutilizan
+        otro = type(MODELO_HEURISTICO)('morosidad_heuristico', '9.9.9', [0] * 6, 0)
+        self.assertEqual(analizar_unidades(self.admin, modelo=otro)[1], 0)
+        self.assertEqual(analizar_unidades(self.admin, modelo=MODELO_HEURISTICO, forzar_recalculo=True)[1], 0)
+        self.assertEqual(AnalisisPredictivoMorosidad.objects.count(), 8 + 1 + 8 + 8)
+    
+    def test_pago_impago_cambia_la_huella_al_avanzar_el_corte(self):
+        """Test de que una unidad que sigue sin pagar no reutiliza el análisis anterior"""
+        from .morosidad import analizar_unidades, MODELO_HEURISTICO
+        
+        primeros, _ = analizar_unidades(self.admin, modelo=MODELO_HEURISTICO)
+        with mock.patch.object(timezone, 'localdate', return_value=self.hoy + timedelta(days=3)):
+            segundos, reutilizados = analizar_unidades(self.admin, modelo=MODELO_HEURISTICO)
+        
+        self.assertEqual(reutilizados, 4)
+        reutilizadas = {a.unidad_id for a in segundos if a.id in {p.id for p in primeros}}
+        self.assertEqual(reutilizadas, {u.id for u in self.unidades['puntual']})
+    
+    def test_backtesting_completa_fue_preciso(self):
+        """Test de evaluar_predicciones sobre análisis cuyo horizonte ya terminó"""
+        from .morosidad import evaluar_predicciones
+        
+        def analisis(unidad, probabilidad, dias_atras):
+            creado = AnalisisPredictivoMorosidad.objects.create(
+                unidad=unidad, usuario_analizado=unidad.propietario, probabilidad_morosidad=probabilidad,
+                nivel_riesgo='medio', modelo_utilizado='prueba', version_modelo='1',
+                confianza_prediccion=Decimal('80'), valido_hasta=timezone.now(), generado_por=self.admin
+            )
+            AnalisisPredictivoMorosidad.objects.filter(id=creado.id).update(
+                fecha_analisis=timezone.now() - timedelta(days=dias_atras)
+            )
+            return creado.id
+        
+        acierto = analisis(self.unidades['morosa'][0], Decimal('90'), 365)
+        error = analisis(self.unidades['puntual'][0], Decimal('70'), 365)
+        reciente = analisis(self.unidades['morosa'][0], Decimal('90'), 10)
+        
+        self.assertEqual(evaluar_predicciones(), (2, 1))
+        valores = dict(AnalisisPredictivoMorosidad.objects.values_list('id', 'fue_preciso'))
+        self.assertEqual(valores, {acierto: True, error: False, reciente: None})
+        self.assertEqual(evaluar_predicciones(), (0, 0))
+
+
+
+class BarridoVisitasVencidasTest(TestCase):
+    """Tests del barrido de visitas vencidas"""
+    
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        self.guardias = []
+        for numero in range(2):
+            guardia = Usuario.objects.create_user(username=f'guardia{numero}', email=f'guardia{numero}@example.com')
+            PerfilUsuario.objects.create(usuario=guardia, rol='seguridad')
+            self.guardias.append(guardia)
+        self.unidad = UnidadHabitacional.objects.create(
+            numero_unidad='101', edificio='A', propietario=self.admin,
+            area_m2=Decimal('80.00'), dormitorios=2
+        )
+        self.corta = TipoVisitante.objects.create(nombre='Delivery', tiempo_maximo_visita=30)
+        self.larga = TipoVisitante.objects.create(nombre='Familiar', tiempo_maximo_visita=480)
+    
+    def visita(self, tipo, minutos_dentro, estado='en_visita'):
+        return RegistroVisitante.objects.create(
+            nombres='Ana', apellidos='Rojas', tipo_visitante=tipo, unidad_destino=self.unidad,
+            motivo_visita='Visita', registrado_por=self.admin, estado=estado,
+            fecha_ingreso=timezone.now() - timedelta(minutes=minutos_dentro)
+        )
+    
+    def test_vence_segun_tiempo_maximo_del_tipo(self):
+        """Test de vencimiento con el tiempo máximo de cada tipo y alerta única"""
+        from apps.comunicacion.models import Notificacion
+        from .models import BarridoVisitas
+        from .visitas import barrer_visitas_vencidas
+        
+        vencida = self.visita(self.corta, 45)
+        en_plazo_corta = self.visita(self.corta, 10)
+        en_plazo_larga = self.visita(self.larga, 45)
+        vencida_larga = self.visita(self.larga, 500)
+        finalizada = self.visita(self.corta, 90, estado='finalizado')
+        
+        barrido = barrer_visitas_vencidas()
+        
+        estados = dict(RegistroVisitante.objects.values_list('id', 'estado'))
+        self.assertEqual(estados[vencida.id], 'vencido')
+        self.assertEqual(estados[vencida_larga.id], 'vencido')
+        self.assertEqual(estados[en_plazo_corta.id], 'en_visita')
+        self.assertEqual(estados[en_plazo_larga.id], 'en_visita')
+        self.assertEqual(estados[finalizada.id], 'finalizado')
+        
+        self.assertEqual((barrido.visitas_vencidas, barrido.alertas_enviadas), (2, 2))
+        self.assertGreaterEqual(barrido.duracion_ms, 0)
+        notificacion = Notificacion.objects.get()
+        self.assertEqual(sorted(notificacion.metadatos['visitas_vencidas']), sorted([vencida.id, vencida_larga.id]))
+        self.assertEqual(
+            set(notificacion.destinatarios.values_list('usuario_id', flat=True)),
+            {guardia.id for guardia in self.guardias}
+        )
+        
+        # Un segundo barrido no vuelve a alertar por las mismas visitas
+        barrido = barrer_visitas_vencidas()
+        self.assertEqual((barrido.visitas_vencidas, barrido.alertas_enviadas), (0, 0))
+        self.assertEqual(Notificacion.objects.count(), 1)
+        self.assertEqual(BarridoVisitas.objects.count(), 2)
+    
+    def test_comando_una_vez(self):
+        """Test del comando en modo --una-vez"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        self.visita(self.corta, 45)
+        salida = StringIO()
+        call_command('barrer_visitas_vencidas', '--una-vez', stdout=salida)
+        self.assertIn('1 visita(s) vencida(s), 2 alerta(s)', salida.getvalue())
+        self.assertFalse(RegistroVisitante.objects.filter(estado='en_visita').exists())
+
+
+class IngresoQRTest(APITestCase):
+    """Tests del ingreso de visitantes con código QR"""
+    
+    def setUp(self):
+        from .visitas import resolver_codigo_qr
+        resolver_codigo_qr.cache_clear()
+        self.guardia = Usuario.objects.create_user(
+            username='guardia', email='guardia@example.com', password='testpass123'
+        )
+        PerfilUsuario.objects.create(usuario=self.guardia, rol='seguridad')
+        self.client.force_authenticate(user=self.guardia)
+        self.unidad = UnidadHabitacional.objects.create(
+            numero_unidad='101', edificio='A', propietario=self.guardia,
+            area_m2=Decimal('80.00'), dormitorios=2
+        )
+        self.tipo = TipoVisitante.objects.create(nombre='Familiar')
+        self.url = reverse('visitantes-ingreso-qr')
+    
+    def visita(self, horas_desde_autorizacion=1, estado='autorizado'):
+        return RegistroVisitante.objects.create(
+            nombres='Ana', apellidos='Rojas', tipo_visitante=self.tipo, unidad_destino=self.unidad,
+            motivo_visita='Visita', registrado_por=self.guardia, estado=estado,
+            fecha_autorizacion=timezone.now() - timedelta(hours=horas_desde_autorizacion)
+        )
+    
+    def test_ingreso_valido_registra_acceso(self):
+        """Test de ingreso: la visita pasa a en_visita y se crea el acceso"""
+        visita = self.visita()
+        response = self.client.post(self.url, {'codigo_qr': visita.codigo_qr, 'ubicacion': 'Puerta norte'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['visita']['unidad_destino'], '101')
+        visita.refresh_from_db()
+        self.assertEqual(visita.estado, 'en_visita')
+        self.assertIsNotNone(visita.fecha_ingreso)
+        acceso = RegistroAcceso.objects.get(id=response.data['registro_acceso_id'])
+        self.assertEqual((acceso.usuario, acceso.metodo_acceso, acceso.ubicacion), (self.guardia, 'codigo', 'Puerta norte'))
+        self.assertEqual(acceso.fecha_hora, visita.fecha_ingreso)
+        
+        # El mismo código no registra un segundo ingreso
+        response = self.client.post(self.url, {'codigo_qr': visita.codigo_qr})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['motivo'], 'ya_ingresado')
+        self.assertEqual(RegistroAcceso.objects.count(), 1)
+    
+    def test_rechazos(self):
+        """Test de código inexistente, visita no autorizada y QR fuera de vigencia"""
+        pendiente = self.visita(estado='pendiente')
+        vencida = self.visita(horas_desde_autorizacion=30)
+        
+        casos = [
+            ('VIS-NOEXISTE', status.HTTP_404_NOT_FOUND, 'no_encontrado'),
+            (pendiente.codigo_qr, status.HTTP_409_CONFLICT, 'estado_invalido'),
+            (vencida.codigo_qr, status.HTTP_410_GONE, 'fuera_de_vigencia'),
+        ]
+        for codigo, estado_http, motivo in casos:
+            response = self.client.post(self.url, {'codigo_qr': codigo})
+            self.assertEqual(response.status_code, estado_http)
+            self.assertEqual(response.data['motivo'], motivo)
+        self.assertFalse(RegistroAcceso.objects.exists())
+        self.assertFalse(RegistroVisitante.objects.filter(estado='en_visita').exists())
+    
+    def test_codigo_en_cache_no_consulta_la_visita(self):
+        """Test del camino rápido: con el código en caché solo hay UPDATE e INSERT"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .visitas import ErrorIngresoQR, registrar_ingreso_qr, resolver_codigo_qr
+        
+        visita = self.visita()
+        resolver_codigo_qr(visita.codigo_qr)
+        with CaptureQueriesContext(connection) as consultas:
+            registrar_ingreso_qr(visita.codigo_qr, self.guardia, 'Portería')
+        sentencias = [c['sql'].split()[0] for c in consultas if not c['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(sentencias, ['UPDATE', 'INSERT'])
+        self.assertEqual(resolver_codigo_qr.cache_info().hits, 1)
+        
+        # Una entrada obsoleta (código cambiado) no permite el ingreso
+        otra = self.visita()
+        resolver_codigo_qr(otra.codigo_qr)
+        RegistroVisitante.objects.filter(id=otra.id).update(codigo_qr='VIS-NUEVO')
+        with self.assertRaises(ErrorIngresoQR) as error:
+            registrar_ingreso_qr(otra.codigo_qr, self.guardia, 'Portería')
+        self.assertEqual(error.exception.codigo, 'no_encontrado')
@@ -0,0 +1,172 @@
+"""
+Cola de trabajos de IA respaldada por la base de datos (tabla trabajos_ia).
+
+Los endpoints encolan el trabajo y responden de inmediato; el comando
+`procesar_trabajos_ia` toma trabajos pendientes con
+SELECT ... FOR UPDATE SKIP LOCKED, de modo que varios workers pueden
+consumir la misma cola sin bloquearse ni tomar dos veces el mismo trabajo.
+
+La toma se confirma de inmediato y el análisis corre fuera de transacciones,
+actualizando fecha_actualizacion cada INTERVALO_LATIDO; un trabajo sin latido
+durante TIEMPO_SIN_AVANCE se reencola. El resultado (y el incidente) se
+escriben en una transacción corta, solo si el trabajo sigue tomado por el
+mismo intento.
+"""
+import logging
+import os
+import socket
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TrabajoIA
+from .anomalias import procesar_deteccion_anomalias, crear_incidente_si_corresponde
+from .analisis_video import PASO_FRAMES
+
+logger = logging.getLogger(__name__)
+
+MAX_INTENTOS = 3
+# Un trabajo 'procesando' sin latido por más tiempo que esto se considera
+# abandonado (p. ej. el worker murió) y se reintenta
+TIEMPO_SIN_AVANCE = timedelta(minutes=15)
+INTERVALO_LATIDO = timedelta(minutes=1)
+
+
+def identificador_worker():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def encolar_trabajo(tipo_trabajo, archivo, parametros, usuario):
+    """Guarda el archivo y crea el trabajo en estado pendiente"""
+    return TrabajoIA.objects.create(
+        tipo_trabajo=tipo_trabajo,
+        archivo=archivo,
+        parametros=parametros,
+        solicitado_por=usuario
+    )
+
+
+def tomar_trabajo(worker=None):
+    """
+    Marca como 'procesando' el trabajo pendiente más antiguo y lo retorna, o
+    None si la cola está vacía. Las filas bloqueadas por otro worker se saltan.
+    """
+    with transaction.atomic():
+        trabajo = (
+            TrabajoIA.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente')
+            .order_by('fecha_creacion', 'id')
+            .first()
+        )
+        if trabajo is None:
+            return None
+        trabajo.estado = 'procesando'
+        trabajo.intentos += 1
+        trabajo.worker = worker or identificador_worker()
+        trabajo.fecha_inicio = timezone.now()
+        trabajo.save(update_fields=['estado', 'intentos', 'worker', 'fecha_inicio', 'fecha_actualizacion'])
+    return trabajo
+
+
+class Latido:
+    """
+    Marca el trabajo como activo (fecha_actualizacion) durante el análisis, a
+    lo sumo una vez por `intervalo`, para que no se considere abandonado
+    """
+
+    def __init__(self, trabajo, intervalo=INTERVALO_LATIDO):
+        self.trabajo = trabajo
+        self.intervalo = intervalo.total_seconds()
+        self.siguiente = time.monotonic() + self.intervalo
+
+    def __call__(self):
+        if time.monotonic() < self.siguiente:
+            return
+        TrabajoIA.objects.filter(id=self.trabajo.id).update(fecha_actualizacion=timezone.now())
+        self.siguiente = time.monotonic() + self.intervalo
+
+
+def _analizar_anomalias(trabajo, latido):
+    parametros = trabajo.parametros
+    with trabajo.archivo.open('rb') as archivo:
+        return procesar_deteccion_anomalias(
+            archivo, parametros.get('tipo_analisis', 'movimiento'),
+            parametros.get('zona_analisis'), parametros.get('sensibilidad', 70.0),
+            parametros.get('paso_frames', PASO_FRAMES), latido=latido
+        )
+
+
+def _registrar_anomalias(trabajo, resultado):
+    return crear_incidente_si_corresponde(
+        resultado, trabajo.parametros.get('tipo_analisis', 'movimiento'), trabajo.solicitado_por
+    )
+
+
+# analizar(trabajo, latido) -> resultado: la parte larga, fuera de transacciones.
+# registrar(trabajo, resultado) -> incidente o None: en la transacción final
+Procesador = namedtuple('Procesador', 'analizar registrar')
+
+PROCESADORES = {
+    'deteccion_anomalias': Procesador(_analizar_anomalias, _registrar_anomalias),
+}
+
+
+def _bloquear_si_sigue_tomado(trabajo):
+    """
+    Bloquea la fila si el trabajo sigue tomado por este intento; False si
+    entretanto se dio por abandonado (y quizás otro worker lo retomó)
+    """
+    return TrabajoIA.objects.select_for_update().filter(
+        id=trabajo.id, estado='procesando', intentos=trabajo.intentos
+    ).exists()
+
+
+def procesar_trabajo(trabajo):
+    """
+    Ejecuta un trabajo ya tomado y registra su resultado o error. El análisis
+    corre sin transacción, latiendo periódicamente; el resultado y el
+    incidente se escriben en una transacción corta al final.
+    """
+    procesador = PROCESADORES[trabajo.tipo_trabajo]
+    try:
+        resultado = procesador.analizar(trabajo, Latido(trabajo))
+        with transaction.atomic():
+            if not _bloquear_si_sigue_tomado(trabajo):
+                logger.warning(f"Trabajo de IA {trabajo.id} retomado por otro worker; se descarta el resultado")
+                return trabajo
+            trabajo.incidente = procesador.registrar(trabajo, resultado)
+            trabajo.resultado = resultado
+            trabajo.estado = 'completado'
+            trabajo.error = ''
+            trabajo.fecha_fin = timezone.now()
+            trabajo.save(update_fields=[
+                'resultado', 'estado', 'error', 'incidente', 'fecha_fin', 'fecha_actualizacion'
+            ])
+    except Exception as e:
+        logger.exception(f"Error procesando trabajo de IA {trabajo.id}")
+        with transaction.atomic():
+            if not _bloquear_si_sigue_tomado(trabajo):
+                return trabajo
+            trabajo.estado = 'pendiente' if trabajo.intentos < MAX_INTENTOS else 'fallido'
+            trabajo.error = str(e)
+            trabajo.incidente = None
+            trabajo.fecha_fin = timezone.now()
+            trabajo.save(update_fields=['estado', 'error', 'incidente', 'fecha_fin', 'fecha_actualizacion'])
+    return trabajo
+
+
+def recuperar_trabajos_abandonados():
+    """Devuelve a la cola (o marca como fallidos) los trabajos de workers caídos"""
+    limite = timezone.now() - TIEMPO_SIN_AVANCE
+    abandonados = TrabajoIA.objects.filter(estado='procesando', fecha_actualizacion__lt=limite)
+    fallidos = abandonados.filter(intentos__gte=MAX_INTENTOS).update(
+        estado='fallido', error='El worker dejó de responder', fecha_fin=timezone.now(),
+        fecha_actualizacion=timezone.now()
+    )
+    reencolados = abandonados.filter(intentos__lt=MAX_INTENTOS).update(
+        estado='pendiente', fecha_actualizacion=timezone.now()
+    )
+    return reencolados, fallidos
@@ -11,6 +11,7 @@ urlpatterns = [
     # Registro de visitantes
     path('visitantes/', views.RegistroVisitanteListCreateView.as_view(), name='visitantes-list'),
     path('visitantes/<int:pk>/', views.RegistroVisitanteDetailView.as_view(), name='visitantes-detail'),
+    path('visitantes/ingreso-qr/', views.ingreso_visitante_qr, name='visitantes-ingreso-qr'),
     
     # Reconocimiento facial
     path('reconocimiento-facial/', views.reconocimiento_facial, name='reconocimiento-facial'),
@@ -25,6 +26,7 @@ urlpatterns = [
     # Registro de accesos
     path('accesos/', views.RegistroAccesoListCreateView.as_view(), name='accesos-list'),
     path('accesos/<int:pk>/', views.RegistroAccesoDetailView.as_view(), name='accesos-detail'),
+    path('accesos/ingesta-masiva/', views.ingesta_masiva_accesos, name='accesos-ingesta-masiva'),
     
     # Incidentes de seguridad
     path('incidentes/', views.IncidenteSeguridadListCreateView.as_view(), name='incidentes-list'),
@@ -32,6 +34,7 @@ urlpatterns = [
     
     # Detección de anomalías
     path('detectar-anomalias/', views.detectar_anomalias, name='detectar-anomalias'),
+    path('trabajos-ia/<int:pk>/', views.estado_trabajo_ia, name='trabajo-ia-detail'),
     
     # Configuración de IA
     path('configuracion-ia/', views.ConfiguracionIAListCreateView.as_view(), name='configuracion-ia-list'),
@@ -40,8 +43,10 @@ urlpatterns = [
     # Análisis predictivo de morosidad
     path('analisis-morosidad/', views.AnalisisPredictivoMorosidadListView.as_view(), name='analisis-morosidad-list'),
     path('generar-analisis-morosidad/', views.generar_analisis_morosidad, name='generar-analisis-morosidad'),
+    path('generar-analisis-morosidad/lote/', views.generar_analisis_morosidad_lote, name='generar-analisis-morosidad-lote'),
     
     # Dashboard y reportes
     path('dashboard/', views.dashboard_seguridad, name='dashboard-seguridad'),
     path('reporte-periodo/', views.reporte_seguridad_periodo, name='reporte-periodo'),
+    path('exportar/<str:recurso>/', views.exportar_registros, name='exportar-registros'),
 ]
\ No newline at end of file
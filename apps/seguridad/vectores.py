@@ -0,0 +1,33 @@
+"""
+Empaquetado binario de vectores faciales y biométricos.
+
+Los vectores se guardan como bytes float32 little-endian (512 bytes para 128
+dimensiones) en lugar de listas JSON, y se leen como vistas NumPy sin copia.
+"""
+import numpy as np
+
+TIPO_VECTOR = np.dtype('<f4')
+
+
+def empaquetar_vector(vector):
+    """Convierte un vector (lista o arreglo) a bytes float32"""
+    if vector is None:
+        return None
+    return np.ascontiguousarray(vector, dtype=TIPO_VECTOR).tobytes()
+
+
+def desempaquetar_vector(datos):
+    """
+    Retorna una vista NumPy (solo lectura) sobre los bytes almacenados, sin
+    copiar. Acepta bytes o memoryview (según el driver de base de datos).
+    """
+    if datos is None or len(datos) == 0:
+        return None
+    return np.frombuffer(datos, dtype=TIPO_VECTOR)
+
+
+def desempaquetar_lote(lista_datos, dimension):
+    """Une varios vectores empaquetados en una matriz (n, dimension) con una sola copia"""
+    if not lista_datos:
+        return np.empty((0, dimension), dtype=TIPO_VECTOR)
+    return np.frombuffer(b''.join(lista_datos), dtype=TIPO_VECTOR).reshape(-1, dimension)
@@ -0,0 +1,250 @@
+"""
+Ingreso por código QR y barrido de visitas vencidas.
+
+Ingreso por QR: el código escaneado se resuelve con una caché LRU por worker
+(respaldada por el índice único de codigo_qr) a los datos de la visita que no
+cambian después del registro. El cambio `autorizado` -> `en_visita` es un
+único UPDATE condicional (código, estado y vigencia), de modo que dos
+lecturas simultáneas del mismo código no registran dos ingresos; el
+RegistroAcceso se crea en la misma transacción. Una entrada obsoleta de la
+caché no produce ingresos indebidos: el UPDATE vuelve a exigir el código.
+
+Barrido: una visita `en_visita` vence cuando fecha_ingreso + tiempo_maximo_visita (del
+tipo de visitante, en minutos) ya pasó. El barrido las marca `vencido` con un
+único UPDATE ... FROM tipos_visitantes (en PostgreSQL, con RETURNING de las
+filas afectadas) y avisa al personal de seguridad con una sola notificación
+que lista las visitas, creando los destinatarios con bulk_create.
+
+Cada ejecución queda registrada en barridos_visitas con su duración. El
+comando `barrer_visitas_vencidas` lo ejecuta una vez (cron) o en bucle.
+"""
+import functools
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F, Q
+from django.utils import timezone
+
+from apps.autenticacion.cache_dashboards import invalidar_dashboard
+from apps.autenticacion.models import Usuario
+from apps.comunicacion.models import CategoriaNotificacion, Notificacion, DestinatarioNotificacion
+
+from .models import RegistroVisitante, RegistroAcceso, BarridoVisitas
+from .resumenes import marcar_dias_pendientes
+
+TAMANO_CACHE_QR = 4096
+VISITAS_POR_ALERTA = 50      # visitas detalladas en el mensaje; el resto va en metadatos
+MICROSEGUNDOS_POR_MINUTO = 60_000_000
+
+
+# =====================================================================
+# INGRESO POR QR
+# =====================================================================
+
+class ErrorIngresoQR(Exception):
+    """Código QR que no permite el ingreso; `codigo` identifica el motivo"""
+
+    def __init__(self, codigo, mensaje):
+        super().__init__(mensaje)
+        self.codigo = codigo
+
+
+@functools.lru_cache(maxsize=TAMANO_CACHE_QR)
+def resolver_codigo_qr(codigo):
+    """
+    Datos inmutables de la visita con `codigo` (id, nombres, apellidos,
+    unidad, fecha_creacion). Los códigos inexistentes lanzan LookupError y no
+    se cachean.
+    """
+    fila = RegistroVisitante.objects.filter(codigo_qr=codigo).values_list(
+        'id', 'nombres', 'apellidos', 'unidad_destino__numero_unidad', 'fecha_creacion'
+    ).first()
+    if fila is None:
+        raise LookupError(codigo)
+    return fila
+
+
+def vigencia_qr():
+    return timedelta(hours=getattr(settings, 'VIGENCIA_QR_VISITA_HORAS', 24))
+
+
+def _motivo_rechazo(visita_id, codigo):
+    """Explica por qué el UPDATE condicional no afectó ninguna fila"""
+    fila = RegistroVisitante.objects.filter(id=visita_id, codigo_qr=codigo).values(
+        'estado', 'fecha_autorizacion', 'fecha_creacion'
+    ).first()
+    if fila is None:
+        # Visita eliminada o código cambiado: lru_cache no permite quitar una sola entrada
+        resolver_codigo_qr.cache_clear()
+        return ErrorIngresoQR('no_encontrado', 'Código QR no registrado')
+    if fila['estado'] == 'en_visita':
+        return ErrorIngresoQR('ya_ingresado', 'La visita ya registró su ingreso')
+    if fila['estado'] != 'autorizado':
+        return ErrorIngresoQR('estado_invalido', f"La visita está en estado '{fila['estado']}'")
+    return ErrorIngresoQR('fuera_de_vigencia', 'El código QR ya no está vigente')
+
+
+def registrar_ingreso_qr(codigo, guardia, ubicacion, ahora=None):
+    """
+    Registra el ingreso de la visita con `codigo`. Retorna (datos de la
+    visita, RegistroAcceso); lanza ErrorIngresoQR si el código no lo permite.
+    """
+    ahora = ahora or timezone.now()
+    try:
+        visita_id, nombres, apellidos, unidad, fecha_creacion = resolver_codigo_qr(codigo)
+    except LookupError:
+        raise ErrorIngresoQR('no_encontrado', 'Código QR no registrado')
+
+    inicio_vigencia = ahora - vigencia_qr()
+    with transaction.atomic():
+        ingresadas = RegistroVisitante.objects.filter(
+            Q(fecha_autorizacion__gte=inicio_vigencia)
+            | Q(fecha_autorizacion__isnull=True, fecha_creacion__gte=inicio_vigencia),
+            id=visita_id, codigo_qr=codigo, estado='autorizado',
+        ).update(estado='en_visita', fecha_ingreso=ahora, fecha_actualizacion=ahora)
+        if not ingresadas:
+            raise _motivo_rechazo(visita_id, codigo)
+
+        acceso = RegistroAcceso.objects.create(
+            usuario=guardia, tipo_acceso='entrada', metodo_acceso='codigo', ubicacion=ubicacion,
+            fecha_hora=ahora, observaciones=f"Ingreso de visitante {nombres} {apellidos} (QR {codigo})"
+        )
+        # El UPDATE no emite señales
+        marcar_dias_pendientes([fecha_creacion])
+        invalidar_dashboard('dashboard_seguridad')
+
+    visita = {
+        'id': visita_id,
+        'nombres': nombres,
+        'apellidos': apellidos,
+        'unidad_destino': unidad,
+        'estado': 'en_visita',
+        'fecha_ingreso': ahora,
+    }
+    return visita, acceso
+
+
+# =====================================================================
+# BARRIDO DE VISITAS VENCIDAS
+# =====================================================================
+
+_SQL_VENCER = """
+    UPDATE registros_visitantes AS v
+    SET estado = 'vencido', fecha_actualizacion = %s
+    FROM tipos_visitantes AS t
+    WHERE v.tipo_visitante_id = t.id
+      AND v.estado = 'en_visita'
+      AND v.fecha_ingreso + t.tiempo_maximo_visita * INTERVAL '1 minute' < %s
+    RETURNING v.id, v.nombres, v.apellidos, v.unidad_destino_id, v.fecha_ingreso, v.fecha_creacion
+"""
+_COLUMNAS = ('id', 'nombres', 'apellidos', 'unidad_destino_id', 'fecha_ingreso', 'fecha_creacion')
+
+
+def _vencer_postgresql(ahora):
+    with connection.cursor() as cursor:
+        cursor.execute(_SQL_VENCER, [ahora, ahora])
+        return [dict(zip(_COLUMNAS, fila)) for fila in cursor.fetchall()]
+
+
+def _vencer_orm(ahora):
+    # Otros motores: misma condición, seleccionando antes las filas a actualizar.
+    # Sin intervalos nativos, las duraciones se representan en microsegundos
+    maximo = ExpressionWrapper(
+        F('tipo_visitante__tiempo_maximo_visita') * MICROSEGUNDOS_POR_MINUTO, output_field=DurationField()
+    )
+    limite = ExpressionWrapper(F('fecha_ingreso') + maximo, output_field=DateTimeField())
+    filas = list(
+        RegistroVisitante.objects.select_for_update()
+        .filter(estado='en_visita', fecha_ingreso__isnull=False)
+        .annotate(limite=limite).filter(limite__lt=ahora)
+        .order_by().values(*_COLUMNAS)
+    )
+    RegistroVisitante.objects.filter(id__in=[fila['id'] for fila in filas]).update(
+        estado='vencido', fecha_actualizacion=ahora
+    )
+    return filas
+
+
+def vencer_visitas(ahora=None):
+    """Marca como vencidas las visitas excedidas. Retorna las filas afectadas"""
+    ahora = ahora or timezone.now()
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            vencidas = _vencer_postgresql(ahora)
+        else:
+            vencidas = _vencer_orm(ahora)
+        if vencidas:
+            # El UPDATE no emite señales: resúmenes y dashboard se actualizan aquí
+            marcar_dias_pendientes(fila['fecha_creacion'] for fila in vencidas)
+            invalidar_dashboard('dashboard_seguridad')
+    return vencidas
+
+
+def _creador_alertas():
+    return Usuario.objects.filter(is_superuser=True, is_active=True).order_by('id').first()
+
+
+def enviar_alertas_vencidas(vencidas, ahora=None):
+    """
+    Una notificación para el personal de seguridad con las visitas vencidas.
+    Retorna la cantidad de destinatarios.
+    """
+    if not vencidas:
+        return 0
+    destinatarios = list(
+        Usuario.objects.filter(perfil__rol='seguridad', is_active=True).values_list('id', flat=True)
+    )
+    creador = _creador_alertas()
+    if not destinatarios or creador is None:
+        return 0
+
+    ahora = ahora or timezone.now()
+    detalle = [
+        f"- {fila['nombres']} {fila['apellidos']} (ingreso {timezone.localtime(fila['fecha_ingreso']):%H:%M})"
+        for fila in vencidas[:VISITAS_POR_ALERTA]
+    ]
+    if len(vencidas) > VISITAS_POR_ALERTA:
+        detalle.append(f"... y {len(vencidas) - VISITAS_POR_ALERTA} más")
+
+    with transaction.atomic():
+        categoria, _ = CategoriaNotificacion.objects.get_or_create(
+            nombre='Seguridad',
+            defaults={'descripcion': 'Alertas de seguridad del condominio', 'prioridad': 3}
+        )
+        notificacion = Notificacion.objects.create(
+            titulo=f"{len(vencidas)} visita(s) excedieron el tiempo máximo",
+            mensaje="Visitas vencidas:\n" + "\n".join(detalle),
+            categoria=categoria,
+            tipo_destinatario='seguridad',
+            es_urgente=True,
+            metadatos={'visitas_vencidas': [fila['id'] for fila in vencidas]},
+            estado='enviada',
+            total_destinatarios=len(destinatarios),
+            total_enviados=len(destinatarios),
+            creado_por=creador,
+            fecha_envio=ahora,
+        )
+        DestinatarioNotificacion.objects.bulk_create([
+            DestinatarioNotificacion(
+                notificacion=notificacion, usuario_id=usuario_id, estado='enviado', fecha_envio=ahora
+            )
+            for usuario_id in destinatarios
+        ])
+        # bulk_create no emite post_save
+        invalidar_dashboard('estadisticas_notificaciones')
+    return len(destinatarios)
+
+
+def barrer_visitas_vencidas(ahora=None):
+    """Vence las visitas excedidas, envía las alertas y registra el barrido"""
+    inicio = time.perf_counter()
+    ahora = ahora or timezone.now()
+    vencidas = vencer_visitas(ahora)
+    alertas = enviar_alertas_vencidas(vencidas, ahora)
+    return BarridoVisitas.objects.create(
+        visitas_vencidas=len(vencidas),
+        alertas_enviadas=alertas,
+        duracion_ms=round((time.perf_counter() - inicio) * 1000),
+    )
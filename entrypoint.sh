@@ -12,6 +12,9 @@ echo "Base de datos disponible, ejecutando migraciones..."
 # Ejecutar migraciones
 python manage.py migrate --noinput
 
+# Particiones mensuales de registros de acceso para los próximos meses
+python manage.py gestionar_particiones_accesos --solo-crear
+
 # Recolectar archivos estáticos
 python manage.py collectstatic --noinput
 
@@ -20,4 +23,4 @@ echo "Cargando datos iniciales..."
 python manage.py create_default_users
 
 echo "Iniciando servidor Gunicorn..."
-exec gunicorn --bind 0.0.0.0:8000 --workers 4 --timeout 120 --max-requests 1000 --max-requests-jitter 100 smart_condominium.wsgi:application
\ No newline at end of file
+exec gunicorn --bind 0.0.0.0:8000 --workers 4 --worker-class gthread --threads 4 --timeout 120 --max-requests 1000 --max-requests-jitter 100 smart_condominium.wsgi:application
\ No newline at end of file
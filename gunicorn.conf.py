@@ -8,8 +8,10 @@ bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
 workers = int(os.environ.get('WEB_CONCURRENCY', '4'))
 
 # Configuración de worker
-worker_class = "sync"
-worker_connections = 1000
+# gthread: el timeout vigila al proceso, no la duración de cada request, así las
+# exportaciones en streaming largas no terminan con el worker reiniciado
+worker_class = "gthread"
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
 timeout = 30
 keepalive = 2
 
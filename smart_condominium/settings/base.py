@@ -146,5 +146,44 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Las subidas mayores a este tamaño se escriben a un archivo temporal en lugar de
+# mantenerse en memoria (el preprocesamiento de IA las lee desde disco)
+FILE_UPLOAD_MAX_MEMORY_SIZE = config('FILE_UPLOAD_MAX_MEMORY_SIZE', default=1024 * 1024, cast=int)
+
+# Índice vectorial de reconocimiento facial (fuera de MEDIA_ROOT: no debe servirse públicamente)
+INDICE_FACIAL_DIR = config('INDICE_FACIAL_DIR', default=os.path.join(BASE_DIR, 'var', 'indice_facial'))
+
+# Modelo entrenado de morosidad (comando entrenar_modelo_morosidad)
+MODELO_MOROSIDAD_RUTA = config(
+    'MODELO_MOROSIDAD_RUTA', default=os.path.join(BASE_DIR, 'var', 'modelos', 'morosidad.npz')
+)
+
+# Caché (dashboards y estadísticas). Redis si REDIS_URL está definido; si no,
+# memoria local del proceso (desarrollo y tests)
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'smart_condominium',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'smart_condominium',
+        }
+    }
+
+# Meses de registros de acceso que se conservan en la tabla particionada; los
+# anteriores se desprenden con el comando gestionar_particiones_accesos
+RETENCION_REGISTROS_ACCESOS_MESES = config('RETENCION_REGISTROS_ACCESOS_MESES', default=24, cast=int)
+
+# Horas desde la autorización durante las que el código QR de una visita
+# permite el ingreso (endpoint visitantes/ingreso-qr/)
+VIGENCIA_QR_VISITA_HORAS = config('VIGENCIA_QR_VISITA_HORAS', default=24, cast=int)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
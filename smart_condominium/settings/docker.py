@@ -26,11 +26,9 @@ DATABASES = {
 # Redis para Docker
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
         'LOCATION': 'redis://redis_simple:6379/0',
-        'OPTIONS': {
-            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-        }
+        'KEY_PREFIX': 'smart_condominium',
     }
 }
 